@@ -0,0 +1,134 @@
+"""
+Estado persistente del modo incremental de AnalizadorVentas.
+Guarda los agregados acumulados y la marca del último registro procesado de
+NUEVOS REGISTROS, junto con la huella de las hojas base (VENTAS y VEHICULOS)
+para detectar cuándo hace falta reconstruir desde cero. El cubo por fecha va
+en particiones por día junto al estado, así que cada ejecución escribe solo
+los días del delta.
+"""
+
+import json
+import logging
+import os
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from cubos_ventas import carpeta_particiones
+from motor_agregacion import AgregadosVentas
+
+logger = logging.getLogger(__name__)
+
+# Incrementar cuando cambie el formato del estado o la forma de los agregados
+# (5: las filas sin ID ya no se descartan; los estados anteriores se reconstruyen)
+VERSION_ESTADO = 5
+
+_NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_NS_PKG = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def huella_hojas(archivo_excel, nombres_hojas):
+    """
+    Huella de las hojas indicadas a partir del CRC32 y tamaño de su XML dentro
+    del .xlsx. Solo lee el directorio del zip, sin descomprimir las hojas.
+
+    Returns:
+        dict: Nombre de hoja -> 'crc:tamaño'
+    """
+    with zipfile.ZipFile(archivo_excel) as zf:
+        libro = ET.fromstring(zf.read('xl/workbook.xml'))
+        relaciones = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+        destinos = {rel.get('Id'): rel.get('Target') for rel in relaciones.iter(f'{_NS_PKG}Relationship')}
+
+        huella = {}
+        for hoja in libro.iter(f'{_NS_MAIN}sheet'):
+            nombre = hoja.get('name')
+            if nombre not in nombres_hojas:
+                continue
+            destino = destinos[hoja.get(f'{_NS_REL}id')]
+            ruta = destino.lstrip('/') if destino.startswith('/') else posixpath.join('xl', destino)
+            info = zf.getinfo(posixpath.normpath(ruta))
+            huella[nombre] = f"{info.CRC:08x}:{info.file_size}"
+        return huella
+
+
+class EstadoIncremental:
+    def __init__(self, huella_base=None, ultimo_id=None, filas_procesadas=0, agregados=None):
+        self.huella_base = huella_base or {}
+        self.ultimo_id = ultimo_id
+        self.filas_procesadas = filas_procesadas
+        self.agregados = agregados or AgregadosVentas()
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Lee el estado desde disco; devuelve None si no existe o es de otra versión"""
+        if not os.path.exists(ruta):
+            return None
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+            if datos.get('version') != VERSION_ESTADO:
+                return None
+            # Una partición del cubo que falte también obliga a reconstruir
+            agregados = AgregadosVentas.desde_dict(datos['agregados'], carpeta_particiones(ruta))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Estado incremental ilegible, se reconstruirá: {str(e)}")
+            return None
+
+        return cls(huella_base=datos['huella_base'],
+                   ultimo_id=datos['ultimo_id'],
+                   filas_procesadas=datos['filas_procesadas'],
+                   agregados=agregados)
+
+    def guardar(self, ruta):
+        """
+        Escribe el estado de forma atómica (archivo temporal + reemplazo). Las
+        particiones nuevas del cubo se escriben antes: si se interrumpe, el
+        estado anterior sigue apuntando solo a las suyas.
+        """
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        carpeta_cubo = carpeta_particiones(ruta)
+        self.agregados.cubo.guardar_particiones(carpeta_cubo)
+        datos = {
+            'version': VERSION_ESTADO,
+            'huella_base': self.huella_base,
+            'ultimo_id': self.ultimo_id,
+            'filas_procesadas': self.filas_procesadas,
+            'agregados': self.agregados.a_dict(),
+        }
+        temporal = ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+        self.agregados.cubo.limpiar_particiones(carpeta_cubo)
+
+    def filtrar_no_vistos(self, df_nuevos):
+        """
+        Devuelve solo las filas de NUEVOS REGISTROS que aún no se procesaron.
+        Usa la columna ID como marca de agua; si no existe, la posición de la fila.
+        Las filas sin ID no se pueden comparar con la marca: se toman por su
+        posición (las añadidas desde la última ejecución) y se avisa en el log.
+        """
+        if 'ID' not in df_nuevos.columns:
+            return df_nuevos.iloc[self.filas_procesadas:]
+
+        sin_id = df_nuevos['ID'].isna().to_numpy()
+        nuevas_sin_id = sin_id & (np.arange(len(df_nuevos)) >= self.filas_procesadas)
+        if nuevas_sin_id.any():
+            logger.warning(f"⚠️ {int(nuevas_sin_id.sum())} filas nuevas de NUEVOS REGISTROS sin ID: "
+                           f"se procesan por su posición en la hoja")
+        if self.ultimo_id is None:
+            return df_nuevos[~sin_id | nuevas_sin_id]
+        return df_nuevos[(df_nuevos['ID'] > self.ultimo_id).to_numpy() | nuevas_sin_id]
+
+    def avanzar(self, df_nuevos, df_procesado):
+        """Mueve la marca de agua tras procesar df_procesado"""
+        if 'ID' in df_procesado.columns and df_procesado['ID'].notna().any():
+            maximo = int(df_procesado['ID'].max())
+            self.ultimo_id = maximo if self.ultimo_id is None else max(self.ultimo_id, maximo)
+        self.filas_procesadas = len(df_nuevos)
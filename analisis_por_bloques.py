@@ -0,0 +1,183 @@
+"""
+Análisis fuera de memoria para libros más grandes que la RAM.
+Las ventas se leen en bloques acotados (desde .xlsx o exportaciones .csv),
+cada bloque se combina con la dimensión VEHICULOS y se pliega en los mismos
+agregados que produce AnalizadorVentas.ejecutar_analisis_completo. El pico de
+memoria depende del tamaño del bloque y no del número total de filas.
+"""
+
+import logging
+import os
+
+import pandas as pd
+
+from motor_agregacion import AgregadosVentas, agregar_dataframe
+from tipos_ventas import tipar_dataframe
+from ventas_rpa import (AnalizadorVentas, COLUMNAS_VENTAS, COLUMNAS_VEHICULOS,
+                        leer_bloques_excel, leer_hojas_excel)
+
+logger = logging.getLogger(__name__)
+
+HOJAS_VENTAS = {
+    'VENTAS': COLUMNAS_VENTAS,
+    'NUEVOS REGISTROS': COLUMNAS_VENTAS,
+}
+
+
+def _es_csv(ruta):
+    return os.path.splitext(ruta)[1].lower() == '.csv'
+
+
+def leer_bloques_csv(ruta_csv, columnas, tamano_bloque):
+    """Generador de bloques de un CSV exportado, leyendo solo las columnas indicadas"""
+    lector = pd.read_csv(ruta_csv, usecols=lambda columna: columna in columnas,
+                         chunksize=tamano_bloque)
+    with lector:
+        for bloque in lector:
+            yield bloque
+
+
+def cargar_vehiculos(ruta):
+    """Carga la dimensión VEHICULOS desde la hoja de un .xlsx o desde un .csv"""
+    if _es_csv(ruta):
+        return pd.read_csv(ruta, usecols=lambda columna: columna in COLUMNAS_VEHICULOS)
+    return leer_hojas_excel(ruta, {'VEHICULOS': COLUMNAS_VEHICULOS})['VEHICULOS']
+
+
+class AnalizadorVentasPorBloques(AnalizadorVentas):
+    """
+    Variante de AnalizadorVentas que nunca materializa el DataFrame completo.
+    Tras ejecutar, self.df contiene solo el último bloque procesado.
+    """
+
+    def __init__(self, fuentes, archivo_vehiculos=None, tamano_bloque=50_000, perfilador=None,
+                 exportador=None):
+        """
+        Args:
+            fuentes (list|str): Archivos .xlsx (hojas VENTAS y NUEVOS REGISTROS) o .csv
+            archivo_vehiculos (str): .xlsx con hoja VEHICULOS o .csv del catálogo.
+                Por defecto, el primer .xlsx de fuentes.
+            tamano_bloque (int): Filas por bloque
+            exportador (ExportadorResultados): Si se indica, recibe las filas
+                enriquecidas de cada bloque (ver exportacion.py)
+        """
+        fuentes = [fuentes] if isinstance(fuentes, str) else list(fuentes)
+        super().__init__(fuentes[0], usar_cache=False, perfilador=perfilador)
+        self.fuentes = fuentes
+        self.tamano_bloque = tamano_bloque
+        self.archivo_vehiculos = archivo_vehiculos or next(
+            (ruta for ruta in fuentes if not _es_csv(ruta)), None)
+        self.bloques_procesados = 0
+        self.exportador = exportador
+
+    def _tipar_columnas(self):
+        # Por bloque no se registra el reporte de memoria para no saturar el log
+        self.df, self.reporte_memoria = tipar_dataframe(self.df)
+
+    def _iterar_bloques(self):
+        for fuente in self.fuentes:
+            if _es_csv(fuente):
+                for bloque in leer_bloques_csv(fuente, COLUMNAS_VENTAS, self.tamano_bloque):
+                    yield fuente, bloque
+            else:
+                for _, bloque in leer_bloques_excel(fuente, HOJAS_VENTAS, self.tamano_bloque):
+                    yield fuente, bloque
+
+    def cargar_datos_multiple_hojas(self):
+        """
+        Por bloques no se materializa el DataFrame completo: recorre las fuentes
+        con preparar_datos y deja los agregados totales en self.resultados
+        """
+        return self.preparar_datos()
+
+    def preparar_datos(self):
+        """
+        Recorre las fuentes por bloques (lectura, validación, precio sin IGV y
+        agregados). self.df queda con el último bloque y self.resultados con
+        los totales.
+        """
+        try:
+            with self.perfilador.etapa('bloques') as etapa:
+                if not self.analizar_por_bloques():
+                    return False
+                etapa['filas'] = self.agregados.total_ventas
+        except Exception as e:
+            logger.error(f"Error en el análisis por bloques: {str(e)}")
+            return False
+        return True
+
+    def analizar_por_bloques(self, top_n=5):
+        """
+        Recorre todas las fuentes por bloques y acumula los agregados
+
+        Returns:
+            bool: True si se procesó al menos un bloque válido
+        """
+        if not self.archivo_vehiculos:
+            logger.error("Se requiere archivo_vehiculos cuando todas las fuentes son CSV")
+            return False
+
+        df_vehiculos = cargar_vehiculos(self.archivo_vehiculos)
+        logger.info(f"VEHICULOS: {len(df_vehiculos)} registros")
+
+        self.agregados = AgregadosVentas()
+        self.bloques_procesados = 0
+        self.validador.reiniciar()
+        bloques = self._iterar_bloques()
+        while True:
+            with self.perfilador.etapa('lectura_bloque') as etapa:
+                fuente, bloque = next(bloques, (None, None))
+                etapa['filas'] = len(bloque) if bloque is not None else None
+            if bloque is None:
+                break
+            self._preparar_ventas(bloque, df_vehiculos)
+            if self.bloques_procesados == 0 and not self.validar_datos():
+                return False
+            # Las columnas se comprueban una vez; las reglas por fila, en cada bloque
+            with self.perfilador.etapa('validacion_filas', len(self.df)):
+                self.validar_filas()
+            with self.perfilador.etapa('precio_sin_igv', len(self.df)):
+                self.calcular_precio_sin_igv()
+            with self.perfilador.etapa('agregados', len(self.df)):
+                self.agregados.combinar(agregar_dataframe(self.df))
+            if self.exportador is not None:
+                with self.perfilador.etapa('exportacion_filas', len(self.df)):
+                    self.exportador.agregar_filas(self.df)
+            self.bloques_procesados += 1
+            logger.info(f"📦 Bloque {self.bloques_procesados} ({fuente}): "
+                        f"{self.agregados.total_ventas:,} registros acumulados")
+
+        if self.bloques_procesados == 0:
+            logger.error("Las fuentes no contienen ventas")
+            return False
+        self.validador.registrar_resumen()
+
+        # self.df es solo el último bloque: los resultados salen enteros de los agregados
+        self.resultados = self.agregados.a_resultados(top_n)
+        logger.info(f"✅ Agregados por bloques: {self.agregados.total_ventas:,} registros "
+                    f"en {self.bloques_procesados} bloques")
+        return True
+
+    def exportar_resultados(self, carpeta='exportacion', formatos=('csv',), incluir_filas=False):
+        """
+        Exporta los agregados. Las filas no se conservan entre bloques: para
+        exportarlas, pasar un ExportadorResultados en el constructor.
+        """
+        if incluir_filas:
+            logger.warning("⚠️ Por bloques, las filas se exportan durante el análisis "
+                           "(parámetro exportador); aquí solo se exportan los agregados")
+        return super().exportar_resultados(carpeta, formatos)
+
+    def ejecutar_analisis_completo(self, paralelo=False, carpeta_salida='graficos',
+                                   generar_graficos=True):
+        """Ejecuta el análisis completo por bloques y genera los gráficos"""
+        logger.info(f"🚀 Iniciando análisis por bloques de {self.tamano_bloque:,} filas...")
+
+        if not self.preparar_datos():
+            return False
+
+        if generar_graficos and not self.generar_graficos(carpeta_salida, paralelo=paralelo):
+            return False
+
+        logger.info("✅ Análisis completado exitosamente")
+        return True
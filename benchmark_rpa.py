@@ -0,0 +1,371 @@
+"""
+Benchmarks del RPA de ventas
+Compara la carga en una sola pasada contra la lectura original con tres llamadas a pd.read_excel.
+Con --suite mide carga, análisis, gráficos y reporte sobre libros sintéticos de
+distintos tamaños (crear_datos_prueba.py) y añade cada resultado a un historial
+JSONL para comparar el rendimiento entre versiones.
+Con --arranque comprueba el presupuesto de arranque de main.py report-text.
+Con --graficos compara tamaño y tiempo de render de cada formato de gráficos.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from perfilado import Perfilador
+from ventas_rpa import HOJAS_EXCEL, AnalizadorVentas, leer_hojas_excel
+
+# 10 millones va por CSV y por bloques (unos 4 min y ~0,5 GB de RSS, más 1,5 GB de datos en disco)
+TAMANOS_SUITE = [10_000, 100_000, 1_000_000, 10_000_000]
+HISTORIAL = 'benchmarks_historial.jsonl'
+ETAPAS_SUITE = ['carga', 'analisis', 'graficos', 'reporte']
+
+# Segundos de pared de `main.py report-text` en un proceso nuevo (intérprete,
+# pandas y lectura desde la caché del libro incluidos)
+PRESUPUESTO_ARRANQUE_S = 1.0
+# Módulos que el camino de solo texto (main.py report-text) no debe importar
+MODULOS_PESADOS = ['matplotlib', 'seaborn', 'twilio']
+
+# Ejecuta un subcomando y escribe en la última línea los módulos pesados importados
+_SONDA_MODULOS = """
+import contextlib, io, json, sys
+import main
+with contextlib.redirect_stdout(io.StringIO()):
+    ok = main.main(sys.argv[1:])
+print(json.dumps({'ok': ok, 'modulos': [m for m in %r if m in sys.modules]}))
+""" % (MODULOS_PESADOS,)
+
+
+def cargar_tres_llamadas(archivo_excel):
+    """Ruta de carga original: un pd.read_excel por hoja (reabre el libro cada vez)"""
+    return {hoja: pd.read_excel(archivo_excel, sheet_name=hoja) for hoja in HOJAS_EXCEL}
+
+
+def cargar_una_pasada(archivo_excel):
+    """Ruta de carga nueva: el libro se abre una vez y se recorre fila a fila"""
+    return leer_hojas_excel(archivo_excel)
+
+
+def medir(funcion, archivo_excel, repeticiones):
+    """Ejecuta la función varias veces y devuelve los tiempos en segundos"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(archivo_excel)
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def benchmark_carga(archivo_excel, repeticiones=3):
+    """Compara ambas rutas de carga e imprime la mediana de cada una"""
+    print(f"📊 Benchmark de carga: {archivo_excel} ({repeticiones} repeticiones)")
+    print("=" * 50)
+
+    resultados = {}
+    for nombre, funcion in [('tres_llamadas', cargar_tres_llamadas),
+                            ('una_pasada', cargar_una_pasada)]:
+        tiempos = medir(funcion, archivo_excel, repeticiones)
+        resultados[nombre] = statistics.median(tiempos)
+        print(f"• {nombre}: mediana {resultados[nombre]:.3f}s (mín {min(tiempos):.3f}s)")
+
+    aceleracion = resultados['tres_llamadas'] / resultados['una_pasada']
+    print(f"🚀 Aceleración: {aceleracion:.2f}x")
+    return resultados
+
+
+def _cronometrar(comando, repeticiones, directorio=None):
+    """Mediana de segundos de pared del comando en procesos nuevos y la última salida"""
+    raiz = os.path.dirname(os.path.abspath(__file__))
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        proceso = subprocess.run(comando, cwd=directorio or raiz, capture_output=True, text=True,
+                                 env=dict(os.environ, PYTHONPATH=raiz))
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos), proceso
+
+
+def medir_arranque(archivo_excel, repeticiones=5, directorio=None):
+    """
+    Mide `main.py report-text` en procesos nuevos. Una primera ejecución, fuera
+    de la medición, escribe la caché del libro: el presupuesto es el del uso
+    habitual en tareas programadas, no el de la primera lectura del Excel.
+
+    Args:
+        directorio (str): Carpeta de trabajo de los procesos (donde queda la caché)
+
+    Returns:
+        dict: 'ayuda' y 'report_text' (medianas en segundos), 'ok' (el subcomando
+            terminó bien), 'modulos' (pesados importados) y 'error' (stderr si falló)
+    """
+    archivo_excel = os.path.abspath(archivo_excel)
+    principal = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+    ayuda, _ = _cronometrar([sys.executable, principal, '--help'], repeticiones, directorio)
+
+    comando = [sys.executable, '-c', _SONDA_MODULOS, 'report-text', '--archivo', archivo_excel]
+    _cronometrar(comando, 1, directorio)
+    reporte, proceso = _cronometrar(comando, repeticiones, directorio)
+    medicion = {'ayuda': ayuda, 'report_text': reporte, 'ok': False, 'modulos': [], 'error': None}
+    try:
+        medicion.update(json.loads(proceso.stdout.strip().splitlines()[-1]))
+    except (IndexError, ValueError):
+        medicion['error'] = proceso.stderr[-2000:]
+    return medicion
+
+
+def benchmark_arranque(archivo_excel, repeticiones=5, presupuesto=PRESUPUESTO_ARRANQUE_S):
+    """
+    Comprueba el arranque del CLI: `main.py report-text` (con la caché del libro
+    ya escrita) debe quedar dentro del presupuesto y no importar matplotlib,
+    seaborn ni twilio. También muestra `main.py --help` como referencia.
+
+    Returns:
+        bool: True si se cumplen ambas condiciones
+    """
+    print(f"⏱️ Benchmark de arranque del CLI ({repeticiones} repeticiones)")
+    print("=" * 50)
+
+    medicion = medir_arranque(archivo_excel, repeticiones)
+    print(f"• main.py --help: mediana {medicion['ayuda']:.3f}s")
+    if medicion['error'] is not None:
+        print(f"❌ report-text falló:\n{medicion['error']}")
+        return False
+    dentro = medicion['report_text'] <= presupuesto
+    print(f"• main.py report-text: mediana {medicion['report_text']:.3f}s "
+          f"(presupuesto {presupuesto:.3f}s) {'✅' if dentro else '❌'} "
+          f"({'OK' if medicion['ok'] else 'ERROR'})")
+    if medicion['modulos']:
+        print(f"❌ report-text importó módulos pesados: {', '.join(medicion['modulos'])}")
+    else:
+        print(f"✅ report-text no importa {', '.join(MODULOS_PESADOS)}")
+    return dentro and medicion['ok'] and not medicion['modulos']
+
+
+def benchmark_graficos(archivo_excel, repeticiones=3):
+    """
+    Dibuja los cinco gráficos en cada formato de graficos_ventas.FORMATOS sobre
+    los mismos resultados (sin caché) y compara tamaño y tiempo con el PNG de 300 dpi
+
+    Returns:
+        dict: Formato -> {'segundos': mediana, 'bytes': tamaño total, 'archivos': bytes por gráfico}
+    """
+    from graficos_ventas import FORMATOS, generar_graficos
+
+    print(f"🎨 Benchmark de gráficos: {archivo_excel} ({repeticiones} repeticiones)")
+    print("=" * 50)
+    analizador = AnalizadorVentas(archivo_excel, usar_cache=False)
+    if not analizador.preparar_datos():
+        raise RuntimeError(f"No se pudo analizar {archivo_excel}")
+    analizador.calcular_agregados()
+
+    medidas = {}
+    for formato, (extension, _) in FORMATOS.items():
+        tiempos = []
+        with tempfile.TemporaryDirectory() as carpeta:
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                estado = generar_graficos(analizador.resultados, carpeta, usar_cache=False,
+                                          formato=formato)
+                tiempos.append(time.perf_counter() - inicio)
+            errores = {nombre: error for nombre, error in estado.items() if error}
+            if errores:
+                raise RuntimeError(f"Gráficos {formato} con error: {errores}")
+            archivos = {nombre: os.path.getsize(os.path.join(carpeta, nombre + extension))
+                        for nombre in estado}
+        medidas[formato] = {'segundos': statistics.median(tiempos),
+                            'bytes': sum(archivos.values()), 'archivos': archivos}
+
+    base = medidas['png']
+    print(f"{'Formato':<8} {'Tiempo':>9} {'Tamaño':>11}  vs png (tiempo / tamaño)")
+    for formato, medida in medidas.items():
+        print(f"{formato:<8} {medida['segundos']:>8.3f}s {medida['bytes'] / 1024:>8,.0f} KB  "
+              f"{base['segundos'] / medida['segundos']:>6.1f}x / {base['bytes'] / medida['bytes']:>6.1f}x")
+    return medidas
+
+
+def preparar_datos(filas, carpeta_datos='datos_benchmark', semilla=42):
+    """
+    Genera (o reutiliza si ya existen) los datos sintéticos de un tamaño
+
+    Returns:
+        dict: Descripción de los datos (ver crear_datos_prueba.crear_datos_prueba)
+    """
+    from crear_datos_prueba import LIMITE_FILAS_XLSX, crear_datos_prueba
+
+    ruta = os.path.join(carpeta_datos, f'ventas_{filas}_s{semilla}.xlsx')
+    if filas < LIMITE_FILAS_XLSX and os.path.exists(ruta):
+        return {'formato': 'xlsx', 'fuentes': [ruta], 'vehiculos': ruta, 'filas': filas}
+    carpeta_csv = os.path.splitext(ruta)[0] + '_csv'
+    if filas >= LIMITE_FILAS_XLSX and os.path.exists(os.path.join(carpeta_csv, 'VEHICULOS.csv')):
+        return {'formato': 'csv', 'vehiculos': os.path.join(carpeta_csv, 'VEHICULOS.csv'),
+                'fuentes': [os.path.join(carpeta_csv, nombre)
+                            for nombre in ('VENTAS.csv', 'NUEVOS REGISTROS.csv')], 'filas': filas}
+    # Todas las ventas en VENTAS; NUEVOS REGISTROS vacía para que el tamaño sea exacto
+    return dict(crear_datos_prueba(ruta, filas, n_nuevos=0, semilla=semilla), filas=filas)
+
+
+def medir_tamano(datos, graficos=True):
+    """
+    Ejecuta carga, análisis, gráficos y reporte sobre unos datos de prueba.
+    Se ejecuta en un proceso aparte para que el pico de memoria sea el de este tamaño.
+
+    Returns:
+        dict: Segundos, CPU y filas/s por etapa, total y pico de RSS
+    """
+    perfilador = Perfilador()
+    if datos['formato'] == 'xlsx':
+        analizador = AnalizadorVentas(datos['fuentes'][0], usar_cache=False, perfilador=perfilador)
+        with perfilador.etapa('carga', datos['filas']):
+            if not analizador.cargar_datos_multiple_hojas():
+                raise RuntimeError(f"No se pudo cargar {datos['fuentes'][0]}")
+        with perfilador.etapa('analisis', datos['filas']):
+            analizador.validar_datos()
+            analizador.validar_filas()
+            analizador.calcular_precio_sin_igv()
+            analizador.calcular_agregados()
+    else:
+        # Por bloques la carga y el análisis van juntos: se mide todo como análisis
+        from analisis_por_bloques import AnalizadorVentasPorBloques
+
+        analizador = AnalizadorVentasPorBloques(datos['fuentes'], datos['vehiculos'],
+                                                perfilador=perfilador)
+        with perfilador.etapa('analisis', datos['filas']):
+            if not analizador.analizar_por_bloques():
+                raise RuntimeError("No se pudo analizar por bloques")
+
+    if graficos:
+        with tempfile.TemporaryDirectory() as carpeta:
+            with perfilador.etapa('graficos'):
+                analizador.generar_graficos(carpeta, usar_cache=False)
+    with perfilador.etapa('reporte'):
+        analizador.generar_reporte_texto()
+
+    etapas = {registro['etapa']: {'pared_s': registro['pared_s'], 'cpu_s': registro['cpu_s'],
+                                  'filas_por_s': registro['filas_por_s']}
+              for registro in perfilador.a_dict()['etapas'] if registro['etapa'] in ETAPAS_SUITE}
+    return {
+        'etapas': etapas,
+        'total_s': sum(etapa['pared_s'] for etapa in etapas.values()),
+        'rss_pico_bytes': perfilador.rss_pico_proceso(),
+    }
+
+
+def _commit_actual():
+    try:
+        salida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, timeout=10, cwd=os.path.dirname(os.path.abspath(__file__)))
+        return salida.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _entorno():
+    import numpy as np
+
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'procesador': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def leer_historial(ruta_historial=HISTORIAL):
+    if not os.path.exists(ruta_historial):
+        return []
+    with open(ruta_historial, 'r', encoding='utf-8') as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+def _anterior(historial, entrada):
+    """Última ejecución con el mismo tamaño, formato, gráficos y máquina"""
+    for previa in reversed(historial):
+        if (previa['filas'] == entrada['filas'] and previa['formato'] == entrada['formato']
+                and previa.get('graficos') == entrada['graficos']
+                and previa['entorno'].get('plataforma') == entrada['entorno']['plataforma']):
+            return previa
+    return None
+
+
+def benchmark_suite(tamanos=None, carpeta_datos='datos_benchmark', ruta_historial=HISTORIAL,
+                    graficos=True, semilla=42):
+    """
+    Mide el pipeline completo para cada tamaño y registra los resultados en el historial
+
+    Returns:
+        list: Entradas añadidas al historial
+    """
+    tamanos = tamanos or TAMANOS_SUITE
+    historial = leer_historial(ruta_historial)
+    commit, entorno = _commit_actual(), _entorno()
+    entradas = []
+
+    print(f"📊 Suite de benchmarks: {', '.join(f'{n:,}' for n in tamanos)} filas")
+    print("=" * 78)
+    print(f"{'Filas':>11} {'Formato':<7} " + ' '.join(f'{etapa:>10}' for etapa in ETAPAS_SUITE)
+          + f" {'Filas/s':>10} {'RSS':>8}")
+    for filas in tamanos:
+        datos = preparar_datos(filas, carpeta_datos, semilla)
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            medicion = pool.submit(medir_tamano, datos, graficos).result()
+
+        entrada = dict(medicion, fecha=time.strftime('%Y-%m-%d %H:%M:%S'), commit=commit,
+                       entorno=entorno, filas=filas, formato=datos['formato'], semilla=semilla,
+                       graficos=graficos,
+                       filas_por_s=filas / medicion['total_s'] if medicion['total_s'] else None)
+        previa = _anterior(historial, entrada)
+        historial.append(entrada)
+        entradas.append(entrada)
+        with open(ruta_historial, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entrada, ensure_ascii=False) + '\n')
+
+        tiempos = ' '.join(f"{medicion['etapas'][etapa]['pared_s']:>9.2f}s" if etapa in medicion['etapas']
+                           else f"{'-':>10}" for etapa in ETAPAS_SUITE)
+        rss = f"{medicion['rss_pico_bytes'] / 1024 ** 2:,.0f}MB" if medicion['rss_pico_bytes'] else '-'
+        print(f"{filas:>11,} {datos['formato']:<7} {tiempos} {entrada['filas_por_s'] or 0:>10,.0f} {rss:>8}")
+        if previa:
+            cambio = entrada['total_s'] / previa['total_s'] - 1
+            print(f"{'':>11} vs {previa['commit'] or 'anterior'} ({previa['fecha']}): {cambio:+.1%}")
+
+    print(f"📝 Resultados añadidos a {ruta_historial}")
+    return entradas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks del RPA de ventas")
+    parser.add_argument('archivo', nargs='?', default="Ventas Fundamentos.xlsx")
+    parser.add_argument('-n', '--repeticiones', type=int, default=3)
+    parser.add_argument('--suite', action='store_true',
+                        help="Medir el pipeline completo sobre datos sintéticos")
+    parser.add_argument('--tamanos', type=int, nargs='+', default=TAMANOS_SUITE,
+                        help="Filas de cada libro sintético (hasta 10 millones)")
+    parser.add_argument('--datos', default='datos_benchmark', help="Carpeta de datos sintéticos")
+    parser.add_argument('--historial', default=HISTORIAL)
+    parser.add_argument('--sin-graficos', action='store_true')
+    parser.add_argument('--arranque', action='store_true',
+                        help="Comprobar el presupuesto de arranque del CLI (sale con 1 si no se cumple)")
+    parser.add_argument('--presupuesto', type=float, default=PRESUPUESTO_ARRANQUE_S,
+                        help="Segundos máximos de main.py report-text para --arranque")
+    parser.add_argument('--graficos', action='store_true',
+                        help="Comparar tamaño y tiempo de render de cada formato de gráficos")
+    args = parser.parse_args()
+
+    if args.arranque:
+        sys.exit(0 if benchmark_arranque(args.archivo, args.repeticiones, args.presupuesto) else 1)
+    elif args.graficos:
+        benchmark_graficos(args.archivo, args.repeticiones)
+    elif args.suite:
+        benchmark_suite(args.tamanos, args.datos, args.historial, graficos=not args.sin_graficos)
+    else:
+        benchmark_carga(args.archivo, args.repeticiones)
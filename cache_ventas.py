@@ -0,0 +1,118 @@
+"""
+Caché columnar en disco del DataFrame combinado y estandarizado.
+Cada entrada se identifica por el hash del contenido del libro y su fecha de
+modificación, de modo que cualquier cambio en el Excel invalida la caché.
+Las entradas se guardan en formato Arrow IPC sin compresión para poder leerlas
+mediante memoria mapeada.
+"""
+
+import hashlib
+import logging
+import os
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Incrementar cuando cambie la forma del DataFrame que se guarda en caché
+VERSION_CACHE = 4
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - dependencia opcional
+    pa = None
+    feather = None
+
+
+def hash_archivo(ruta, tamano_bloque=1 << 20):
+    """Calcula el SHA-256 del contenido de un archivo leyendo por bloques"""
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(tamano_bloque), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+class CacheColumnar:
+    def __init__(self, carpeta='.cache_ventas'):
+        self.carpeta = carpeta
+        self.disponible = pa is not None
+        if not self.disponible:
+            logger.warning("pyarrow no está instalado. La caché columnar está desactivada.")
+
+    def clave(self, archivo_excel):
+        """
+        Genera la clave de caché del libro: hash de contenido + mtime + versión
+        """
+        mtime_ns = os.stat(archivo_excel).st_mtime_ns
+        return f"{hash_archivo(archivo_excel)[:32]}-{mtime_ns}-v{VERSION_CACHE}"
+
+    def _prefijo(self, archivo_excel):
+        nombre = os.path.splitext(os.path.basename(archivo_excel))[0]
+        return nombre.replace(' ', '_') + '-'
+
+    def _ruta(self, archivo_excel, clave):
+        return os.path.join(self.carpeta, f"{self._prefijo(archivo_excel)}{clave}.arrow")
+
+    def cargar(self, archivo_excel):
+        """
+        Devuelve el DataFrame en caché del libro o None si no existe o está obsoleto
+        """
+        if not self.disponible:
+            return None
+
+        ruta = self._ruta(archivo_excel, self.clave(archivo_excel))
+        if not os.path.exists(ruta):
+            return None
+
+        try:
+            tabla = feather.read_table(ruta, memory_map=True)
+            df = tabla.to_pandas()
+            logger.info(f"⚡ Datos cargados desde caché: {ruta}")
+            return df
+        except Exception as e:
+            logger.warning(f"Caché ilegible, se reconstruirá: {str(e)}")
+            return None
+
+    def guardar(self, archivo_excel, df):
+        """
+        Guarda el DataFrame en caché y elimina las entradas obsoletas del mismo libro
+        """
+        if not self.disponible:
+            return False
+
+        try:
+            os.makedirs(self.carpeta, exist_ok=True)
+            ruta = self._ruta(archivo_excel, self.clave(archivo_excel))
+            temporal = ruta + '.tmp'
+            feather.write_feather(_preparar_para_arrow(df), temporal,
+                                  compression='uncompressed')
+            os.replace(temporal, ruta)
+            self._limpiar_obsoletas(archivo_excel, ruta)
+            logger.info(f"💾 Caché columnar actualizada: {ruta}")
+            return True
+        except Exception as e:
+            logger.warning(f"No se pudo guardar la caché: {str(e)}")
+            return False
+
+    def _limpiar_obsoletas(self, archivo_excel, ruta_vigente):
+        prefijo = self._prefijo(archivo_excel)
+        for nombre in os.listdir(self.carpeta):
+            ruta = os.path.join(self.carpeta, nombre)
+            if nombre.startswith(prefijo) and nombre.endswith('.arrow') and ruta != ruta_vigente:
+                os.remove(ruta)
+
+
+def _preparar_para_arrow(df):
+    """
+    Arrow no admite columnas con tipos mezclados (p. ej. un MODELO numérico entre
+    textos); esas columnas se guardan como texto
+    """
+    df = df.reset_index(drop=True)
+    for columna in df.columns:
+        if df[columna].dtype == object:
+            no_nulos = df[columna].dropna()
+            if no_nulos.map(type).nunique() > 1:
+                df[columna] = df[columna].where(df[columna].isna(), df[columna].astype(str))
+    return df
@@ -0,0 +1,248 @@
+"""
+Cola de salida persistente (SQLite) para el envío de reportes.
+WhatsAppSender escribe los mensajes en la cola y un despachador en segundo
+plano los envía con reintentos y espera exponencial. Cada mensaje tiene una
+clave de idempotencia (destino, contenido y lote; por defecto el lote es el
+día), de modo que volver a encolar el mismo reporte no lo duplica, y tras una
+caída los mensajes a medio enviar vuelven a la cola.
+La entrega es "al menos una vez": un mensaje enviado justo antes de una
+caída, sin llegar a marcarse, puede reenviarse.
+"""
+
+import hashlib
+import logging
+import random
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PENDIENTE = 'pendiente'
+ENVIANDO = 'enviando'
+ENVIADO = 'enviado'
+FALLIDO = 'fallido'
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS mensajes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    clave TEXT NOT NULL UNIQUE,
+    destino TEXT NOT NULL,
+    cuerpo TEXT NOT NULL DEFAULT '',
+    media_url TEXT,
+    estado TEXT NOT NULL DEFAULT 'pendiente',
+    intentos INTEGER NOT NULL DEFAULT 0,
+    proximo_intento REAL NOT NULL,
+    sid TEXT,
+    ultimo_error TEXT,
+    creado REAL NOT NULL,
+    actualizado REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_mensajes_estado ON mensajes (estado, proximo_intento);
+CREATE INDEX IF NOT EXISTS idx_mensajes_destino ON mensajes (destino, id);
+"""
+
+
+def lote_del_dia():
+    """Lote por defecto: el mismo mensaje se deduplica dentro del día, no para siempre"""
+    return time.strftime('%Y-%m-%d')
+
+
+def clave_idempotencia(destino, cuerpo='', media_url=None, lote=None):
+    """
+    Clave estable del mensaje: mismo destino, contenido y lote => misma clave.
+    Sin lote se usa el del día (lote_del_dia).
+    """
+    if lote is None:
+        lote = lote_del_dia()
+    contenido = '\x1f'.join([str(lote), destino, cuerpo or '', media_url or ''])
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+class ColaEnvios:
+    def __init__(self, ruta='cola_envios.db'):
+        self.ruta = ruta
+        self.lock = threading.Lock()
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self.conexion.row_factory = sqlite3.Row
+        self.conexion.execute('PRAGMA journal_mode=WAL')
+        self.conexion.execute('PRAGMA synchronous=NORMAL')
+        self.conexion.executescript(_ESQUEMA)
+
+    def cerrar(self):
+        with self.lock:
+            self.conexion.close()
+
+    def encolar(self, destino, cuerpo='', media_url=None, clave=None, lote=None):
+        """
+        Añade un mensaje a la cola. Si ya existe un mensaje con la misma clave
+        no se vuelve a insertar.
+
+        Args:
+            lote (str): Ámbito de la deduplicación (por ejemplo, un id de
+                ejecución); por defecto, el día actual
+
+        Returns:
+            tuple: (clave de idempotencia, True si se insertó o False si ya estaba)
+        """
+        clave = clave or clave_idempotencia(destino, cuerpo, media_url, lote)
+        ahora = time.time()
+        with self.lock:
+            cursor = self.conexion.execute(
+                "INSERT OR IGNORE INTO mensajes (clave, destino, cuerpo, media_url, estado,"
+                " proximo_intento, creado, actualizado) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (clave, destino, cuerpo or '', media_url, PENDIENTE, ahora, ahora, ahora))
+        return clave, cursor.rowcount == 1
+
+    def recuperar(self):
+        """Devuelve a la cola los mensajes que quedaron 'enviando' tras una caída"""
+        with self.lock:
+            cursor = self.conexion.execute(
+                "UPDATE mensajes SET estado = ?, actualizado = ? WHERE estado = ?",
+                (PENDIENTE, time.time(), ENVIANDO))
+        if cursor.rowcount:
+            logger.warning(f"♻️ {cursor.rowcount} mensajes recuperados tras una interrupción")
+        return cursor.rowcount
+
+    def tomar(self, limite=20):
+        """
+        Reserva hasta `limite` mensajes listos para enviar. Solo toma el mensaje
+        más antiguo pendiente de cada destino, para respetar el orden por destinatario.
+        """
+        ahora = time.time()
+        with self.lock:
+            self.conexion.execute('BEGIN IMMEDIATE')
+            try:
+                filas = self.conexion.execute(
+                    "SELECT * FROM mensajes AS m WHERE m.estado = ? AND m.proximo_intento <= ?"
+                    " AND NOT EXISTS (SELECT 1 FROM mensajes AS previo WHERE previo.destino = m.destino"
+                    " AND previo.id < m.id AND previo.estado IN (?, ?))"
+                    " ORDER BY m.id LIMIT ?",
+                    (PENDIENTE, ahora, PENDIENTE, ENVIANDO, limite)).fetchall()
+                self.conexion.executemany(
+                    "UPDATE mensajes SET estado = ?, actualizado = ? WHERE id = ?",
+                    [(ENVIANDO, ahora, fila['id']) for fila in filas])
+                self.conexion.execute('COMMIT')
+            except Exception:
+                self.conexion.execute('ROLLBACK')
+                raise
+        return [dict(fila) for fila in filas]
+
+    def marcar_enviado(self, id_mensaje, sid):
+        with self.lock:
+            self.conexion.execute(
+                "UPDATE mensajes SET estado = ?, sid = ?, intentos = intentos + 1, ultimo_error = NULL,"
+                " actualizado = ? WHERE id = ?",
+                (ENVIADO, sid, time.time(), id_mensaje))
+
+    def marcar_error(self, id_mensaje, error, intentos, max_intentos, espera):
+        """Programa un reintento dentro de `espera` segundos o marca el mensaje como fallido"""
+        estado = FALLIDO if intentos >= max_intentos else PENDIENTE
+        ahora = time.time()
+        with self.lock:
+            self.conexion.execute(
+                "UPDATE mensajes SET estado = ?, intentos = ?, ultimo_error = ?, proximo_intento = ?,"
+                " actualizado = ? WHERE id = ?",
+                (estado, intentos, str(error), ahora + espera, ahora, id_mensaje))
+        return estado
+
+    def reintentar_fallidos(self):
+        """Vuelve a poner en cola los mensajes que agotaron sus intentos"""
+        with self.lock:
+            cursor = self.conexion.execute(
+                "UPDATE mensajes SET estado = ?, intentos = 0, proximo_intento = ?, actualizado = ?"
+                " WHERE estado = ?", (PENDIENTE, time.time(), time.time(), FALLIDO))
+        return cursor.rowcount
+
+    def resumen(self):
+        """Cantidad de mensajes por estado"""
+        with self.lock:
+            filas = self.conexion.execute(
+                "SELECT estado, COUNT(*) AS total FROM mensajes GROUP BY estado").fetchall()
+        return {fila['estado']: fila['total'] for fila in filas}
+
+    def pendientes(self):
+        resumen = self.resumen()
+        return resumen.get(PENDIENTE, 0) + resumen.get(ENVIANDO, 0)
+
+
+class DespachadorCola:
+    """
+    Vacía la cola en segundo plano llamando a `enviar(destino, cuerpo, media_url)`,
+    que debe devolver el SID o lanzar una excepción si el envío falla
+    """
+
+    def __init__(self, cola, enviar, max_intentos=8, espera_base=2.0, espera_maxima=600.0,
+                 intervalo=1.0, tamano_lote=20):
+        self.cola = cola
+        self.enviar = enviar
+        self.max_intentos = max_intentos
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.intervalo = intervalo
+        self.tamano_lote = tamano_lote
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def calcular_espera(self, intentos):
+        """Espera exponencial con jitter: base * 2^(intentos-1), con tope"""
+        espera = min(self.espera_maxima, self.espera_base * (2 ** (intentos - 1)))
+        return espera * random.uniform(0.8, 1.2)
+
+    def procesar_lote(self):
+        """Envía un lote de mensajes listos. Devuelve cuántos se intentaron."""
+        mensajes = self.cola.tomar(self.tamano_lote)
+        for mensaje in mensajes:
+            intentos = mensaje['intentos'] + 1
+            try:
+                sid = self.enviar(mensaje['destino'], mensaje['cuerpo'], mensaje['media_url'])
+                self.cola.marcar_enviado(mensaje['id'], sid)
+                logger.info(f"✅ Mensaje {mensaje['id']} enviado a {mensaje['destino']}. SID: {sid}")
+            except Exception as e:
+                estado = self.cola.marcar_error(mensaje['id'], e, intentos, self.max_intentos,
+                                                self.calcular_espera(intentos))
+                if estado == FALLIDO:
+                    logger.error(f"❌ Mensaje {mensaje['id']} descartado tras {intentos} intentos: {str(e)}")
+                else:
+                    logger.warning(f"Reintento {intentos}/{self.max_intentos} del mensaje "
+                                   f"{mensaje['id']}: {str(e)}")
+        return len(mensajes)
+
+    def drenar(self, timeout=None):
+        """
+        Procesa la cola en el hilo actual hasta vaciarla (o hasta timeout)
+
+        Returns:
+            bool: True si no quedan mensajes pendientes
+        """
+        self.cola.recuperar()
+        limite = time.monotonic() + timeout if timeout is not None else None
+        while self.cola.pendientes():
+            if limite is not None and time.monotonic() >= limite:
+                return False
+            if not self.procesar_lote():
+                time.sleep(self.intervalo)
+        return True
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            try:
+                if not self.procesar_lote():
+                    self._detener.wait(self.intervalo)
+            except Exception as e:
+                logger.error(f"Error en el despachador de la cola: {str(e)}")
+                self._detener.wait(self.intervalo)
+
+    def iniciar(self):
+        """Arranca el despachador en un hilo de fondo"""
+        if self._hilo and self._hilo.is_alive():
+            return
+        self.cola.recuperar()
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, name='despachador-cola', daemon=True)
+        self._hilo.start()
+
+    def detener(self, timeout=None):
+        self._detener.set()
+        if self._hilo:
+            self._hilo.join(timeout)
@@ -0,0 +1,245 @@
+"""
+Generador de datos de prueba con el esquema del Excel del profesor.
+Crea libros sintéticos con las hojas VENTAS, VEHICULOS y NUEVOS REGISTROS
+(mismas columnas y rangos de valores) para probar y medir el RPA desde
+10 mil hasta 10 millones de ventas. Una hoja de Excel admite como máximo
+1.048.576 filas, así que por encima de ese tamaño las hojas se escriben como
+CSV (VENTAS.csv, NUEVOS REGISTROS.csv, VEHICULOS.csv) para procesarlas con
+AnalizadorVentasPorBloques. Con la misma semilla se generan siempre los mismos datos.
+
+Uso:
+    py crear_datos_prueba.py                      # "Ventas Fundamentos.xlsx" de ~14 mil ventas
+    py crear_datos_prueba.py datos/ventas_1m.xlsx -n 1000000
+"""
+
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Filas por hoja de Excel, incluido el encabezado
+LIMITE_FILAS_XLSX = 1_048_576
+TAMANO_BLOQUE = 500_000
+
+COLUMNAS_VENTAS_COMPLETAS = ['ID', 'Fecha', 'Canal', 'Cliente', 'Ubicación', 'Segmento', 'ID_Vehículo',
+                             'Costo Vehículo', 'Precio Venta sin IGV', 'IGV', 'Precio Venta Real',
+                             'Sede', 'Vendedor']
+COLUMNAS_VEHICULOS_COMPLETAS = ['ID_Vehiculo', 'MARCA', 'MODELO', 'TIPO VEHÍCULO', 'AÑO']
+
+# Distribuciones aproximadas del libro original
+SEDES = {'Santiago de Surco': 0.584, 'Ate': 0.167, 'San Miguel': 0.166, 'La Molina': 0.083}
+CANALES = ['CRM', 'Llamado en frío', 'Newsletter', 'Email en frío', 'Publicidad en la radio',
+           'Referido por otro cliente', 'Publicidad en Facebook', 'Publicidad en Google', 'Desconocido']
+SEGMENTOS = {'Persona': 0.87, 'Empresa': 0.13}
+VENDEDORES = ['Sebastián Sánchez', 'Nicolás Mangia', 'Luis Padilla', 'María Quispe', 'Andrea Rojas',
+              'Carlos Vega', 'Lucía Torres', 'Jorge Huamán', 'Valeria Castro', 'Diego Salazar']
+SEDE_NUEVOS, CANAL_NUEVOS = 'San Isidro', 'NUEVO CANAL'
+
+MODELOS = {
+    'HONDA': ['ACCORD', 'CIVIC', 'ODISSEY', 'CR-V', 'PILOT', 'FIT', 'HR-V', 'CITY'],
+    'HYUNDAI': ['ELANTRA', 'SANTA FE', 'GENESIS', 'TUCSON', 'ACCENT', 'SONATA', 'CRETA', 'I10'],
+    'SUZUKI': ['XL7', 'SWIFT', 'VITARA', 'JIMNY', 'CIAZ', 'ERTIGA', 'BALENO', 'CELERIO'],
+    'TOYOTA': ['COROLLA', 'YARIS', 'RAV4', 'HILUX', 'PRIUS', 'CAMRY', 'LAND CRUISER', 'RUSH'],
+    'KIA': ['RIO', 'SPORTAGE', 'SORENTO', 'CERATO', 'PICANTO', 'SOLUTO', 'SELTOS', 'SOUL'],
+    'NISSAN': ['SENTRA', 'VERSA', 'X-TRAIL', 'FRONTIER', 'KICKS', 'MARCH', 'QASHQAI', 'PATROL'],
+}
+TIPOS_VEHICULO = ['AUTO', 'CAMIONETA', 'SUV', 'PICK UP']
+
+APELLIDOS = np.array(['RIVERA', 'AYALA', 'QUISPE', 'FLORES', 'SANCHEZ', 'GARCIA', 'RODRIGUEZ', 'TORRES',
+                      'RAMIREZ', 'MENDOZA', 'CASTILLO', 'HUAMAN', 'ROJAS', 'VARGAS', 'CHAVEZ', 'DIAZ',
+                      'CRUZ', 'GUTIERREZ', 'MORALES', 'ORTIZ', 'SALAZAR', 'VEGA', 'CASTRO', 'PAREDES'])
+NOMBRES = np.array(['EMILIA', 'CECILIA', 'LUIS', 'DIANA', 'JORGE', 'MARIA', 'CARLOS', 'LUCIA', 'ANDREA',
+                    'DIEGO', 'VALERIA', 'JUAN', 'ROSA', 'MIGUEL', 'CARMEN', 'JOSE', 'ANA', 'PEDRO'])
+
+
+def generar_vehiculos(n_vehiculos=179, semilla=42):
+    """Catálogo VEHICULOS con IDs 1..n_vehiculos"""
+    rng = np.random.default_rng(semilla)
+    pares = [(marca, modelo) for marca, modelos in MODELOS.items() for modelo in modelos]
+    filas = []
+    for i in range(n_vehiculos):
+        # Al agotar los pares se repiten con otro año, como en el libro original
+        marca, modelo = pares[i % len(pares)]
+        filas.append((i + 1, marca, modelo, TIPOS_VEHICULO[rng.integers(len(TIPOS_VEHICULO))],
+                      int(rng.integers(2010, 2018))))
+    return pd.DataFrame(filas, columns=COLUMNAS_VEHICULOS_COMPLETAS)
+
+
+def _nombres_clientes(codigos):
+    """'APELLIDO APELLIDO NOMBRE' determinista a partir de un código de cliente"""
+    a, n = len(APELLIDOS), len(NOMBRES)
+    nombres = (pd.Series(APELLIDOS[codigos % a]) + ' ' + APELLIDOS[(codigos // a) % a] + ' '
+               + NOMBRES[(codigos // (a * a)) % n])
+    # Más allá de las combinaciones disponibles se añade un número para mantenerlos distintos
+    extra = codigos // (a * a * n)
+    if extra.any():
+        nombres = nombres.where(extra == 0, nombres + ' ' + pd.Series(extra).astype(str))
+    return nombres.to_numpy()
+
+
+def generar_ventas(n, n_vehiculos=179, id_inicial=1, rng=None, nuevos=False,
+                   fecha_inicio='2017-01-02', fecha_fin='2017-07-19', clientes=None):
+    """
+    Genera n ventas con las columnas de la hoja VENTAS
+
+    Args:
+        n (int): Número de ventas
+        n_vehiculos (int): IDs de vehículo válidos (1..n_vehiculos)
+        id_inicial (int): ID de la primera venta
+        rng (np.random.Generator): Generador aleatorio (reproducibilidad)
+        nuevos (bool): Ventas con la forma de NUEVOS REGISTROS (sede y canal nuevos)
+        clientes (int): Tamaño del universo de clientes (por defecto, 50 * n:
+            casi todas las ventas son de clientes distintos, como en el original)
+
+    Returns:
+        pd.DataFrame
+    """
+    rng = rng or np.random.default_rng(42)
+    clientes = clientes or 50 * max(1, n)
+
+    if nuevos:
+        sedes = np.full(n, SEDE_NUEVOS, dtype=object)
+        canales = np.full(n, CANAL_NUEVOS, dtype=object)
+    else:
+        sedes = rng.choice(list(SEDES), size=n, p=list(SEDES.values())).astype(object)
+        canales = rng.choice(CANALES, size=n).astype(object)
+
+    inicio = np.datetime64(fecha_inicio)
+    dias = int((np.datetime64(fecha_fin) - inicio).astype(int)) + 1
+    precio_sin_igv = rng.integers(18_000, 40_000, size=n)
+    igv = 0.18
+    ubicaciones = pd.Series(sedes) + ', Lima, Lima'
+
+    return pd.DataFrame({
+        'ID': np.arange(id_inicial, id_inicial + n, dtype='int64'),
+        'Fecha': pd.to_datetime(inicio + rng.integers(0, dias, size=n).astype('timedelta64[D]')),
+        'Canal': canales,
+        'Cliente': _nombres_clientes(rng.integers(0, clientes, size=n)),
+        'Ubicación': ubicaciones.to_numpy(),
+        'Segmento': rng.choice(list(SEGMENTOS), size=n, p=list(SEGMENTOS.values())),
+        'ID_Vehículo': rng.integers(1, n_vehiculos + 1, size=n),
+        'Costo Vehículo': np.round(precio_sin_igv * rng.uniform(0.55, 0.65, size=n), 1),
+        'Precio Venta sin IGV': precio_sin_igv,
+        # Igual que en el libro original, la columna IGV guarda la tasa y no el monto
+        'IGV': np.full(n, igv),
+        'Precio Venta Real': np.round(precio_sin_igv * (1 + igv), 2),
+        'Sede': sedes,
+        'Vendedor': rng.choice(VENDEDORES, size=n),
+    }, columns=COLUMNAS_VENTAS_COMPLETAS)
+
+
+def iterar_ventas(n, n_vehiculos=179, semilla=42, tamano_bloque=TAMANO_BLOQUE, **opciones):
+    """Genera las n ventas en bloques para no materializarlas todas a la vez"""
+    rng = np.random.default_rng(semilla)
+    generadas = 0
+    while generadas < n:
+        tamano = min(tamano_bloque, n - generadas)
+        yield generar_ventas(tamano, n_vehiculos, id_inicial=generadas + 1, rng=rng,
+                             clientes=50 * max(1, n), **opciones)
+        generadas += tamano
+
+
+def _escribir_hoja(libro, nombre, bloques):
+    hoja = libro.create_sheet(nombre)
+    encabezado = False
+    for bloque in bloques:
+        if not encabezado:
+            hoja.append(list(bloque.columns))
+            encabezado = True
+        if 'Fecha' in bloque.columns:
+            bloque = bloque.assign(Fecha=bloque['Fecha'].dt.to_pydatetime())
+        for fila in bloque.itertuples(index=False, name=None):
+            hoja.append(fila)
+
+
+def crear_libro(ruta, n_ventas=14_202, n_nuevos=7, n_vehiculos=179, semilla=42):
+    """
+    Escribe un .xlsx con las tres hojas (modo de solo escritura de openpyxl,
+    sin mantener el libro en memoria)
+    """
+    from openpyxl import Workbook
+
+    if max(n_ventas, n_nuevos) >= LIMITE_FILAS_XLSX:
+        raise ValueError(f"Una hoja de Excel admite como máximo {LIMITE_FILAS_XLSX - 1:,} filas "
+                         f"de datos; usa crear_csv para {n_ventas:,} ventas")
+
+    libro = Workbook(write_only=True)
+    _escribir_hoja(libro, 'VENTAS', iterar_ventas(n_ventas, n_vehiculos, semilla))
+    _escribir_hoja(libro, 'VEHICULOS', [generar_vehiculos(n_vehiculos, semilla)])
+    nuevos = generar_ventas(n_nuevos, n_vehiculos, id_inicial=n_ventas + 1,
+                            rng=np.random.default_rng(semilla + 1), nuevos=True,
+                            fecha_inicio='2017-07-20', fecha_fin='2017-07-20')
+    _escribir_hoja(libro, 'NUEVOS REGISTROS', [nuevos])
+
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    libro.save(ruta)
+    return ruta
+
+
+def crear_csv(carpeta, n_ventas, n_nuevos=7, n_vehiculos=179, semilla=42):
+    """
+    Escribe las hojas como CSV en carpeta, por bloques (sin límite de filas)
+
+    Returns:
+        dict: 'fuentes' (CSV de ventas) y 'vehiculos' (CSV del catálogo)
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    ruta_ventas = os.path.join(carpeta, 'VENTAS.csv')
+    ruta_nuevos = os.path.join(carpeta, 'NUEVOS REGISTROS.csv')
+    ruta_vehiculos = os.path.join(carpeta, 'VEHICULOS.csv')
+
+    for i, bloque in enumerate(iterar_ventas(n_ventas, n_vehiculos, semilla)):
+        bloque.to_csv(ruta_ventas, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    generar_ventas(n_nuevos, n_vehiculos, id_inicial=n_ventas + 1,
+                   rng=np.random.default_rng(semilla + 1), nuevos=True,
+                   fecha_inicio='2017-07-20', fecha_fin='2017-07-20').to_csv(ruta_nuevos, index=False)
+    generar_vehiculos(n_vehiculos, semilla).to_csv(ruta_vehiculos, index=False)
+    return {'fuentes': [ruta_ventas, ruta_nuevos], 'vehiculos': ruta_vehiculos}
+
+
+def crear_datos_prueba(ruta, n_ventas=14_202, n_nuevos=7, n_vehiculos=179, semilla=42):
+    """
+    Crea el libro en ruta o, si no cabe en una hoja de Excel, los CSV en
+    la carpeta <ruta sin extensión>_csv
+
+    Returns:
+        dict: formato ('xlsx' o 'csv'), fuentes, vehiculos y filas generadas
+    """
+    inicio = datetime.now()
+    if n_ventas < LIMITE_FILAS_XLSX:
+        crear_libro(ruta, n_ventas, n_nuevos, n_vehiculos, semilla)
+        datos = {'formato': 'xlsx', 'fuentes': [ruta], 'vehiculos': ruta}
+    else:
+        carpeta = os.path.splitext(ruta)[0] + '_csv'
+        logger.info(f"{n_ventas:,} ventas superan el límite de Excel: se generan CSV en {carpeta}")
+        datos = dict(crear_csv(carpeta, n_ventas, n_nuevos, n_vehiculos, semilla), formato='csv')
+    datos['filas'] = n_ventas + n_nuevos
+
+    segundos = (datetime.now() - inicio).total_seconds()
+    logger.info(f"✅ Datos de prueba generados: {datos['filas']:,} ventas en {segundos:.1f}s")
+    return datos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera datos de ventas sintéticos")
+    parser.add_argument('ruta', nargs='?', default="Ventas Fundamentos.xlsx")
+    parser.add_argument('-n', '--ventas', type=int, default=14_202, help="Filas de la hoja VENTAS")
+    parser.add_argument('--nuevos', type=int, default=7, help="Filas de NUEVOS REGISTROS")
+    parser.add_argument('--vehiculos', type=int, default=179, help="Filas de VEHICULOS")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--forzar', action='store_true', help="Sobrescribir si ya existe")
+    args = parser.parse_args()
+
+    if os.path.exists(args.ruta) and not args.forzar:
+        print(f" '{args.ruta}' ya existe; usa --forzar para sobrescribirlo")
+        sys.exit(1)
+    crear_datos_prueba(args.ruta, args.ventas, args.nuevos, args.vehiculos, args.semilla)
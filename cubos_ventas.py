@@ -0,0 +1,415 @@
+"""
+Cubos de ventas particionados por fecha.
+Al agregar los datos se construye, una sola vez, un cubo día × sede × canal ×
+segmento × modelo con el número de ventas y los montos con y sin IGV. Las
+ventanas móviles, las variaciones mes a mes y los rankings por periodo se
+calculan sobre ese cubo (unas pocas miles de celdas) en lugar de volver a
+recorrer las filas originales.
+El cubo es combinable entre archivos, bloques y días como AgregadosVentas.
+Como allí, los montos de cada celda se guardan en céntimos enteros; las
+consultas los devuelven en soles.
+
+Al persistirlo, las celdas no van dentro del JSON de los agregados sino en
+particiones por día (<carpeta>/AAAA-MM-DD/<lote>.json) que solo se añaden:
+guardar tras una ejecución incremental escribe únicamente los días del delta.
+"""
+
+import json
+import logging
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from tipos_ventas import ESCALA_MONEDA, centimos
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONES = ['SEDE', 'CANAL_VENTA', 'SEGMENTO_CLIENTE', 'MODELO_VEHICULO']
+
+# Medida -> columna del df que se suma (None: número de ventas)
+MEDIDAS = {'ventas': None, 'venta_sin_igv': 'PRECIO_SIN_IGV', 'venta_con_igv': 'PRECIO_VENTA'}
+
+CLAVES_CUBO = ['FECHA'] + DIMENSIONES
+
+# Partes pendientes de combinar antes de compactarlas en una sola tabla
+MAX_PARTES = 32
+
+
+def carpeta_particiones(ruta):
+    """Carpeta de las particiones del cubo de un JSON de agregados o de estado"""
+    return os.path.splitext(ruta)[0] + '_cubo'
+
+
+def _cubo_vacio():
+    datos = {'FECHA': pd.Series(dtype='datetime64[ns]')}
+    datos.update({dimension: pd.Series(dtype='category') for dimension in DIMENSIONES})
+    datos.update({medida: pd.Series(dtype='int64') for medida in MEDIDAS})
+    return pd.DataFrame(datos)
+
+
+def _en_soles(valores, medida):
+    """Las medidas de montos están en céntimos; las consultas responden en soles"""
+    return valores / ESCALA_MONEDA if MEDIDAS[medida] else valores
+
+
+def _compactar(partes):
+    """Suma las celdas repetidas de varias partes del cubo"""
+    partes = [parte for parte in partes if len(parte)]
+    if not partes:
+        return _cubo_vacio()
+    if len(partes) == 1:
+        return partes[0]
+    return _sumar_celdas(pd.concat(partes, ignore_index=True))
+
+
+def _sumar_celdas(datos):
+    """Una fila por celda, sumando las repetidas"""
+    # Las categorías de cada parte pueden diferir: se unifican antes de agrupar
+    for dimension in DIMENSIONES:
+        if not isinstance(datos[dimension].dtype, pd.CategoricalDtype):
+            datos[dimension] = datos[dimension].astype('category')
+    return (datos.groupby(CLAVES_CUBO, observed=True, dropna=False, sort=True)[list(MEDIDAS)]
+            .sum().reset_index())
+
+
+def construir_cubo(df):
+    """
+    Cubo de un DataFrame estandarizado con FECHA y PRECIO_SIN_IGV.
+    Las filas sin fecha válida no entran en el cubo y se cuentan aparte.
+
+    Returns:
+        CuboVentas
+    """
+    cubo = CuboVentas()
+    fechas = pd.to_datetime(df['FECHA'], errors='coerce').dt.normalize()
+    validas = fechas.notna().to_numpy()
+    cubo.filas_sin_fecha = int(len(df) - validas.sum())
+    if not validas.any():
+        return cubo
+
+    df = df[validas]
+    valores = {medida: centimos(df[columna]) if columna else np.ones(len(df), dtype=np.int64)
+               for medida, columna in MEDIDAS.items()}
+    claves = [fechas[validas].rename('FECHA')] + [df[dimension] for dimension in DIMENSIONES]
+    datos = (pd.DataFrame(valores, index=df.index)
+             .groupby(claves, observed=True, dropna=False, sort=True).sum().reset_index())
+    cubo._partes = [datos]
+    cubo._sin_guardar = [datos]
+    return cubo
+
+
+def _tabla_a_dict(datos):
+    """Celdas del cubo en JSON (claves como categorías + códigos)"""
+    claves = {'FECHA': datos['FECHA'].dt.strftime('%Y-%m-%d').astype('category')}
+    claves.update({dimension: datos[dimension].astype('category').cat.remove_unused_categories()
+                   for dimension in DIMENSIONES})
+    return {
+        'claves': {columna: {'categorias': serie.cat.categories.tolist(),
+                             'codigos': serie.cat.codes.tolist()}
+                   for columna, serie in claves.items()},
+        'medidas': {medida: datos[medida].tolist() for medida in MEDIDAS},
+    }
+
+
+def _claves_particion(codigos, etiquetas):
+    """Categorías + códigos de una partición con solo las etiquetas que usa"""
+    usados, inversa = np.unique(codigos, return_inverse=True)
+    validos = usados >= 0
+    nuevos = np.where(validos, np.cumsum(validos) - 1, -1)[inversa]
+    return {'categorias': etiquetas[usados[validos]].tolist(), 'codigos': nuevos.tolist()}
+
+
+def _tabla_desde_dict(datos, en_soles=False):
+    columnas = {}
+    for columna, clave in datos['claves'].items():
+        columnas[columna] = pd.Categorical.from_codes(clave['codigos'], clave['categorias'])
+    columnas['FECHA'] = pd.to_datetime(np.asarray(columnas['FECHA'], dtype=object))
+    for medida, columna in MEDIDAS.items():
+        valores = np.asarray(datos['medidas'][medida], dtype=np.float64 if en_soles else np.int64)
+        if columna and en_soles:
+            # Formato anterior: montos en soles
+            valores = np.rint(valores * ESCALA_MONEDA)
+        columnas[medida] = valores.astype(np.int64)
+    return pd.DataFrame(columnas, columns=CLAVES_CUBO + list(MEDIDAS))
+
+
+class CuboVentas:
+    def __init__(self):
+        self._partes = []
+        # Partes que aún no están en las particiones de disco (ver guardar_particiones)
+        self._sin_guardar = []
+        # Archivos de partición ya escritos, relativos a su carpeta
+        self.particiones = []
+        self._carpeta = None
+        self.filas_sin_fecha = 0
+
+    @property
+    def datos(self):
+        """
+        Tabla del cubo: FECHA, dimensiones y medidas (montos en céntimos), una
+        fila por celda con ventas
+        """
+        if len(self._partes) != 1:
+            self._partes = [_compactar(self._partes)]
+        return self._partes[0]
+
+    def __len__(self):
+        return len(self.datos)
+
+    @property
+    def rango_fechas(self):
+        """(primera fecha, última fecha) o None si el cubo está vacío"""
+        if not len(self):
+            return None
+        return self.datos['FECHA'].min(), self.datos['FECHA'].max()
+
+    def combinar(self, otro):
+        """Suma las celdas de otro cubo sobre este y lo devuelve"""
+        self._partes.extend(otro._partes)
+        # Nada de otro está en las particiones de este cubo
+        self._sin_guardar.extend(otro._partes)
+        self.filas_sin_fecha += otro.filas_sin_fecha
+        if len(self._partes) > MAX_PARTES:
+            self._partes = [_compactar(self._partes)]
+        if len(self._sin_guardar) > MAX_PARTES:
+            self._sin_guardar = [_compactar(self._sin_guardar)]
+        return self
+
+    def a_dict(self):
+        """Representación serializable en JSON con todas las celdas embebidas"""
+        return dict(_tabla_a_dict(self.datos), filas_sin_fecha=self.filas_sin_fecha,
+                    unidad_montos='centimos')
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """
+        Cubo desde a_dict(). Sus celdas quedan pendientes de guardar, de modo
+        que un estado con el cubo embebido pasa a particiones al guardarlo
+        """
+        cubo = cls()
+        cubo.filas_sin_fecha = datos.get('filas_sin_fecha', 0)
+        tabla = _tabla_desde_dict(datos, en_soles=datos.get('unidad_montos') != 'centimos')
+        cubo._partes = [tabla] if len(tabla) else []
+        cubo._sin_guardar = list(cubo._partes)
+        return cubo
+
+    def a_manifiesto(self):
+        """Lo que se guarda en el JSON de los agregados: las particiones, no las celdas"""
+        return {'filas_sin_fecha': self.filas_sin_fecha, 'unidad_montos': 'centimos',
+                'particiones': list(self.particiones)}
+
+    def guardar_particiones(self, carpeta):
+        """
+        Escribe las celdas pendientes en archivos nuevos, uno por día. Nunca
+        reescribe los existentes: el coste es proporcional a lo añadido desde
+        la última vez, no al historial.
+
+        Si las particiones de este cubo están en otra carpeta (se cargó de
+        otro archivo), se vuelven a escribir todas en la nueva.
+
+        Returns:
+            list: Particiones escritas (relativas a carpeta)
+        """
+        if self._carpeta is None or os.path.normpath(carpeta) != os.path.normpath(self._carpeta):
+            if self.particiones:
+                self._sin_guardar = list(self._partes)
+                self.particiones = []
+            self._carpeta = carpeta
+        pendientes = _compactar(self._sin_guardar).sort_values('FECHA', kind='stable')
+        self._sin_guardar = []
+        if not len(pendientes):
+            return []
+
+        # Códigos y medidas de toda la tabla una vez; cada día es un tramo contiguo
+        dias = pendientes['FECHA'].dt.strftime('%Y-%m-%d').to_numpy()
+        dimensiones = {}
+        for dimension in DIMENSIONES:
+            codigos, etiquetas = pd.factorize(pendientes[dimension])
+            dimensiones[dimension] = (codigos, np.asarray(etiquetas, dtype=object))
+        medidas = {medida: pendientes[medida].to_numpy() for medida in MEDIDAS}
+        cortes = np.flatnonzero(dias[1:] != dias[:-1]) + 1
+
+        lote = uuid.uuid4().hex[:12]
+        escritas = []
+        for inicio, fin in zip(np.r_[0, cortes], np.r_[cortes, len(dias)]):
+            claves = {'FECHA': {'categorias': [dias[inicio]], 'codigos': [0] * int(fin - inicio)}}
+            claves.update({dimension: _claves_particion(codigos[inicio:fin], etiquetas)
+                           for dimension, (codigos, etiquetas) in dimensiones.items()})
+            relativa = f"{dias[inicio]}/{lote}.json"
+            ruta = os.path.join(carpeta, *relativa.split('/'))
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            with open(ruta, 'w', encoding='utf-8') as f:
+                json.dump({'claves': claves,
+                           'medidas': {medida: valores[inicio:fin].tolist()
+                                       for medida, valores in medidas.items()}}, f, ensure_ascii=False)
+            escritas.append(relativa)
+        self.particiones.extend(escritas)
+        return escritas
+
+    def limpiar_particiones(self, carpeta):
+        """
+        Borra de carpeta las particiones que este cubo ya no referencia (las de
+        una reconstrucción completa anterior o las de un guardado interrumpido).
+        Se llama después de escribir el JSON que apunta a las vigentes.
+        """
+        vigentes = {os.path.normpath(os.path.join(carpeta, *relativa.split('/')))
+                    for relativa in self.particiones}
+        if not os.path.isdir(carpeta):
+            return
+        for directorio, _, archivos in os.walk(carpeta, topdown=False):
+            for archivo in archivos:
+                ruta = os.path.normpath(os.path.join(directorio, archivo))
+                if ruta not in vigentes:
+                    os.remove(ruta)
+            if directorio != carpeta and not os.listdir(directorio):
+                os.rmdir(directorio)
+
+    @classmethod
+    def cargar_particiones(cls, carpeta, manifiesto):
+        """Cubo desde a_manifiesto() y las particiones de carpeta"""
+        cubo = cls()
+        cubo.filas_sin_fecha = manifiesto.get('filas_sin_fecha', 0)
+        cubo.particiones = list(manifiesto['particiones'])
+        cubo._carpeta = carpeta
+        if not cubo.particiones:
+            return cubo
+
+        # Se decodifican todas las particiones a listas y se arma una sola tabla
+        # (un DataFrame por archivo costaría más que leerlos)
+        columnas = {columna: [] for columna in CLAVES_CUBO + list(MEDIDAS)}
+        for relativa in cubo.particiones:
+            with open(os.path.join(carpeta, *relativa.split('/')), encoding='utf-8') as f:
+                datos = json.load(f)
+            for columna, clave in datos['claves'].items():
+                # El código -1 (nulo) toma el None añadido al final
+                categorias = np.asarray(clave['categorias'] + [None], dtype=object)
+                columnas[columna].extend(categorias[np.asarray(clave['codigos'], dtype=np.int64)])
+            for medida in MEDIDAS:
+                columnas[medida].extend(datos['medidas'][medida])
+        tabla = pd.DataFrame({columna: pd.Series(valores, dtype=np.int64 if columna in MEDIDAS else object)
+                              for columna, valores in columnas.items()})
+        tabla['FECHA'] = pd.to_datetime(tabla['FECHA'])
+        cubo._partes = [_sumar_celdas(tabla)]
+        return cubo
+
+    def _filtrar(self, desde=None, hasta=None, filtros=None):
+        """
+        Celdas del cubo entre dos fechas (inclusive) y con los valores indicados
+        en filtros, por ejemplo {'SEDE': 'Ate', 'CANAL_VENTA': ['CRM', 'Newsletter']}
+        """
+        datos = self.datos
+        mascara = np.ones(len(datos), dtype=bool)
+        if desde is not None:
+            mascara &= (datos['FECHA'] >= pd.Timestamp(desde)).to_numpy()
+        if hasta is not None:
+            mascara &= (datos['FECHA'] <= pd.Timestamp(hasta)).to_numpy()
+        for columna, valor in (filtros or {}).items():
+            valores = list(valor) if isinstance(valor, (list, tuple, set)) else [valor]
+            mascara &= datos[columna].isin(valores).to_numpy()
+        return datos[mascara]
+
+    def serie(self, medida='venta_sin_igv', frecuencia='D', por=None, desde=None, hasta=None,
+              filtros=None):
+        """
+        Medida por periodo ('D' día, 'W' semana, 'M' mes). Los periodos sin
+        ventas aparecen con 0 para que ventanas y variaciones sean de calendario.
+
+        Args:
+            por (str): Dimensión por la que abrir la medida (una columna por valor)
+
+        Returns:
+            pd.Series | pd.DataFrame: Indexada por PERIODO
+        """
+        return _en_soles(self._serie(medida, frecuencia, por, desde, hasta, filtros), medida)
+
+    def _serie(self, medida, frecuencia, por=None, desde=None, hasta=None, filtros=None):
+        """serie() con los montos en céntimos"""
+        datos = self._filtrar(desde, hasta, filtros)
+        claves = [datos['FECHA'].dt.to_period(frecuencia).rename('PERIODO')]
+        if por:
+            claves.append(datos[por])
+        tabla = datos.groupby(claves, observed=True)[medida].sum()
+        if por:
+            tabla = tabla.unstack(por, fill_value=0)
+
+        inicio = pd.Period(desde, frecuencia) if desde is not None else (
+            tabla.index.min() if len(tabla) else None)
+        fin = pd.Period(hasta, frecuencia) if hasta is not None else (
+            tabla.index.max() if len(tabla) else None)
+        if inicio is not None and fin is not None:
+            tabla = tabla.reindex(pd.period_range(inicio, fin, freq=frecuencia), fill_value=0)
+        tabla.index.name = 'PERIODO'
+        return tabla
+
+    def ventana_movil(self, dias=7, medida='venta_sin_igv', por=None, desde=None, hasta=None,
+                      filtros=None):
+        """Suma móvil de los últimos `dias` días de calendario, día a día"""
+        diaria = self._serie(medida, 'D', por, desde, hasta, filtros)
+        movil = diaria.rolling(dias, min_periods=1).sum().round().astype('int64')
+        return _en_soles(movil, medida)
+
+    def ultimos_dias(self, dias=7, medida='venta_sin_igv', por='SEDE', hasta=None, filtros=None):
+        """
+        Total de los últimos `dias` días hasta `hasta` (por defecto, la última
+        fecha del cubo), abierto por una dimensión y ordenado de mayor a menor
+
+        Returns:
+            pd.Series | float: Por valor de `por`, o el total si por=None
+        """
+        if hasta is None:
+            if not len(self):
+                return pd.Series(dtype='float64') if por else 0
+            hasta = self.rango_fechas[1]
+        hasta = pd.Timestamp(hasta).normalize()
+        datos = self._filtrar(hasta - pd.Timedelta(days=dias - 1), hasta, filtros)
+        if not por:
+            return _en_soles(int(datos[medida].sum()), medida)
+        return _en_soles(datos.groupby(por, observed=True)[medida].sum()
+                         .sort_values(ascending=False), medida)
+
+    def variacion_mensual(self, medida='venta_sin_igv', por=None, filtros=None):
+        """
+        Medida de cada mes frente al mes anterior
+
+        Returns:
+            pd.DataFrame: actual, anterior, variacion y variacion_pct por mes
+                (y por valor de `por` si se indica)
+        """
+        mensual = self._serie(medida, 'M', por, filtros=filtros)
+        if por:
+            mensual = mensual.stack()
+            anterior = mensual.groupby(level=por, observed=True).shift(1)
+        else:
+            anterior = mensual.shift(1)
+        tabla = pd.DataFrame({'actual': mensual, 'anterior': anterior})
+        tabla['variacion'] = tabla['actual'] - tabla['anterior']
+        tabla['variacion_pct'] = tabla['variacion'] / tabla['anterior'].replace(0, np.nan) * 100
+        for columna in ['actual', 'anterior', 'variacion']:
+            tabla[columna] = _en_soles(tabla[columna], medida)
+        return tabla
+
+    def top_por_periodo(self, dimension='MODELO_VEHICULO', n=5, medida='ventas', frecuencia='M',
+                        desde=None, hasta=None, filtros=None):
+        """
+        Los n valores de `dimension` con mayor medida en cada periodo
+
+        Returns:
+            pd.DataFrame: PERIODO, dimensión, medida y puesto (1 = el mayor)
+        """
+        datos = self._filtrar(desde, hasta, filtros)
+        periodos = datos['FECHA'].dt.to_period(frecuencia).rename('PERIODO')
+        tabla = (datos.groupby([periodos, datos[dimension]], observed=True)[medida].sum()
+                 .reset_index())
+        tabla = tabla[tabla[medida] > 0]
+        tabla = tabla.sort_values(['PERIODO', medida], ascending=[True, False], kind='stable')
+        tabla = tabla.groupby('PERIODO', sort=False).head(n).reset_index(drop=True)
+        tabla['puesto'] = tabla.groupby('PERIODO', sort=False).cumcount() + 1
+        tabla[medida] = _en_soles(tabla[medida], medida)
+        return tabla
+
+    def __repr__(self):
+        rango = self.rango_fechas
+        periodo = f", {rango[0]:%Y-%m-%d} a {rango[1]:%Y-%m-%d}" if rango else ''
+        return f"CuboVentas({len(self):,} celdas{periodo})"
@@ -0,0 +1,214 @@
+"""
+Motor de envío masivo por WhatsApp.
+Envía a una lista de destinatarios con un pool acotado de hilos que comparten
+una sesión HTTP con conexiones reutilizables. Los mensajes de cada
+destinatario se envían en orden, un limitador de tasa global evita superar
+el límite del proveedor y las respuestas 429/5xx o los cortes de conexión se
+reintentan con espera exponencial. Un mensaje cuya respuesta no llega a tiempo
+no se reintenta (la API pudo haberlo creado) y se informa como incierto. Habla directamente con la API REST de Twilio, por lo
+que url_base puede apuntar a un servidor HTTP local de prueba.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+URL_BASE_TWILIO = 'https://api.twilio.com'
+
+# Respuestas de la API que merecen reintento (límite de tasa y errores del servidor)
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+class EnvioIncierto(requests.Timeout):
+    """La API recibió la petición pero no respondió a tiempo: el mensaje pudo crearse o no"""
+
+
+def con_prefijo_whatsapp(numero):
+    """Asegura el formato 'whatsapp:+123...' que exige la API"""
+    return numero if numero.startswith('whatsapp:') else f'whatsapp:{numero}'
+
+
+class LimitadorTasa:
+    """Cubeta de fichas compartida entre hilos: como máximo `tasa` envíos por segundo"""
+
+    def __init__(self, tasa, rafaga=None):
+        self.tasa = float(tasa)
+        self.capacidad = float(rafaga or max(1, tasa))
+        self.fichas = self.capacidad
+        self.ultimo = time.monotonic()
+        self.lock = threading.Lock()
+
+    def esperar(self):
+        while True:
+            with self.lock:
+                ahora = time.monotonic()
+                self.fichas = min(self.capacidad, self.fichas + (ahora - self.ultimo) * self.tasa)
+                self.ultimo = ahora
+                if self.fichas >= 1:
+                    self.fichas -= 1
+                    return
+                espera = (1 - self.fichas) / self.tasa
+            time.sleep(espera)
+
+
+class MotorEnvio:
+    def __init__(self, account_sid, auth_token, numero_origen, url_base=URL_BASE_TWILIO,
+                 max_hilos=8, mensajes_por_segundo=10, timeout=30, reintentos=3, espera_base=0.5):
+        """
+        Args:
+            reintentos (int): Reintentos por mensaje ante 429/5xx o fallos de conexión
+            espera_base (float): Segundos antes del primer reintento (se duplica en
+                cada uno; un Retry-After de la API tiene prioridad)
+        """
+        self.account_sid = account_sid
+        self.numero_origen = con_prefijo_whatsapp(numero_origen)
+        self.url_mensajes = f"{url_base.rstrip('/')}/2010-04-01/Accounts/{account_sid}/Messages.json"
+        self.max_hilos = max_hilos
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.limitador = LimitadorTasa(mensajes_por_segundo) if mensajes_por_segundo else None
+
+        # Una sola sesión para todo el motor: conexiones HTTP keep-alive reutilizadas
+        self.sesion = requests.Session()
+        self.sesion.auth = (account_sid, auth_token)
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=max_hilos)
+        self.sesion.mount('http://', adaptador)
+        self.sesion.mount('https://', adaptador)
+
+    def cerrar(self):
+        self.sesion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cerrar()
+
+    def _espera(self, intento, respuesta=None):
+        """Espera antes del reintento `intento` (1, 2, ...): Retry-After o exponencial"""
+        if respuesta is not None:
+            try:
+                return float(respuesta.headers.get('Retry-After'))
+            except (TypeError, ValueError):
+                pass
+        return self.espera_base * (2 ** (intento - 1))
+
+    def enviar(self, destino, cuerpo='', media_url=None):
+        """
+        Envía un único mensaje, reintentando ante 429/5xx o fallos de conexión.
+        Cada intento pasa por el limitador de tasa. Si la respuesta no llega a
+        tiempo no se reintenta: un POST sin respuesta pudo haber creado el mensaje.
+
+        Returns:
+            str: SID del mensaje creado
+
+        Raises:
+            EnvioIncierto: Si la API no respondió a tiempo (el mensaje pudo enviarse)
+            requests.RequestException: Si la API responde con error o no se puede
+                conectar tras agotar los reintentos
+        """
+        datos = {'From': self.numero_origen, 'To': con_prefijo_whatsapp(destino), 'Body': cuerpo}
+        if media_url:
+            datos['MediaUrl'] = media_url
+
+        intento = 0
+        while True:
+            if self.limitador:
+                self.limitador.esperar()
+            try:
+                respuesta = self.sesion.post(self.url_mensajes, data=datos, timeout=self.timeout)
+            except requests.ConnectionError as e:
+                # Incluye ConnectTimeout: la petición no llegó a enviarse
+                if intento >= self.reintentos:
+                    raise
+                intento += 1
+                logger.warning(f"Reintento {intento}/{self.reintentos} a {destino}: {str(e)}")
+                time.sleep(self._espera(intento))
+                continue
+            except requests.Timeout as e:
+                raise EnvioIncierto(f"Sin respuesta de la API en {self.timeout}s; el mensaje "
+                                    f"pudo haberse enviado, no se reintenta: {str(e)}") from e
+            if respuesta.status_code in ESTADOS_REINTENTABLES and intento < self.reintentos:
+                intento += 1
+                logger.warning(f"Reintento {intento}/{self.reintentos} a {destino}: "
+                               f"HTTP {respuesta.status_code}")
+                time.sleep(self._espera(intento, respuesta))
+                continue
+            respuesta.raise_for_status()
+            return respuesta.json().get('sid')
+
+    def _enviar_a_destino(self, destino, mensajes):
+        """Envía en orden los mensajes de un destinatario; un fallo no detiene los siguientes"""
+        resultados = []
+        for cuerpo, media_url in mensajes:
+            try:
+                resultados.append({'sid': self.enviar(destino, cuerpo, media_url), 'error': None,
+                                   'incierto': False})
+            except Exception as e:
+                logger.error(f"Error al enviar a {destino}: {str(e)}")
+                resultados.append({'sid': None, 'error': str(e),
+                                   'incierto': isinstance(e, EnvioIncierto)})
+        return resultados
+
+    def enviar_lote(self, destinos, mensajes):
+        """
+        Envía la misma secuencia de mensajes a varios destinatarios en paralelo
+
+        Args:
+            destinos (list): Números de destino
+            mensajes (list|callable): Lista de (cuerpo, media_url) o función
+                destino -> lista, para mensajes personalizados
+
+        Returns:
+            dict: Resumen con enviados, fallidos (de ellos, inciertos: sin respuesta
+                de la API, pudieron llegar), duplicados, duración, rendimiento y
+                detalle por destino
+        """
+        # Un destino repetido se enviaría dos veces en paralelo (sin orden entre
+        # ambos) y su detalle se pisaría: se envía una sola vez
+        unicos = {}
+        for destino in destinos:
+            unicos.setdefault(con_prefijo_whatsapp(destino), destino)
+        duplicados = len(destinos) - len(unicos)
+        if duplicados:
+            logger.warning(f"⚠️ {duplicados} destinos repetidos en el lote: se envían una sola vez")
+        destinos = list(unicos.values())
+
+        inicio = time.perf_counter()
+        detalle = {}
+        with ThreadPoolExecutor(max_workers=self.max_hilos) as pool:
+            futuros = {
+                pool.submit(self._enviar_a_destino, destino,
+                            mensajes(destino) if callable(mensajes) else mensajes): destino
+                for destino in destinos
+            }
+            for futuro in as_completed(futuros):
+                detalle[futuros[futuro]] = futuro.result()
+
+        duracion = time.perf_counter() - inicio
+        enviados = sum(1 for res in detalle.values() for r in res if r['error'] is None)
+        fallidos = sum(1 for res in detalle.values() for r in res if r['error'] is not None)
+        inciertos = sum(1 for res in detalle.values() for r in res if r['incierto'])
+        resumen = {
+            'destinos': len(destinos),
+            'enviados': enviados,
+            'fallidos': fallidos,
+            'inciertos': inciertos,
+            'duplicados': duplicados,
+            'duracion_s': duracion,
+            'mensajes_por_segundo': (enviados + fallidos) / duracion if duracion else 0.0,
+            'detalle': detalle,
+        }
+        logger.info(f"📤 Lote enviado: {enviados} ok, {fallidos} con error, "
+                    f"{resumen['mensajes_por_segundo']:.1f} msg/s en {duracion:.2f}s")
+        if inciertos:
+            logger.warning(f"⚠️ {inciertos} mensajes sin respuesta de la API: revisar en Twilio "
+                           f"si llegaron antes de reenviarlos")
+        return resumen
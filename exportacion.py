@@ -0,0 +1,252 @@
+"""
+Exportación de resultados en múltiples formatos.
+Escribe los agregados del análisis (métricas, ventas por sede/canal/segmento,
+top de modelos, clientes únicos por grupo y el cubo diario) y, si se pide,
+las filas enriquecidas del DataFrame, en CSV, JSON Lines, Parquet y una base
+SQLite con índices por dimensión. Las filas se escriben por lotes (y por
+bloques en AnalizadorVentasPorBloques), nunca fila a fila, para que las
+herramientas de BI y otras ejecuciones consulten los resultados sin volver
+a leer el Excel.
+"""
+
+import logging
+import os
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from cubos_ventas import MEDIDAS
+from tipos_ventas import COLUMNAS_MONEDA, ESCALA_MONEDA, a_soles
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - dependencia opcional
+    pa = None
+    pa_csv = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+CARPETA_EXPORTACION = 'exportacion'
+BASE_SQLITE = 'ventas.sqlite'
+# Tabla con las filas enriquecidas (una por venta)
+TABLA_FILAS = 'ventas'
+# Filas por lote al escribir el detalle
+TAMANO_LOTE = 100_000
+# Columnas que se indexan en SQLite en cada tabla que las tenga
+COLUMNAS_INDICE = ['FECHA', 'SEDE', 'CANAL_VENTA', 'SEGMENTO_CLIENTE', 'MODELO_VEHICULO', 'CLIENTE']
+
+# Resultado -> nombre de la columna de valores al pasarlo a tabla
+SERIES_RESULTADOS = {
+    'ventas_por_sede': 'venta_sin_igv',
+    'canales_ventas': 'venta_sin_igv',
+    'segmento_ventas': 'venta_sin_igv',
+    'top_modelos': 'ventas',
+    'clientes_por_sede': 'clientes',
+    'clientes_por_canal': 'clientes',
+}
+
+
+def tablas_resultados(resultados):
+    """
+    Convierte los resultados del análisis en tablas planas
+
+    Returns:
+        dict: Nombre de la tabla -> DataFrame (montos en soles)
+    """
+    metricas = dict(resultados['metricas'])
+    metricas['generado'] = datetime.now().isoformat(timespec='seconds')
+    tablas = {'metricas': pd.DataFrame([metricas])}
+    for nombre, valor in SERIES_RESULTADOS.items():
+        if nombre in resultados:
+            serie = resultados[nombre]
+            tablas[nombre] = serie.rename(valor).rename_axis(serie.index.name or 'clave').reset_index()
+    if 'cubo_temporal' in resultados and len(resultados['cubo_temporal']):
+        datos = resultados['cubo_temporal'].datos.copy()
+        for medida, columna in MEDIDAS.items():
+            if columna:
+                datos[medida] = datos[medida] / ESCALA_MONEDA
+        tablas['ventas_diarias'] = datos
+    return tablas
+
+
+def _normalizar(df):
+    """
+    Tipos estables entre lotes: montos en soles (float64), categorías como
+    texto y enteros en int64, para que cada bloque tenga el mismo esquema
+    """
+    columnas = {}
+    for columna in df.columns:
+        serie = df[columna]
+        if columna in COLUMNAS_MONEDA:
+            serie = a_soles(serie).astype('float64')
+        elif isinstance(serie.dtype, pd.CategoricalDtype):
+            serie = serie.astype(object).where(serie.notna(), None)
+        elif pd.api.types.is_bool_dtype(serie.dtype):
+            pass
+        elif pd.api.types.is_integer_dtype(serie.dtype):
+            serie = serie.astype('Int64' if serie.hasnans else 'int64')
+        columnas[columna] = serie
+    return pd.DataFrame(columnas, index=df.index).reset_index(drop=True)
+
+
+class _SalidaCSV:
+    def __init__(self, carpeta):
+        self.carpeta = carpeta
+
+    def escribir(self, nombre, df, anexar):
+        ruta = os.path.join(self.carpeta, f'{nombre}.csv')
+        if pa is None:
+            df.to_csv(ruta, mode='a' if anexar else 'w', header=not anexar, index=False,
+                      encoding='utf-8')
+            return
+        # El escritor CSV de Arrow es varias veces más rápido que DataFrame.to_csv
+        with open(ruta, 'ab' if anexar else 'wb') as f:
+            pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), f,
+                             pa_csv.WriteOptions(include_header=not anexar))
+
+    def cerrar(self):
+        pass
+
+
+class _SalidaJSONL:
+    def __init__(self, carpeta):
+        self.carpeta = carpeta
+
+    def escribir(self, nombre, df, anexar):
+        texto = df.to_json(orient='records', lines=True, force_ascii=False, date_format='iso')
+        with open(os.path.join(self.carpeta, f'{nombre}.jsonl'), 'a' if anexar else 'w',
+                  encoding='utf-8') as f:
+            f.write(texto if not texto or texto.endswith('\n') else texto + '\n')
+
+    def cerrar(self):
+        pass
+
+
+class _SalidaParquet:
+    """Un .parquet por tabla; cada lote es un row group del mismo archivo"""
+
+    def __init__(self, carpeta):
+        self.carpeta = carpeta
+        self.escritores = {}
+
+    def escribir(self, nombre, df, anexar):
+        escritor = self.escritores.get(nombre) if anexar else None
+        tabla = pa.Table.from_pandas(df, preserve_index=False,
+                                     schema=escritor.schema if escritor else None)
+        if escritor is None:
+            if nombre in self.escritores:
+                self.escritores.pop(nombre).close()
+            escritor = pq.ParquetWriter(os.path.join(self.carpeta, f'{nombre}.parquet'), tabla.schema)
+            self.escritores[nombre] = escritor
+        escritor.write_table(tabla)
+
+    def cerrar(self):
+        for escritor in self.escritores.values():
+            escritor.close()
+        self.escritores = {}
+
+
+class _SalidaSQLite:
+    """Una base con una tabla por resultado; los índices se crean al cerrar, tras la carga"""
+
+    def __init__(self, carpeta):
+        self.ruta = os.path.join(carpeta, BASE_SQLITE)
+        self.conexion = sqlite3.connect(self.ruta)
+        # La base se regenera desde el análisis: no hace falta durabilidad mientras se carga
+        self.conexion.execute('PRAGMA synchronous = OFF')
+        self.conexion.execute('PRAGMA journal_mode = MEMORY')
+        self.tablas = set()
+
+    def escribir(self, nombre, df, anexar):
+        # Fechas como texto ISO en una sola operación (to_sql las convierte una a una)
+        fechas = [columna for columna in df.columns if pd.api.types.is_datetime64_any_dtype(df[columna])]
+        if fechas:
+            df = df.assign(**{columna: df[columna].dt.strftime('%Y-%m-%d %H:%M:%S') for columna in fechas})
+        df.to_sql(nombre, self.conexion, if_exists='append' if anexar else 'replace', index=False,
+                  chunksize=TAMANO_LOTE)
+        self.tablas.add(nombre)
+
+    def cerrar(self):
+        try:
+            for tabla in sorted(self.tablas):
+                columnas = [fila[1] for fila in self.conexion.execute(f'PRAGMA table_info("{tabla}")')]
+                for columna in COLUMNAS_INDICE:
+                    if columna in columnas:
+                        self.conexion.execute(f'CREATE INDEX IF NOT EXISTS "idx_{tabla}_{columna.lower()}" '
+                                              f'ON "{tabla}" ("{columna}")')
+            self.conexion.commit()
+        finally:
+            self.conexion.close()
+
+
+# Formato -> (clase de salida, descripción)
+FORMATOS = {
+    'csv': (_SalidaCSV, "Un .csv por tabla"),
+    'jsonl': (_SalidaJSONL, "Un .jsonl por tabla (un objeto JSON por línea)"),
+    'parquet': (_SalidaParquet, "Un .parquet por tabla (requiere pyarrow)"),
+    'sqlite': (_SalidaSQLite, f"{BASE_SQLITE} con una tabla por resultado e índices por dimensión"),
+}
+
+
+class ExportadorResultados:
+    def __init__(self, carpeta=CARPETA_EXPORTACION, formatos=('csv',), tamano_lote=TAMANO_LOTE):
+        """
+        Args:
+            carpeta (str): Carpeta donde se escriben los archivos
+            formatos (list): Claves de FORMATOS
+            tamano_lote (int): Filas por escritura al exportar el detalle
+        """
+        desconocidos = [formato for formato in formatos if formato not in FORMATOS]
+        if desconocidos:
+            raise ValueError(f"Formatos de exportación desconocidos: {desconocidos}")
+        if 'parquet' in formatos and pa is None:
+            logger.warning("pyarrow no está instalado. Se omite la exportación a Parquet.")
+            formatos = [formato for formato in formatos if formato != 'parquet']
+
+        os.makedirs(carpeta, exist_ok=True)
+        self.carpeta = carpeta
+        self.tamano_lote = tamano_lote
+        self.salidas = {formato: FORMATOS[formato][0](carpeta) for formato in formatos}
+        self.filas_exportadas = 0
+
+    def _escribir(self, nombre, df, anexar):
+        for salida in self.salidas.values():
+            salida.escribir(nombre, df, anexar)
+
+    def escribir_resultados(self, resultados):
+        """Escribe (reemplazando) las tablas de agregados de los resultados"""
+        tablas = tablas_resultados(resultados)
+        for nombre, tabla in tablas.items():
+            self._escribir(nombre, _normalizar(tabla), anexar=False)
+        logger.info(f"📤 {len(tablas)} tablas de resultados exportadas a {self.carpeta} "
+                    f"({', '.join(self.salidas)})")
+        return list(tablas)
+
+    def agregar_filas(self, df):
+        """
+        Añade filas enriquecidas a la tabla de detalle en lotes de tamano_lote.
+        Se puede llamar una vez por bloque: la primera llamada reemplaza lo
+        exportado antes y las siguientes anexan.
+        """
+        for inicio in range(0, len(df), self.tamano_lote):
+            parte = _normalizar(df.iloc[inicio:inicio + self.tamano_lote])
+            self._escribir(TABLA_FILAS, parte, anexar=self.filas_exportadas > 0)
+            self.filas_exportadas += len(parte)
+
+    def cerrar(self):
+        """Cierra los archivos abiertos y crea los índices de SQLite"""
+        for salida in self.salidas.values():
+            salida.cerrar()
+        if self.filas_exportadas:
+            logger.info(f"📤 {self.filas_exportadas:,} filas de detalle exportadas a {self.carpeta}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+        return False
@@ -0,0 +1,258 @@
+"""
+Gráficos en SVG sin matplotlib.
+Dibuja los mismos gráficos que graficos_ventas.py directamente desde las
+series agregadas, como texto SVG de unos pocos KB. Sirven para verlos en el
+navegador o incrustarlos en un HTML (graficos.html los reúne en una página);
+para WhatsApp, que no muestra SVG, está el formato 'movil' de graficos_ventas.
+"""
+
+import logging
+import math
+import os
+import time
+from html import escape
+
+logger = logging.getLogger(__name__)
+
+ANCHO = 720
+ALTO = 400
+FUENTE = 'DejaVu Sans, Arial, sans-serif'
+# Colores cercanos a la paleta husl de los PNG
+COLORES = ['#f77189', '#ce9032', '#97a431', '#32b166', '#36ada4', '#39a7d0', '#a48cf4', '#f561dd']
+PAGINA_HTML = 'graficos.html'
+EXTENSION = '.svg'
+
+
+def _texto(x, y, contenido, tamano=12, ancla='middle', negrita=False, rotacion=None, color='#222'):
+    atributos = f'x="{x:.1f}" y="{y:.1f}" font-size="{tamano}" text-anchor="{ancla}" fill="{color}"'
+    if negrita:
+        atributos += ' font-weight="bold"'
+    if rotacion is not None:
+        atributos += f' transform="rotate({rotacion} {x:.1f} {y:.1f})"'
+    return f'<text {atributos}>{escape(str(contenido))}</text>'
+
+
+def _lienzo(ancho, alto, contenido, x=0, y=0):
+    """Elemento <svg> completo; se puede anidar dentro de otro (dashboard)"""
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" x="{x}" y="{y}" width="{ancho}" height="{alto}" '
+            f'viewBox="0 0 {ancho} {alto}" font-family="{FUENTE}">'
+            f'<rect width="{ancho}" height="{alto}" fill="#fff"/>{"".join(contenido)}</svg>')
+
+
+def _recortar(texto, largo):
+    texto = str(texto)
+    return texto[:largo] + '...' if len(texto) > largo else texto
+
+
+def _compacto(valor):
+    """120000000 -> '120M', 35000 -> '35k' (etiquetas de los ejes)"""
+    for divisor, sufijo in [(1e9, 'B'), (1e6, 'M'), (1e3, 'k')]:
+        if abs(valor) >= divisor:
+            return f'{valor / divisor:,.3g}{sufijo}'
+    return f'{valor:,.0f}'
+
+
+def _soles(valor):
+    return f'S/ {valor:,.0f}'
+
+
+def svg_barras(serie, titulo, etiqueta_y, formato=_soles, ancho=ANCHO, alto=ALTO):
+    """Barras verticales con el valor encima de cada barra y rejilla horizontal"""
+    izquierda, derecha, arriba, abajo = 70, 20, 50, 90
+    ancho_util, alto_util = ancho - izquierda - derecha, alto - arriba - abajo
+    maximo = max([float(valor) for valor in serie.values] + [0]) or 1
+    partes = [_texto(ancho / 2, 28, titulo, 16, negrita=True),
+              _texto(16, arriba + alto_util / 2, etiqueta_y, 11, negrita=True, rotacion=-90)]
+
+    for i in range(5):
+        valor = maximo * i / 4
+        y = arriba + alto_util - alto_util * i / 4
+        partes.append(f'<line x1="{izquierda}" y1="{y:.1f}" x2="{ancho - derecha}" y2="{y:.1f}" '
+                      f'stroke="#ddd"/>')
+        partes.append(_texto(izquierda - 6, y + 4, _compacto(valor), 10, ancla='end', color='#555'))
+
+    paso = ancho_util / max(len(serie), 1)
+    for i, (etiqueta, valor) in enumerate(serie.items()):
+        altura = alto_util * float(valor) / maximo
+        x = izquierda + paso * i + paso * 0.15
+        y = arriba + alto_util - altura
+        partes.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="{paso * 0.7:.1f}" height="{altura:.1f}" '
+                      f'fill="{COLORES[i % len(COLORES)]}"/>')
+        centro = x + paso * 0.35
+        partes.append(_texto(centro, y - 5, formato(valor), 10, negrita=True))
+        partes.append(_texto(centro, arriba + alto_util + 14, _recortar(etiqueta, 18), 11,
+                             ancla='end', rotacion=-30))
+    return _lienzo(ancho, alto, partes)
+
+
+def svg_barras_horizontales(serie, titulo, etiqueta_x, ancho=ANCHO, alto=ALTO):
+    """Barras horizontales (la primera fila arriba) con el valor al final"""
+    izquierda, derecha, arriba, abajo = 170, 50, 50, 40
+    ancho_util, alto_util = ancho - izquierda - derecha, alto - arriba - abajo
+    maximo = max([float(valor) for valor in serie.values] + [0]) or 1
+    partes = [_texto(ancho / 2, 28, titulo, 16, negrita=True),
+              _texto(izquierda + ancho_util / 2, alto - 10, etiqueta_x, 11, negrita=True)]
+
+    paso = alto_util / max(len(serie), 1)
+    for i, (etiqueta, valor) in enumerate(serie.items()):
+        largo = ancho_util * float(valor) / maximo
+        y = arriba + paso * i + paso * 0.15
+        partes.append(f'<rect x="{izquierda}" y="{y:.1f}" width="{largo:.1f}" height="{paso * 0.7:.1f}" '
+                      f'fill="{COLORES[i % len(COLORES)]}"/>')
+        centro = y + paso * 0.35 + 4
+        partes.append(_texto(izquierda - 6, centro, _recortar(etiqueta, 22), 11, ancla='end'))
+        partes.append(_texto(izquierda + largo + 5, centro, f'{int(valor)}', 11, ancla='start',
+                             negrita=True))
+    return _lienzo(ancho, alto, partes)
+
+
+def svg_circular(serie, titulo, ancho=ALTO, alto=ALTO):
+    """Gráfico circular con el porcentaje de cada porción y leyenda"""
+    total = float(sum(float(valor) for valor in serie.values)) or 1
+    radio = min(ancho, alto - 90) / 2
+    cx, cy = ancho / 2, 50 + radio
+    partes = [_texto(ancho / 2, 28, titulo, 15, negrita=True)]
+
+    # Desde las 12 en punto y en sentido antihorario, como los PNG (startangle=90)
+    angulo = math.pi / 2
+    for i, (etiqueta, valor) in enumerate(serie.items()):
+        fraccion = float(valor) / total
+        final = angulo + 2 * math.pi * fraccion
+        color = COLORES[i % len(COLORES)]
+        if fraccion >= 0.9999:
+            partes.append(f'<circle cx="{cx:.1f}" cy="{cy:.1f}" r="{radio:.1f}" fill="{color}"/>')
+        elif fraccion > 0:
+            x1, y1 = cx + radio * math.cos(angulo), cy - radio * math.sin(angulo)
+            x2, y2 = cx + radio * math.cos(final), cy - radio * math.sin(final)
+            grande = 1 if fraccion > 0.5 else 0
+            partes.append(f'<path d="M{cx:.1f},{cy:.1f} L{x1:.1f},{y1:.1f} '
+                          f'A{radio:.1f},{radio:.1f} 0 {grande} 0 {x2:.1f},{y2:.1f} Z" '
+                          f'fill="{color}" stroke="#fff"/>')
+        medio = (angulo + final) / 2
+        if fraccion >= 0.03:
+            partes.append(_texto(cx + radio * 0.6 * math.cos(medio), cy - radio * 0.6 * math.sin(medio) + 4,
+                                 f'{fraccion * 100:.1f}%', 11, negrita=True, color='#fff'))
+        y = cy + radio + 22 + 16 * (i // 3)
+        x = 20 + (ancho - 40) / 3 * (i % 3)
+        partes.append(f'<rect x="{x:.1f}" y="{y - 9:.1f}" width="10" height="10" fill="{color}"/>')
+        partes.append(_texto(x + 14, y, _recortar(etiqueta, 16), 10, ancla='start'))
+        angulo = final
+    return _lienzo(ancho, alto, partes)
+
+
+def svg_metricas(metricas, ancho=ANCHO, alto=ALTO):
+    """Panel de texto con las métricas clave"""
+    lineas = [
+        f"Total Ventas: {metricas['total_ventas']:,}",
+        f"Clientes Únicos: {metricas['clientes_unicos']:,}",
+        f"Sedes Únicas: {metricas['sedes_unicas']:,}",
+        f"Modelos Únicos: {metricas['modelos_unicos']:,}",
+        f"Venta Total (sin IGV): S/ {metricas['venta_total_sin_igv']:,.2f}",
+        f"Venta Total (con IGV): S/ {metricas['venta_total_con_igv']:,.2f}",
+        f"IGV Total: S/ {metricas['igv_total']:,.2f}",
+    ]
+    partes = [_texto(40, 50, 'MÉTRICAS CLAVE', 16, ancla='start', negrita=True)]
+    partes += [_texto(40, 90 + 34 * i, f'• {linea}', 14, ancla='start') for i, linea in enumerate(lineas)]
+    return _lienzo(ancho, alto, partes)
+
+
+def grafico_ventas_por_sede(ventas_sede, ruta):
+    _guardar(svg_barras(ventas_sede, 'Ventas sin IGV por Sede', 'Ventas sin IGV (S/)'), ruta)
+
+
+def grafico_top_modelos(top_modelos, ruta):
+    _guardar(svg_barras_horizontales(top_modelos, 'Top 5 Modelos Más Vendidos', 'Cantidad Vendida'), ruta)
+
+
+def grafico_canales_ventas(canales_ventas, ruta):
+    _guardar(svg_barras(canales_ventas, 'Ventas por Canal', 'Ventas sin IGV (S/)'), ruta)
+
+
+def grafico_segmento_clientes(segmento_ventas, ruta):
+    _guardar(svg_circular(segmento_ventas, 'Ventas por Segmento de Cliente', ANCHO, ANCHO), ruta)
+
+
+def grafico_dashboard(metricas, top_modelos, ventas_sede, segmento_ventas, ruta):
+    """Las cuatro vistas en una cuadrícula de 2 × 2"""
+    paneles = [
+        _lienzo(ANCHO, ALTO, [svg_metricas(metricas)], 0, 50),
+        _lienzo(ANCHO, ALTO, [svg_barras_horizontales(top_modelos, 'Top 5 Modelos Más Vendidos',
+                                                       'Cantidad Vendida')], ANCHO, 50),
+        _lienzo(ANCHO, ALTO, [svg_barras(ventas_sede, 'Ventas sin IGV por Sede',
+                                         'Ventas sin IGV (S/)')], 0, 50 + ALTO),
+        _lienzo(ANCHO, ALTO, [svg_circular(segmento_ventas, 'Ventas por Segmento de Cliente',
+                                           ANCHO, ALTO)], ANCHO, 50 + ALTO),
+    ]
+    titulo = _texto(ANCHO, 32, 'DASHBOARD RESUMEN - ANÁLISIS DE VENTAS', 20, negrita=True)
+    _guardar(_lienzo(2 * ANCHO, 50 + 2 * ALTO, [titulo] + paneles), ruta)
+
+
+# Nombre del archivo -> (función, claves de resultados que recibe en orden); mismos nombres que GRAFICOS
+GRAFICOS_SVG = {
+    'ventas_por_sede': (grafico_ventas_por_sede, ['ventas_por_sede']),
+    'top_modelos': (grafico_top_modelos, ['top_modelos']),
+    'canales_ventas': (grafico_canales_ventas, ['canales_ventas']),
+    'segmento_clientes': (grafico_segmento_clientes, ['segmento_ventas']),
+    'dashboard_resumen': (grafico_dashboard, ['metricas', 'top_modelos', 'ventas_por_sede', 'segmento_ventas']),
+}
+
+
+def _guardar(svg, ruta):
+    with open(ruta, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write(svg)
+
+
+def escribir_pagina(carpeta_salida, nombres):
+    """Reúne los SVG indicados en una sola página HTML autocontenida"""
+    secciones = []
+    for nombre in nombres:
+        with open(os.path.join(carpeta_salida, nombre + EXTENSION), encoding='utf-8') as f:
+            # Sin la declaración XML: el SVG va incrustado en el HTML
+            secciones.append(f'<figure>{f.read().split("?>", 1)[-1].strip()}</figure>')
+    ruta = os.path.join(carpeta_salida, PAGINA_HTML)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        f.write('<!DOCTYPE html><html lang="es"><head><meta charset="utf-8">'
+                '<meta name="viewport" content="width=device-width, initial-scale=1">'
+                '<title>Análisis de Ventas</title><style>figure{margin:0 0 16px}'
+                'svg{max-width:100%;height:auto}</style></head><body>'
+                + ''.join(secciones) + '</body></html>')
+    return ruta
+
+
+def generar_graficos(resultados, carpeta_salida='graficos', perfilador=None, nombres=None):
+    """
+    Escribe un .svg por gráfico y graficos.html con todos ellos. No usa
+    matplotlib ni caché: cada SVG se dibuja en milisegundos.
+
+    Returns:
+        dict: Nombre del gráfico -> mensaje de error (None si se generó bien)
+    """
+    os.makedirs(carpeta_salida, exist_ok=True)
+    estado = {}
+    for nombre, (funcion, claves) in GRAFICOS_SVG.items():
+        if nombres is not None and nombre not in nombres:
+            continue
+        faltantes = [clave for clave in claves if clave not in resultados]
+        if faltantes:
+            estado[nombre] = f"Faltan resultados: {faltantes}"
+            continue
+        inicio, inicio_cpu = time.perf_counter(), time.process_time()
+        try:
+            funcion(*[resultados[clave] for clave in claves],
+                    os.path.join(carpeta_salida, nombre + EXTENSION))
+            estado[nombre] = None
+        except Exception as e:
+            estado[nombre] = f"{type(e).__name__}: {str(e)}"
+        if perfilador:
+            perfilador.registrar(f"grafico_{nombre}", time.perf_counter() - inicio,
+                                 time.process_time() - inicio_cpu)
+
+    generados = [nombre for nombre, error in estado.items() if error is None]
+    if generados:
+        logger.info(f"🌐 Página con {len(generados)} gráficos SVG: "
+                    f"{escribir_pagina(carpeta_salida, generados)}")
+    for nombre, error in estado.items():
+        if error:
+            logger.error(f"Error al generar gráfico {nombre}: {error}")
+    return estado
@@ -0,0 +1,330 @@
+"""
+Generación de gráficos del análisis de ventas.
+Cada gráfico es una función independiente que recibe solo las series
+agregadas que necesita, de modo que puede renderizarse en un proceso aparte.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+
+# Los gráficos solo se guardan en archivo: backend sin interfaz, salvo que
+# MPLBACKEND indique otro. Debe elegirse antes de importar pyplot.
+if 'MPLBACKEND' not in os.environ:
+    matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+logger = logging.getLogger(__name__)
+
+# Incrementar cuando cambie el código de dibujo, para invalidar la caché de gráficos
+VERSION_GRAFICOS = 1
+ESTILO = 'seaborn-v0_8'
+PALETA = 'husl'
+DPI = 300
+# Resolución para verlos en el teléfono (WhatsApp los reescala a ~1000 px de ancho)
+DPI_MOVIL = 100
+MANIFIESTO = '.graficos_manifest.json'
+
+
+def _configurar_estilo():
+    """Configuración de estilo común a todos los gráficos"""
+    plt.style.use(ESTILO)
+    sns.set_palette(PALETA)
+
+
+def grafico_ventas_por_sede(ventas_sede, ruta, figsize=(12, 6), dpi=300):
+    """Gráfico de barras: Ventas sin IGV por sede"""
+    plt.figure(figsize=figsize)
+    bars = plt.bar(ventas_sede.index, ventas_sede.values)
+    plt.title('Ventas sin IGV por Sede', fontsize=14, fontweight='bold')
+    plt.xlabel('Sede', fontweight='bold')
+    plt.ylabel('Ventas sin IGV (S/)', fontweight='bold')
+    plt.xticks(rotation=45)
+
+    # Añadir valores en las barras
+    for bar in bars:
+        height = bar.get_height()
+        plt.text(bar.get_x() + bar.get_width()/2., height,
+                 f'S/ {height:,.0f}',
+                 ha='center', va='bottom', fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(ruta, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+def grafico_top_modelos(top_modelos, ruta, figsize=(10, 6), dpi=300):
+    """Gráfico de barras horizontales: Top 5 modelos"""
+    plt.figure(figsize=figsize)
+    bars = plt.barh(range(len(top_modelos)), top_modelos.values)
+    plt.yticks(range(len(top_modelos)), [str(x)[:30] + '...' if len(str(x)) > 30 else x for x in top_modelos.index])
+    plt.title('Top 5 Modelos Más Vendidos', fontsize=14, fontweight='bold')
+    plt.xlabel('Cantidad Vendida', fontweight='bold')
+
+    # Añadir valores en las barras
+    for i, bar in enumerate(bars):
+        width = bar.get_width()
+        plt.text(width + 0.1, bar.get_y() + bar.get_height()/2.,
+                 f'{int(width)}',
+                 ha='left', va='center', fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(ruta, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+def grafico_canales_ventas(canales_ventas, ruta, figsize=(10, 6), dpi=300):
+    """Gráfico de barras: Canales con más ventas"""
+    plt.figure(figsize=figsize)
+    bars = plt.bar(canales_ventas.index, canales_ventas.values)
+    plt.title('Ventas por Canal', fontsize=14, fontweight='bold')
+    plt.xlabel('Canal de Venta', fontweight='bold')
+    plt.ylabel('Ventas sin IGV (S/)', fontweight='bold')
+    plt.xticks(rotation=45)
+
+    for bar in bars:
+        height = bar.get_height()
+        plt.text(bar.get_x() + bar.get_width()/2., height,
+                 f'S/ {height:,.0f}',
+                 ha='center', va='bottom', fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(ruta, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+def grafico_segmento_clientes(segmento_ventas, ruta, figsize=(8, 8), dpi=300):
+    """Gráfico circular: Segmento de clientes"""
+    plt.figure(figsize=figsize)
+    colors = plt.cm.Set3(np.linspace(0, 1, len(segmento_ventas)))
+    wedges, texts, autotexts = plt.pie(segmento_ventas.values,
+                                       labels=segmento_ventas.index,
+                                       autopct='%1.1f%%',
+                                       colors=colors,
+                                       startangle=90)
+
+    plt.title('Distribución de Ventas por Segmento de Cliente',
+              fontsize=14, fontweight='bold')
+
+    # Mejorar la legibilidad
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+
+    plt.tight_layout()
+    plt.savefig(ruta, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+def grafico_dashboard(metricas, top_modelos, ventas_sede, segmento_ventas, ruta, figsize=(15, 12), dpi=300):
+    """Genera un dashboard con las métricas clave"""
+    fig, axes = plt.subplots(2, 2, figsize=figsize)
+    fig.suptitle('DASHBOARD RESUMEN - ANÁLISIS DE VENTAS',
+                 fontsize=16, fontweight='bold', y=0.95)
+
+    # Métricas clave
+    ax1 = axes[0, 0]
+    ax1.axis('off')
+    texto_metricas = f"""
+    MÉTRICAS CLAVE
+
+    • Total Ventas: {metricas['total_ventas']:,}
+    • Clientes Únicos: {metricas['clientes_unicos']:,}
+    • Sedes Únicas: {metricas['sedes_unicas']:,}
+    • Modelos Únicos: {metricas['modelos_unicos']:,}
+    • Venta Total (sin IGV): S/ {metricas['venta_total_sin_igv']:,.2f}
+    • Venta Total (con IGV): S/ {metricas['venta_total_con_igv']:,.2f}
+    • IGV Total: S/ {metricas['igv_total']:,.2f}
+    """
+    ax1.text(0.1, 0.9, texto_metricas, transform=ax1.transAxes, fontsize=12,
+             verticalalignment='top', fontfamily='monospace', fontweight='bold')
+
+    # Top modelos
+    ax2 = axes[0, 1]
+    ax2.barh(range(len(top_modelos)), top_modelos.values)
+    ax2.set_yticks(range(len(top_modelos)))
+    ax2.set_yticklabels([str(x)[:20] + '...' if len(str(x)) > 20 else x for x in top_modelos.index])
+    ax2.set_title('Top 5 Modelos Más Vendidos', fontweight='bold')
+    ax2.set_xlabel('Cantidad Vendida')
+
+    # Ventas por sede
+    ax3 = axes[1, 0]
+    ax3.bar(ventas_sede.index, ventas_sede.values)
+    ax3.set_title('Ventas sin IGV por Sede', fontweight='bold')
+    ax3.set_ylabel('Ventas sin IGV (S/)')
+    ax3.tick_params(axis='x', rotation=45)
+
+    # Segmento clientes
+    ax4 = axes[1, 1]
+    ax4.pie(segmento_ventas.values, labels=segmento_ventas.index, autopct='%1.1f%%')
+    ax4.set_title('Ventas por Segmento de Cliente', fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(ruta, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+# Formato -> (extensión, dpi); dpi None: SVG dibujado sin matplotlib (graficos_svg.py)
+FORMATOS = {
+    'png': ('.png', DPI),
+    'movil': ('.png', DPI_MOVIL),
+    'svg': ('.svg', None),
+}
+
+# Nombre del archivo -> (función, claves de resultados que recibe en orden, tamaño)
+GRAFICOS = {
+    'ventas_por_sede': (grafico_ventas_por_sede, ['ventas_por_sede'], (12, 6)),
+    'top_modelos': (grafico_top_modelos, ['top_modelos'], (10, 6)),
+    'canales_ventas': (grafico_canales_ventas, ['canales_ventas'], (10, 6)),
+    'segmento_clientes': (grafico_segmento_clientes, ['segmento_ventas'], (8, 8)),
+    'dashboard_resumen': (grafico_dashboard, ['metricas', 'top_modelos', 'ventas_por_sede', 'segmento_ventas'], (15, 12)),
+}
+
+
+def _huella_datos(valor, sha):
+    """Añade al hash el contenido de una serie o de un diccionario de métricas"""
+    if isinstance(valor, pd.Series):
+        sha.update(repr((valor.name, valor.index.name, str(valor.dtype))).encode())
+        sha.update(json.dumps([str(x) for x in valor.index]).encode())
+        sha.update(pd.util.hash_pandas_object(valor, index=False).to_numpy().tobytes())
+    else:
+        sha.update(json.dumps(valor, sort_keys=True, default=str).encode())
+
+
+def clave_grafico(nombre, datos, dpi=DPI):
+    """
+    Clave de contenido del gráfico: series de entrada + estilo, tamaño y dpi.
+    Si la clave no cambia, el PNG existente es idéntico al que se generaría.
+    """
+    _, _, figsize = GRAFICOS[nombre]
+    sha = hashlib.sha256()
+    sha.update(json.dumps([nombre, VERSION_GRAFICOS, ESTILO, PALETA, dpi, figsize]).encode())
+    for valor in datos:
+        _huella_datos(valor, sha)
+    return sha.hexdigest()
+
+
+def _leer_manifiesto(carpeta_salida):
+    try:
+        with open(os.path.join(carpeta_salida, MANIFIESTO), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _guardar_manifiesto(carpeta_salida, manifiesto):
+    ruta = os.path.join(carpeta_salida, MANIFIESTO)
+    with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2)
+    os.replace(ruta + '.tmp', ruta)
+
+
+def _renderizar(nombre, datos, ruta, dpi=DPI):
+    """
+    Renderiza un gráfico y devuelve (nombre, error, (segundos de pared, de CPU)).
+    Se ejecuta también dentro de los procesos del pool, por eso no propaga
+    excepciones y mide su propio tiempo.
+    """
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    error = None
+    try:
+        _configurar_estilo()
+        funcion, _, figsize = GRAFICOS[nombre]
+        funcion(*datos, ruta, figsize=figsize, dpi=dpi)
+    except Exception as e:
+        plt.close('all')
+        error = f"{type(e).__name__}: {str(e)}"
+    return nombre, error, (time.perf_counter() - inicio, time.process_time() - inicio_cpu)
+
+
+def _inicializar_proceso():
+    """Los procesos del pool no tienen pantalla: usar el backend sin interfaz"""
+    matplotlib.use('Agg', force=True)
+
+
+def generar_graficos(resultados, carpeta_salida='graficos', paralelo=False, max_procesos=None,
+                     usar_cache=True, perfilador=None, nombres=None, formato='png'):
+    """
+    Genera todos los gráficos a partir de los resultados del análisis.
+    Con paralelo=True cada gráfico se envía a un proceso del pool junto con
+    las series agregadas que necesita y los PNG se escriben en simultáneo.
+    Con usar_cache=True solo se redibujan los gráficos cuya clave de contenido
+    cambió respecto a la última ejecución (ver clave_grafico).
+    Un error en un gráfico no impide generar los demás.
+    Si se pasa un perfilador, el tiempo de cada gráfico se registra como etapa.
+    Con nombres se genera solo ese subconjunto de GRAFICOS.
+    formato elige entre FORMATOS: 'png' (300 dpi), 'movil' (PNG de 100 dpi,
+    más rápido y ligero para WhatsApp) o 'svg' (ver graficos_svg.py).
+
+    Returns:
+        dict: Nombre del gráfico -> mensaje de error (None si se generó bien)
+    """
+    extension, dpi = FORMATOS[formato]
+    if dpi is None:
+        from graficos_svg import generar_graficos as generar_svg
+        return generar_svg(resultados, carpeta_salida, perfilador, nombres)
+
+    os.makedirs(carpeta_salida, exist_ok=True)
+
+    manifiesto = _leer_manifiesto(carpeta_salida) if usar_cache else {}
+    claves_nuevas = {}
+    tareas = []
+    estado = {}
+    for nombre, (_, claves, _) in GRAFICOS.items():
+        if nombres is not None and nombre not in nombres:
+            continue
+        faltantes = [clave for clave in claves if clave not in resultados]
+        if faltantes:
+            estado[nombre] = f"Faltan resultados: {faltantes}"
+            continue
+        datos = [resultados[clave] for clave in claves]
+        ruta = os.path.join(carpeta_salida, nombre + extension)
+
+        if usar_cache:
+            claves_nuevas[nombre] = clave_grafico(nombre, datos, dpi)
+            if manifiesto.get(nombre) == claves_nuevas[nombre] and os.path.exists(ruta):
+                logger.info(f"♻️ Gráfico sin cambios, se reutiliza: {ruta}")
+                estado[nombre] = None
+                continue
+        tareas.append((nombre, datos, ruta, dpi))
+
+    if paralelo and len(tareas) > 1:
+        with ProcessPoolExecutor(max_workers=max_procesos, initializer=_inicializar_proceso) as pool:
+            futuros = {pool.submit(_renderizar, *tarea): tarea[0] for tarea in tareas}
+            for futuro in as_completed(futuros):
+                try:
+                    nombre, error, tiempos = futuro.result()
+                    if perfilador:
+                        perfilador.registrar(f"grafico_{nombre}", *tiempos)
+                except Exception as e:
+                    # El proceso murió antes de poder informar el error
+                    error = f"{type(e).__name__}: {str(e)}"
+                estado[futuros[futuro]] = error
+    else:
+        for tarea in tareas:
+            nombre, error, tiempos = _renderizar(*tarea)
+            if perfilador:
+                perfilador.registrar(f"grafico_{nombre}", *tiempos)
+            estado[nombre] = error
+
+    if usar_cache and tareas:
+        for nombre, _, _, _ in tareas:
+            if estado.get(nombre) is None:
+                manifiesto[nombre] = claves_nuevas[nombre]
+            else:
+                manifiesto.pop(nombre, None)
+        _guardar_manifiesto(carpeta_salida, manifiesto)
+
+    for nombre, error in estado.items():
+        if error:
+            logger.error(f"Error al generar gráfico {nombre}: {error}")
+    return estado
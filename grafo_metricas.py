@@ -0,0 +1,195 @@
+"""
+Resultados del análisis como grafo de métricas perezoso.
+Cada métrica declara las columnas de AnalizadorVentas.df y las otras métricas
+de las que depende. Solo se calcula cuando alguien la pide y queda memorizada
+hasta que cambia alguna de sus entradas: si se modifica PRECIO_SIN_IGV, se
+recalculan las ventas por sede, pero no el top de modelos.
+
+Los valores asignados por clave (resultados['top_modelos'] = ...) tienen
+prioridad solo para esa clave; el resto se sigue calculando sobre df.
+Sustituir el contenido completo (resultados = {...}, como hacen el modo
+incremental, el análisis por bloques o un lote, cuyo df no es el total)
+congela el grafo hasta que los datos vuelvan a cambiar.
+"""
+
+import logging
+from collections.abc import MutableMapping
+
+from conteo_distintos import cardinalidades, contar_clientes
+from cubos_ventas import DIMENSIONES, MEDIDAS, construir_cubo
+from tipos_ventas import sumar_montos, sumar_montos_por
+
+logger = logging.getLogger(__name__)
+
+TOP_MODELOS = 5
+
+
+def _ventas_por(df, columna):
+    return sumar_montos_por(df['PRECIO_SIN_IGV'], df[columna])
+
+
+def ventas_por_sede(df, resultados):
+    return _ventas_por(df, 'SEDE').sort_values(ascending=False)
+
+
+def top_modelos(df, resultados):
+    return df['MODELO_VEHICULO'].value_counts().head(TOP_MODELOS)
+
+
+def canales_ventas(df, resultados):
+    return _ventas_por(df, 'CANAL_VENTA').sort_values(ascending=False)
+
+
+def segmento_ventas(df, resultados):
+    return _ventas_por(df, 'SEGMENTO_CLIENTE')
+
+
+def clientes_por_sede(df, resultados):
+    return cardinalidades(contar_clientes(df, 'SEDE'), 'SEDE')
+
+
+def clientes_por_canal(df, resultados):
+    return cardinalidades(contar_clientes(df, 'CANAL_VENTA'), 'CANAL_VENTA')
+
+
+def metricas(df, resultados):
+    return {nombre: resultados[nombre] for nombre in METRICAS_GENERALES}
+
+
+# Nombre -> (función(df, resultados), columnas de df, métricas de las que depende)
+METRICAS = {
+    'ventas_por_sede': (ventas_por_sede, ['SEDE', 'PRECIO_SIN_IGV'], []),
+    'top_modelos': (top_modelos, ['MODELO_VEHICULO'], []),
+    'canales_ventas': (canales_ventas, ['CANAL_VENTA', 'PRECIO_SIN_IGV'], []),
+    'segmento_ventas': (segmento_ventas, ['SEGMENTO_CLIENTE', 'PRECIO_SIN_IGV'], []),
+    'clientes_por_sede': (clientes_por_sede, ['CLIENTE', 'SEDE'], []),
+    'clientes_por_canal': (clientes_por_canal, ['CLIENTE', 'CANAL_VENTA'], []),
+    'clientes_unicos': (lambda df, r: contar_clientes(df).cardinalidad(), ['CLIENTE'], []),
+    'total_ventas': (lambda df, r: len(df), [], []),
+    'venta_total_con_igv': (lambda df, r: sumar_montos(df['PRECIO_VENTA']), ['PRECIO_VENTA'], []),
+    'venta_total_sin_igv': (lambda df, r: sumar_montos(df['PRECIO_SIN_IGV']), ['PRECIO_SIN_IGV'], []),
+    'igv_total': (lambda df, r: sumar_montos(df['IGV']), ['IGV'], []),
+    'sedes_unicas': (lambda df, r: df['SEDE'].nunique(), ['SEDE'], []),
+    'modelos_unicos': (lambda df, r: df['MODELO_VEHICULO'].nunique(), ['MODELO_VEHICULO'], []),
+    # Cubo día x dimensiones para ventanas y tendencias (no se lista al iterar resultados)
+    'cubo_temporal': (lambda df, r: construir_cubo(df),
+                      ['FECHA'] + DIMENSIONES + [c for c in MEDIDAS.values() if c], []),
+    'metricas': (metricas, [], ['clientes_unicos', 'total_ventas', 'venta_total_con_igv',
+                                'venta_total_sin_igv', 'igv_total', 'sedes_unicas', 'modelos_unicos']),
+}
+
+# Métricas escalares que forman parte de resultados['metricas']
+METRICAS_GENERALES = METRICAS['metricas'][2]
+
+# Claves que se listan al iterar resultados (las mismas que producía el cálculo completo)
+RESULTADOS_PUBLICOS = ['ventas_por_sede', 'top_modelos', 'canales_ventas', 'segmento_ventas',
+                       'clientes_por_sede', 'clientes_por_canal', 'metricas']
+
+
+class ResultadosPerezosos(MutableMapping):
+    def __init__(self, obtener_df):
+        """
+        Args:
+            obtener_df (callable): Devuelve el DataFrame actual (o None si no hay datos)
+        """
+        self.obtener_df = obtener_df
+        self._fijos = {}
+        self._memo = {}
+        self._versiones = {}
+        self._generacion = 0
+        self._congelado = False
+        self.calculadas = 0
+
+    def invalidar(self, *columnas):
+        """
+        Marca columnas de df como modificadas (sin argumentos: todo el DataFrame
+        cambió). Descarta también los valores asignados directamente, que se
+        calcularon sobre los datos anteriores.
+        """
+        if columnas:
+            for columna in columnas:
+                self._versiones[columna] = self._versiones.get(columna, 0) + 1
+        else:
+            self._generacion += 1
+            self._memo.clear()
+        self._fijos.clear()
+        self._congelado = False
+
+    def reemplazar(self, valores):
+        """Sustituye todo el contenido por valores fijos (equivale a asignar un dict)"""
+        self._fijos = dict(valores)
+        self._congelado = bool(self._fijos)
+
+    def _descartar_dependientes(self, nombre):
+        """Olvida lo memorizado de las métricas que leen nombre (p. ej. 'metricas')"""
+        for otra, (_, _, dependencias) in METRICAS.items():
+            if nombre in dependencias and otra in self._memo:
+                del self._memo[otra]
+                self._descartar_dependientes(otra)
+
+    def _firma(self, nombre):
+        _, columnas, dependencias = METRICAS[nombre]
+        return (self._generacion,
+                tuple(self._versiones.get(columna, 0) for columna in columnas),
+                tuple(self._firma(dependencia) for dependencia in dependencias))
+
+    def _disponible(self, nombre):
+        """True si la métrica puede calcularse con el df actual"""
+        if nombre in self._fijos:
+            return True
+        # Un 'metricas' asignado manda sobre sus componentes escalares
+        if nombre in METRICAS_GENERALES and nombre in self._fijos.get('metricas', {}):
+            return True
+        if self._congelado or nombre not in METRICAS:
+            return False
+        df = self.obtener_df()
+        if df is None:
+            return False
+        _, columnas, dependencias = METRICAS[nombre]
+        return (all(columna in df.columns for columna in columnas)
+                and all(self._disponible(dependencia) for dependencia in dependencias))
+
+    def __getitem__(self, nombre):
+        if nombre in self._fijos:
+            return self._fijos[nombre]
+        if not self._disponible(nombre):
+            raise KeyError(nombre)
+        if nombre in METRICAS_GENERALES and nombre in self._fijos.get('metricas', {}):
+            return self._fijos['metricas'][nombre]
+
+        firma = self._firma(nombre)
+        memo = self._memo.get(nombre)
+        if memo is not None and memo[1] == firma:
+            return memo[0]
+
+        funcion = METRICAS[nombre][0]
+        valor = funcion(self.obtener_df(), self)
+        self._memo[nombre] = (valor, firma)
+        self.calculadas += 1
+        logger.debug(f"Métrica calculada bajo demanda: {nombre}")
+        return valor
+
+    def __setitem__(self, nombre, valor):
+        # Solo esta clave queda fija; las demás siguen calculándose sobre df
+        self._fijos[nombre] = valor
+        self._descartar_dependientes(nombre)
+
+    def __delitem__(self, nombre):
+        del self._fijos[nombre]
+        self._descartar_dependientes(nombre)
+
+    def __contains__(self, nombre):
+        return self._disponible(nombre)
+
+    def __iter__(self):
+        claves = list(self._fijos)
+        claves += [nombre for nombre in RESULTADOS_PUBLICOS
+                   if nombre not in self._fijos and self._disponible(nombre)]
+        return iter(claves)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        calculadas = [nombre for nombre in self._memo if nombre in RESULTADOS_PUBLICOS]
+        return f"ResultadosPerezosos(fijos={list(self._fijos)}, calculadas={calculadas})"
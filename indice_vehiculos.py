@@ -0,0 +1,97 @@
+"""
+Índice denso de la dimensión VEHICULOS.
+Mapea ID de vehículo -> posición en el catálogo con un arreglo directo, de
+modo que enriquecer las ventas con MARCA, MODELO, TIPO VEHÍCULO y AÑO es un
+gather por posición en lugar de un pd.merge que copia todas las columnas.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from tipos_ventas import como_categoria
+
+logger = logging.getLogger(__name__)
+
+ATRIBUTOS_VEHICULO = ['MARCA', 'MODELO', 'TIPO VEHÍCULO', 'AÑO']
+
+# Si los IDs son muy dispersos, un arreglo directo desperdicia memoria y se
+# usa en su lugar la tabla hash de pd.Index
+MAX_DENSIDAD = 64
+
+# Índices ya construidos, por huella del catálogo (se reutilizan entre
+# ejecuciones dentro del mismo proceso y entre bloques)
+_INDICES = {}
+
+
+class IndiceVehiculos:
+    def __init__(self, df_vehiculos, columna_id='ID_Vehiculo', atributos=ATRIBUTOS_VEHICULO):
+        ids = pd.to_numeric(df_vehiculos[columna_id], errors='coerce')
+        duplicados = ids.duplicated()
+        if duplicados.any():
+            logger.warning(f"VEHICULOS tiene {int(duplicados.sum())} IDs duplicados; se usa la primera aparición")
+            df_vehiculos = df_vehiculos[~duplicados.to_numpy()]
+            ids = ids[~duplicados]
+
+        self.atributos = {}
+        for columna in atributos:
+            if columna not in df_vehiculos.columns:
+                continue
+            serie = df_vehiculos[columna].reset_index(drop=True)
+            if pd.api.types.is_numeric_dtype(serie.dtype):
+                self.atributos[columna] = serie.to_numpy()
+            else:
+                self.atributos[columna] = como_categoria(serie).array
+
+        ids = ids.to_numpy(dtype='float64')
+        enteros = np.isfinite(ids) & (ids >= 0) & (ids == np.floor(ids))
+        maximo = int(ids[enteros].max()) if enteros.any() else -1
+        self.denso = enteros.all() and maximo < MAX_DENSIDAD * max(len(ids), 1024)
+
+        if self.denso:
+            self.posiciones = np.full(maximo + 1, -1, dtype=np.int32)
+            self.posiciones[ids.astype(np.int64)] = np.arange(len(ids), dtype=np.int32)
+        else:
+            self.posiciones = pd.Index(ids)
+
+    def posiciones_de(self, ids_ventas):
+        """Posición en el catálogo de cada ID de venta (-1 si no existe)"""
+        ids = pd.to_numeric(pd.Series(ids_ventas), errors='coerce').to_numpy(dtype='float64')
+        if not self.denso:
+            return self.posiciones.get_indexer(ids)
+
+        validos = np.isfinite(ids) & (ids >= 0) & (ids < len(self.posiciones))
+        resultado = np.full(len(ids), -1, dtype=np.int32)
+        resultado[validos] = self.posiciones[ids[validos].astype(np.int64)]
+        return resultado
+
+    def enriquecer(self, df_ventas, columna_id='ID_Vehículo'):
+        """
+        Añade los atributos del vehículo a df_ventas (en el mismo DataFrame, sin
+        copiarlo). Las ventas con un ID fuera del catálogo quedan con nulos,
+        igual que en un merge por la izquierda.
+        """
+        posiciones = self.posiciones_de(df_ventas[columna_id])
+        faltantes = posiciones < 0
+        for columna, valores in self.atributos.items():
+            if isinstance(valores, pd.Categorical):
+                codigos = valores.codes[posiciones]
+                codigos[faltantes] = -1
+                df_ventas[columna] = pd.Categorical.from_codes(codigos, valores.categories)
+            else:
+                df_ventas[columna] = pd.api.extensions.take(valores, posiciones, allow_fill=True)
+        return df_ventas
+
+
+def obtener_indice(df_vehiculos, columna_id='ID_Vehiculo'):
+    """Devuelve el índice del catálogo, reutilizando uno ya construido si no cambió"""
+    huella = (columna_id, int(pd.util.hash_pandas_object(df_vehiculos.astype(str), index=False).sum()),
+              tuple(df_vehiculos.columns))
+    indice = _INDICES.get(huella)
+    if indice is None:
+        indice = IndiceVehiculos(df_vehiculos, columna_id)
+        if len(_INDICES) >= 8:
+            _INDICES.pop(next(iter(_INDICES)))
+        _INDICES[huella] = indice
+    return indice
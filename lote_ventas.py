@@ -0,0 +1,234 @@
+"""
+Procesamiento por lotes de varios libros de ventas (uno por sede y día).
+Ejecuta AnalizadorVentas.ejecutar_analisis_completo para cada libro en un pool
+de procesos, combina los agregados de todos en un reporte consolidado e
+imprime el tiempo y el rendimiento de cada archivo. No hace preguntas: pensado
+para ejecutarse desde una tarea programada.
+Los agregados de cada libro pueden guardarse en JSON (--agregados) y volver a
+usarse como entrada: consolidar varios días ya analizados solo combina sus
+agregados y bocetos de clientes, sin releer los libros.
+
+Uso:
+    python lote_ventas.py carpeta_ventas/
+    python lote_ventas.py "ventas/*.xlsx" -p 4 --salida graficos_lote
+    python lote_ventas.py ventas_hoy/ --agregados agregados_diarios/
+    python lote_ventas.py "agregados_diarios/*.json" --sin-graficos
+"""
+
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from motor_agregacion import AgregadosVentas
+from validacion_datos import RUTA_CUARENTENA
+from ventas_rpa import AnalizadorVentas
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONES_LIBRO = ('.xlsx', '.xlsm')
+EXTENSION_AGREGADOS = '.json'
+
+
+def expandir_entradas(entradas):
+    """
+    Convierte carpetas y patrones glob en la lista de libros (o agregados
+    guardados en JSON) a procesar, sin duplicados y en orden. Ignora los
+    archivos temporales de Excel (~$...).
+    """
+    archivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            candidatos = [os.path.join(entrada, nombre) for nombre in os.listdir(entrada)]
+        else:
+            candidatos = glob.glob(entrada) or [entrada]
+        for ruta in sorted(candidatos):
+            nombre = os.path.basename(ruta)
+            if nombre.startswith('~$') or not nombre.lower().endswith(
+                    EXTENSIONES_LIBRO + (EXTENSION_AGREGADOS,)):
+                continue
+            if ruta not in archivos:
+                archivos.append(ruta)
+    return archivos
+
+
+def carpeta_graficos_de(archivo, carpeta_salida):
+    """Subcarpeta de gráficos de un libro: <salida>/<nombre del libro>"""
+    return os.path.join(carpeta_salida, os.path.splitext(os.path.basename(archivo))[0])
+
+
+def es_agregado(archivo):
+    return archivo.lower().endswith(EXTENSION_AGREGADOS)
+
+
+def cargar_agregados(archivo):
+    """Estado de un archivo de agregados ya calculados (no se vuelve a analizar)"""
+    inicio = time.perf_counter()
+    inicio_cpu = time.process_time()
+    estado = {'archivo': archivo, 'ok': False, 'filas': 0, 'bytes': 0,
+              'duracion_s': 0.0, 'cpu_s': 0.0, 'agregados': None, 'error': None}
+    try:
+        estado['bytes'] = os.path.getsize(archivo)
+        estado['agregados'] = AgregadosVentas.cargar(archivo)
+        estado['filas'] = estado['agregados'].total_ventas
+        estado['ok'] = True
+    except Exception as e:
+        estado['error'] = f"Agregados ilegibles: {e}"
+    estado['duracion_s'] = time.perf_counter() - inicio
+    estado['cpu_s'] = time.process_time() - inicio_cpu
+    return estado
+
+
+def analizar_archivo(archivo, carpeta_salida='graficos_lote', graficos=True, carpeta_agregados=None):
+    """
+    Analiza un libro (se ejecuta en un proceso del pool)
+
+    Args:
+        carpeta_agregados (str): Si se indica, guarda ahí los agregados del libro
+            como <nombre del libro>.json
+
+    Returns:
+        dict: archivo, ok, filas, bytes, duracion_s, cpu_s, agregados y error
+    """
+    inicio = time.perf_counter()
+    inicio_cpu = time.process_time()
+    estado = {'archivo': archivo, 'ok': False, 'filas': 0, 'bytes': 0,
+              'duracion_s': 0.0, 'cpu_s': 0.0, 'agregados': None, 'error': None}
+    try:
+        estado['bytes'] = os.path.getsize(archivo)
+        analizador = AnalizadorVentas(archivo)
+        carpeta_libro = carpeta_graficos_de(archivo, carpeta_salida)
+        # Cada proceso escribe la cuarentena de su libro en su propia carpeta
+        analizador.validador.ruta_cuarentena = os.path.join(carpeta_libro, RUTA_CUARENTENA)
+        estado['ok'] = analizador.ejecutar_analisis_completo(
+            carpeta_salida=carpeta_libro, generar_graficos=graficos)
+        if analizador.df is not None:
+            estado['filas'] = len(analizador.df)
+        estado['agregados'] = analizador.agregados
+        if estado['ok'] and carpeta_agregados and analizador.agregados is not None:
+            os.makedirs(carpeta_agregados, exist_ok=True)
+            analizador.agregados.guardar(os.path.join(
+                carpeta_agregados, os.path.splitext(os.path.basename(archivo))[0] + EXTENSION_AGREGADOS))
+        if not estado['ok']:
+            estado['error'] = 'El análisis no pudo completarse (ver log)'
+    except Exception as e:
+        estado['error'] = str(e)
+    estado['duracion_s'] = time.perf_counter() - inicio
+    estado['cpu_s'] = time.process_time() - inicio_cpu
+    return estado
+
+
+def ejecutar_lote(archivos, max_procesos=None, carpeta_salida='graficos_lote', graficos=True,
+                  carpeta_agregados=None):
+    """
+    Analiza los libros en paralelo y consolida sus agregados
+
+    Args:
+        archivos (list): Rutas de los libros
+        max_procesos (int): Procesos del pool (por defecto, uno por núcleo)
+        carpeta_salida (str): Carpeta con una subcarpeta de gráficos por libro
+            y otra 'consolidado' para el reporte combinado
+        graficos (bool): Generar los gráficos por libro y consolidados
+        carpeta_agregados (str): Carpeta donde guardar los agregados de cada libro
+
+    Returns:
+        tuple: (AnalizadorVentas con los resultados consolidados, lista de estados por archivo)
+    """
+    inicio = time.perf_counter()
+    libros = [archivo for archivo in archivos if not es_agregado(archivo)]
+    estados = [cargar_agregados(archivo) for archivo in archivos if es_agregado(archivo)]
+    max_procesos = min(max_procesos or os.cpu_count() or 1, len(libros)) or 1
+    logger.info(f"🚀 Procesando {len(libros)} libros con {max_procesos} procesos "
+                f"y {len(estados)} agregados guardados...")
+
+    if max_procesos == 1:
+        estados += [analizar_archivo(archivo, carpeta_salida, graficos, carpeta_agregados)
+                    for archivo in libros]
+    else:
+        with ProcessPoolExecutor(max_workers=max_procesos) as pool:
+            futuros = [pool.submit(analizar_archivo, archivo, carpeta_salida, graficos, carpeta_agregados)
+                       for archivo in libros]
+            for futuro in as_completed(futuros):
+                estados.append(futuro.result())
+    estados.sort(key=lambda estado: archivos.index(estado['archivo']))
+
+    total = AgregadosVentas()
+    for estado in estados:
+        if estado['ok'] and estado['agregados'] is not None:
+            total.combinar(estado['agregados'])
+
+    consolidado = AnalizadorVentas(archivos, usar_cache=False)
+    consolidado.agregados = total
+    consolidado.resultados = total.a_resultados()
+    if graficos and total.total_ventas:
+        consolidado.generar_graficos(os.path.join(carpeta_salida, 'consolidado'))
+
+    logger.info(f"✅ Lote completado en {time.perf_counter() - inicio:.2f}s")
+    return consolidado, estados
+
+
+def imprimir_estadisticas(estados, duracion_total):
+    """Tabla de tiempos y rendimiento por archivo"""
+    print("\n⏱️ ESTADÍSTICAS POR ARCHIVO")
+    print("=" * 90)
+    print(f"{'Archivo':<40} {'Estado':<7} {'Filas':>9} {'Tiempo':>9} {'CPU':>8} {'Filas/s':>10}")
+    for estado in estados:
+        nombre = os.path.basename(estado['archivo'])[:40]
+        filas_s = estado['filas'] / estado['duracion_s'] if estado['duracion_s'] else 0.0
+        print(f"{nombre:<40} {'OK' if estado['ok'] else 'ERROR':<7} {estado['filas']:>9,} "
+              f"{estado['duracion_s']:>8.2f}s {estado['cpu_s']:>7.2f}s {filas_s:>10,.0f}")
+        if estado['error']:
+            print(f"    ⚠️ {estado['error']}")
+
+    filas = sum(estado['filas'] for estado in estados)
+    megas = sum(estado['bytes'] for estado in estados) / 1024 ** 2
+    suma_tiempos = sum(estado['duracion_s'] for estado in estados)
+    print("-" * 90)
+    print(f"Total: {filas:,} filas de {megas:,.1f} MB en {duracion_total:.2f}s "
+          f"({filas / duracion_total if duracion_total else 0:,.0f} filas/s, "
+          f"{megas / duracion_total if duracion_total else 0:,.2f} MB/s)")
+    if duracion_total:
+        print(f"Paralelismo efectivo: {suma_tiempos / duracion_total:.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Análisis por lotes de libros de ventas")
+    parser.add_argument('entradas', nargs='+',
+                        help="Carpetas o patrones glob de libros .xlsx o de agregados .json")
+    parser.add_argument('-p', '--procesos', type=int, default=None,
+                        help="Procesos en paralelo (por defecto, uno por núcleo)")
+    parser.add_argument('--salida', default='graficos_lote', help="Carpeta de gráficos")
+    parser.add_argument('--sin-graficos', action='store_true', help="Solo calcular agregados")
+    parser.add_argument('--reporte', help="Guardar el reporte consolidado en este archivo")
+    parser.add_argument('--agregados', help="Guardar los agregados de cada libro en esta carpeta")
+    args = parser.parse_args(argv)
+
+    archivos = expandir_entradas(args.entradas)
+    if not archivos:
+        print(f" No se encontraron libros en: {', '.join(args.entradas)}")
+        return False
+
+    inicio = time.perf_counter()
+    consolidado, estados = ejecutar_lote(archivos, args.procesos, args.salida,
+                                         graficos=not args.sin_graficos,
+                                         carpeta_agregados=args.agregados)
+    duracion = time.perf_counter() - inicio
+
+    correctos = sum(1 for estado in estados if estado['ok'])
+    print(f"\n📊 REPORTE CONSOLIDADO: {correctos}/{len(estados)} libros")
+    print("=" * 50)
+    reporte = consolidado.generar_reporte_texto()
+    print(reporte)
+    if args.reporte:
+        with open(args.reporte, 'w', encoding='utf-8') as f:
+            f.write(reporte)
+
+    imprimir_estadisticas(estados, duracion)
+    return correctos == len(estados)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -3,15 +3,29 @@ RPA para Análisis de Ventas y Envío de Reportes por WhatsApp
 Autor: Eli Mora
 Universidad Rafael Urdaneta
 Proyecto III - Inteligencia Artificial
+
+Sin argumentos ejecuta el flujo interactivo completo. Para tareas programadas,
+cada subcomando importa solo lo que necesita (pandas, matplotlib o twilio):
+    py main.py report-text              Reporte en texto, sin gráficos ni envío
+    py main.py analyze --agregados a.json
+    py main.py render --agregados a.json
+    py main.py render --formato svg     Gráficos SVG + graficos.html, sin matplotlib
+    py main.py export --formatos sqlite parquet --filas
+    py main.py send +584127985110
 """
 
+import argparse
 import os
 import sys
 import logging
-from twilio.rest import Client
-from ventas_rpa import AnalizadorVentas
 from datetime import datetime
 
+from publicacion_graficos import ETIQUETAS_GRAFICOS
+
+# Sin pantalla en tareas programadas: backend de matplotlib sin interfaz desde
+# el arranque (no importa matplotlib, solo fija la elección)
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -20,9 +34,62 @@ logger = logging.getLogger(__name__)
 TWILIO_ACCOUNT_SID = ""
 TWILIO_AUTH_TOKEN = ""
 TWILIO_WHATSAPP_NUMBER = ""
+IMGBB_API_KEY = os.getenv('IMGBB_API_KEY', "")
+
+# Dónde se publican los gráficos enlazados en el reporte: 'imgbb' (con
+# IMGBB_API_KEY) o 'local' (se copian a CARPETA_PUBLICACION, que un servidor
+# web propio sirve en URL_BASE)
+ALMACENAMIENTO = os.getenv('ALMACENAMIENTO', 'imgbb').lower()
+URL_BASE = os.getenv('URL_BASE', "")
+CARPETA_PUBLICACION = os.getenv('CARPETA_PUBLICACION', 'graficos_publicados')
+
+ARCHIVO_EXCEL = "Ventas Fundamentos.xlsx"
+
+
+def publicacion_configurada():
+    """Indica si hay un almacenamiento configurado para publicar los gráficos"""
+    if ALMACENAMIENTO == 'local':
+        return bool(URL_BASE)
+    return bool(IMGBB_API_KEY)
 
-def generar_reporte_completo(analizador):
-    """Genera el reporte completo para WhatsApp"""
+def publicar_graficos(carpeta='graficos'):
+    """
+    Comprime y publica los gráficos generados en el almacenamiento configurado
+    (ALMACENAMIENTO). Las imágenes cuyo contenido ya se publicó no se vuelven
+    a subir.
+    
+    Returns:
+        dict: Nombre del gráfico -> URL
+    """
+    from publicacion_graficos import (AlmacenamientoImgBB, AlmacenamientoLocal, PublicadorGraficos,
+                                      rutas_graficos)
+    
+    if not publicacion_configurada():
+        variable = 'URL_BASE' if ALMACENAMIENTO == 'local' else 'IMGBB_API_KEY'
+        print(f" {variable} no configurada: el reporte no incluirá enlaces a gráficos")
+        return {}
+    
+    if ALMACENAMIENTO == 'local':
+        almacenamiento = AlmacenamientoLocal(CARPETA_PUBLICACION, URL_BASE)
+    else:
+        almacenamiento = AlmacenamientoImgBB(IMGBB_API_KEY)
+    publicador = PublicadorGraficos(almacenamiento)
+    return publicador.publicar(rutas_graficos(carpeta))
+
+def generar_reporte_completo(analizador, enlaces=None):
+    """
+    Genera el reporte completo para WhatsApp
+    
+    Args:
+        analizador (AnalizadorVentas): Instancia del analizador con resultados
+        enlaces (dict): Nombre del gráfico -> URL publicada (ver publicar_graficos)
+    """
+    enlaces = enlaces or {}
+    lineas_enlaces = [f'• {etiqueta}: {enlaces[nombre]}'
+                      for nombre, etiqueta in ETIQUETAS_GRAFICOS.items() if nombre in enlaces]
+    seccion_enlaces = ''
+    if lineas_enlaces:
+        seccion_enlaces = "🖼️ ENLACES A GRÁFICOS VISUALES:\n" + "\n".join(lineas_enlaces) + "\n\n"
     
     metricas = analizador.resultados['metricas']
     ventas_sede = analizador.resultados['ventas_por_sede']
@@ -49,24 +116,27 @@ Proyecto III - Inteligencia Artificial
 📞 CANALES CON MÁS VENTAS:
 {chr(10).join([f'• {canal}: S/ {venta:,.2f}' for canal, venta in canales_ventas.items()])}
 
-🖼️ ENLACES A GRÁFICOS VISUALES:
-• 📊 Ventas por Sede: https://ibb.co/wNJdPR7q
-• 🚗 Top Modelos: https://ibb.co/PsqVkGfs
-• 📞 Canales de Venta: https://ibb.co/0j2fCFFq
-• 👥 Segmento Clientes: https://ibb.co/XfbGjGjc
-• 📈 Dashboard Resumen: https://ibb.co/p6XDM8qg
-
- Generado: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+{seccion_enlaces} Generado: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
  Autor: Eli Mora
 
 Instrucciones: Haz clic en los enlaces para ver los gráficos detallados."""
     
     return reporte
 
+_cliente_twilio = None
+
+def obtener_cliente_twilio():
+    """Devuelve un único cliente de Twilio por proceso (reutiliza su sesión HTTP)"""
+    global _cliente_twilio
+    if _cliente_twilio is None:
+        from twilio.rest import Client
+        _cliente_twilio = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+    return _cliente_twilio
+
 def enviar_whatsapp_directo(numero_destino, reporte):
     """Envía el reporte por WhatsApp usando Twilio directamente"""
     try:
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+        client = obtener_cliente_twilio()
         
         message = client.messages.create(
             body=reporte,
@@ -83,7 +153,191 @@ def enviar_whatsapp_directo(numero_destino, reporte):
         print(f" Error al enviar: {e}")
         return False
 
-def main():
+def exportar_perfil(perfilador, prefijo):
+    """Imprime el resumen por etapas y guarda <prefijo>.json y <prefijo>.folded (flamegraph)"""
+    print("\n⏱️ PERFIL POR ETAPAS")
+    print("=" * 50)
+    print(perfilador.resumen())
+    perfilador.exportar_json(f"{prefijo}.json")
+    perfilador.exportar_flamegraph(f"{prefijo}.folded")
+    print(f"• {prefijo}.json")
+    print(f"• {prefijo}.folded (flamegraph.pl / speedscope)")
+
+def crear_perfilador(args):
+    from perfilado import Perfilador
+    return Perfilador() if args.perfil else None
+
+def cargar_analizador(args, perfilador=None):
+    """
+    Analizador con resultados para un subcomando: desde los agregados guardados
+    (--agregados existente, sin leer el Excel) o analizando el libro
+    
+    Returns:
+        AnalizadorVentas | None: None si el análisis falla
+    """
+    from ventas_rpa import AnalizadorVentas
+    
+    analizador = AnalizadorVentas(args.archivo, perfilador=perfilador)
+    ruta_agregados = getattr(args, 'agregados', None)
+    if ruta_agregados and os.path.exists(ruta_agregados) and args.comando != 'analyze':
+        from motor_agregacion import AgregadosVentas
+        with analizador.perfilador.etapa('cargar_agregados'):
+            analizador.agregados = AgregadosVentas.cargar(ruta_agregados)
+            analizador.resultados = analizador.agregados.a_resultados()
+        return analizador
+    
+    if not os.path.exists(args.archivo):
+        print(f" Error: El archivo '{args.archivo}' no se encuentra")
+        return None
+    if args.comando == 'report-text':
+        # Solo las métricas que usa el reporte (grafo perezoso)
+        completado = analizador.preparar_datos()
+    else:
+        completado = analizador.ejecutar_analisis_completo(generar_graficos=False)
+    return analizador if completado else None
+
+def comando_analyze(args, perfilador):
+    analizador = cargar_analizador(args, perfilador)
+    if analizador is None:
+        return False
+    if args.agregados:
+        analizador.agregados.guardar(args.agregados)
+        print(f"• Agregados guardados en {args.agregados}")
+    print(analizador.generar_reporte_texto())
+    return True
+
+def comando_render(args, perfilador):
+    analizador = cargar_analizador(args, perfilador)
+    if analizador is None:
+        return False
+    if not analizador.generar_graficos(args.salida, formato=args.formato):
+        return False
+    print(f"• Gráficos en {args.salida}/")
+    return True
+
+def comando_send(args, perfilador):
+    analizador = cargar_analizador(args, perfilador)
+    if analizador is None:
+        return False
+    if publicacion_configurada():
+        # Se dibujan con los resultados de ahora antes de publicarlos, para que los
+        # enlaces no apunten a gráficos de otros datos (la caché omite los que no cambiaron)
+        if not analizador.generar_graficos(args.graficos, formato=args.formato):
+            print(" Error: no se pudieron generar los gráficos; el reporte no se envía")
+            return False
+    enlaces = publicar_graficos(args.graficos)
+    reporte = generar_reporte_completo(analizador, enlaces)
+    
+    # Todos los números con el motor masivo: sesión HTTP compartida, pool de
+    # hilos, límite de tasa y reintentos (ver envio_masivo.py)
+    from envio_masivo import MotorEnvio
+    with MotorEnvio(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_WHATSAPP_NUMBER,
+                    max_hilos=args.hilos, mensajes_por_segundo=args.mensajes_por_segundo) as motor:
+        resumen = motor.enviar_lote(args.numeros, [(reporte, None)])
+    for destino, resultados in resumen['detalle'].items():
+        for resultado in resultados:
+            if resultado['error'] is None:
+                print(f" REPORTE ENVIADO a {destino}. SID: {resultado['sid']}")
+            else:
+                print(f" Error al enviar a {destino}: {resultado['error']}")
+    print(f"• {resumen['enviados']} enviados, {resumen['fallidos']} con error "
+          f"({resumen['mensajes_por_segundo']:.1f} msg/s)")
+    return resumen['fallidos'] == 0
+
+def comando_export(args, perfilador):
+    analizador = cargar_analizador(args, perfilador)
+    if analizador is None:
+        return False
+    if args.filas and analizador.df is None:
+        print(" Aviso: con --agregados no hay filas; solo se exportan los agregados")
+    if not analizador.exportar_resultados(args.salida, args.formatos, incluir_filas=args.filas):
+        return False
+    print(f"• Resultados exportados en {args.salida}/ ({', '.join(args.formatos)})")
+    return True
+
+def comando_report_text(args, perfilador):
+    analizador = cargar_analizador(args, perfilador)
+    if analizador is None:
+        return False
+    print(analizador.generar_reporte_texto())
+    return True
+
+SUBCOMANDOS = {
+    'analyze': comando_analyze,
+    'render': comando_render,
+    'send': comando_send,
+    'export': comando_export,
+    'report-text': comando_report_text,
+}
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="RPA para análisis de ventas")
+    parser.add_argument('--perfil', nargs='?', const='perfil_ventas', metavar='PREFIJO',
+                        help="Medir cada etapa y guardar PREFIJO.json y PREFIJO.folded")
+    parser.add_argument('--archivo', default=ARCHIVO_EXCEL, help="Libro de ventas")
+    
+    # Opciones comunes también después del subcomando (SUPPRESS: no pisan las anteriores)
+    comunes = argparse.ArgumentParser(add_help=False)
+    comunes.add_argument('--perfil', nargs='?', const='perfil_ventas', metavar='PREFIJO',
+                         default=argparse.SUPPRESS,
+                         help="Medir cada etapa y guardar PREFIJO.json y PREFIJO.folded")
+    comunes.add_argument('--archivo', default=argparse.SUPPRESS, help="Libro de ventas")
+    
+    subparsers = parser.add_subparsers(dest='comando')
+    analyze = subparsers.add_parser('analyze', parents=[comunes],
+                                    help="Analizar el libro sin gráficos ni envío")
+    analyze.add_argument('--agregados', help="Guardar los agregados en este JSON")
+    
+    render = subparsers.add_parser('render', parents=[comunes], help="Generar los gráficos")
+    render.add_argument('--agregados', help="Dibujar desde estos agregados sin leer el Excel")
+    render.add_argument('--salida', default='graficos', help="Carpeta de gráficos")
+    render.add_argument('--formato', choices=['png', 'movil', 'svg'], default='png',
+                        help="png a 300 dpi, movil (PNG liviano para WhatsApp) o svg + HTML")
+    
+    send = subparsers.add_parser('send', parents=[comunes],
+                                 help="Enviar el reporte por WhatsApp (sin preguntas)")
+    send.add_argument('numeros', nargs='+', help="Números de destino (ej: +584127985110)")
+    send.add_argument('--agregados', help="Usar estos agregados sin leer el Excel")
+    send.add_argument('--graficos', default='graficos', help="Carpeta donde se dibujan y publican los gráficos")
+    send.add_argument('--formato', choices=['png', 'movil'], default='movil',
+                      help="Formato de los gráficos publicados (por defecto, PNG liviano)")
+    send.add_argument('--hilos', type=int, default=8, help="Envíos simultáneos como máximo")
+    send.add_argument('--mensajes-por-segundo', type=float, default=10,
+                      help="Límite global de mensajes por segundo")
+    
+    export = subparsers.add_parser('export', parents=[comunes],
+                                   help="Exportar resultados a CSV, JSONL, Parquet o SQLite")
+    export.add_argument('--formatos', nargs='+', default=['csv'],
+                        choices=['csv', 'jsonl', 'parquet', 'sqlite'])
+    export.add_argument('--salida', default='exportacion', help="Carpeta de exportación")
+    export.add_argument('--filas', action='store_true',
+                        help="Incluir el detalle de ventas enriquecido (tabla 'ventas')")
+    export.add_argument('--agregados', help="Exportar estos agregados sin leer el Excel")
+    
+    report_text = subparsers.add_parser('report-text', parents=[comunes],
+                                        help="Imprimir el reporte en texto")
+    report_text.add_argument('--agregados', help="Usar estos agregados sin leer el Excel")
+    return parser
+
+def ejecutar_subcomando(args):
+    """Ejecuta un subcomando sin preguntas (pensado para cron)"""
+    perfilador = crear_perfilador(args)
+    try:
+        if perfilador:
+            with perfilador.etapa(args.comando):
+                completado = SUBCOMANDOS[args.comando](args, perfilador)
+            exportar_perfil(perfilador, args.perfil)
+            return completado
+        return SUBCOMANDOS[args.comando](args, perfilador)
+    except Exception as e:
+        print(f" Error durante la ejecución: {str(e)}")
+        return False
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    if args.comando:
+        return ejecutar_subcomando(args)
+    
     print(" RPA PARA ANÁLISIS DE VENTAS")
     print("=" * 50)
     print("Universidad Rafael Urdaneta")
@@ -92,8 +346,10 @@ def main():
     print("=" * 50)
     
     try:
+        from ventas_rpa import AnalizadorVentas
+        
         # 1. Inicializar analizador
-        archivo_excel = "Ventas Fundamentos.xlsx"
+        archivo_excel = args.archivo
         
         if not os.path.exists(archivo_excel):
             print(f" Error: El archivo '{archivo_excel}' no se encuentra")
@@ -101,11 +357,17 @@ def main():
             return False
         
         print("📊 Inicializando analizador de ventas...")
-        analizador = AnalizadorVentas(archivo_excel)
+        perfilador = crear_perfilador(args)
+        analizador = AnalizadorVentas(archivo_excel, perfilador=perfilador)
         
         # 2. Ejecutar análisis completo
         print("🔍 Ejecutando análisis completo...")
-        if not analizador.ejecutar_analisis_completo():
+        with analizador.perfilador.etapa('analisis_completo') as etapa:
+            completado = analizador.ejecutar_analisis_completo()
+            etapa['filas'] = len(analizador.df) if analizador.df is not None else None
+        if perfilador:
+            exportar_perfil(perfilador, args.perfil)
+        if not completado:
             print(" El análisis no pudo completarse")
             return False
         
@@ -123,8 +385,9 @@ def main():
         if enviar_whatsapp in ['s', 'si', 'sí', 'yes']:
             numero_destino = input("Ingresa el número de destino (ej: +584127985110): ").strip()
             
-            # Generar reporte completo
-            reporte_completo = generar_reporte_completo(analizador)
+            # Publicar los gráficos recién generados y generar reporte completo
+            enlaces = publicar_graficos()
+            reporte_completo = generar_reporte_completo(analizador, enlaces)
             
             # Enviar directamente (SIN .env, SIN configuración complicada)
             print("📤 Enviando reporte por WhatsApp...")
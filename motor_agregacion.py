@@ -0,0 +1,278 @@
+"""
+Motor de agregación en una sola pasada.
+Calcula todas las métricas de AnalizadorVentas.resultados sobre claves
+codificadas como enteros usando reducciones tipo bincount, en lugar de un
+groupby/value_counts/nunique por métrica.
+Los montos se acumulan en céntimos enteros: los totales son exactos y los
+mismos sin importar cómo se partan los datos (bloques, lotes, incremental).
+"""
+
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from conteo_distintos import (ContadorDistintos, PRECISION_HLL, UMBRAL_EXACTO, cardinalidades,
+                              contar_por_grupo, hashear)
+from cubos_ventas import CuboVentas, carpeta_particiones, construir_cubo
+from tipos_ventas import ESCALA_MONEDA, centimos
+
+logger = logging.getLogger(__name__)
+
+# bincount acumula en float64: es exacto con enteros mientras la suma no pase de 2**53
+LIMITE_SUMA_FLOAT = 2 ** 53
+
+
+class AgregadosVentas:
+    """
+    Agregados de ventas combinables entre sí (por archivo, bloque o día).
+    Los montos se guardan en céntimos enteros (a_resultados los devuelve en
+    soles) y los clientes únicos como contadores
+    combinables (exactos bajo el umbral, HyperLogLog encima). Si los datos
+    traen FECHA, incluye además el cubo diario de cubos_ventas.py, que al
+    guardar va en particiones por día junto al JSON.
+    """
+
+    # Montos en céntimos por grupo: atributo -> columna del df
+    MONTOS_POR = {'ventas_por_sede': 'SEDE', 'canales_ventas': 'CANAL_VENTA',
+                  'segmento_ventas': 'SEGMENTO_CLIENTE'}
+    # Totales en céntimos: atributo -> columna del df
+    TOTALES = {'venta_total_con_igv': 'PRECIO_VENTA', 'venta_total_sin_igv': 'PRECIO_SIN_IGV',
+               'igv_total': 'IGV'}
+    # Contadores de clientes únicos por grupo: atributo -> columna del df
+    CLIENTES_POR = {'clientes_por_sede': 'SEDE', 'clientes_por_canal': 'CANAL_VENTA'}
+
+    def __init__(self, umbral_exacto=UMBRAL_EXACTO, precision=PRECISION_HLL):
+        self.ventas_por_sede = {}
+        self.canales_ventas = {}
+        self.segmento_ventas = {}
+        self.conteo_modelos = {}
+        self.total_ventas = 0
+        self.venta_total_con_igv = 0
+        self.venta_total_sin_igv = 0
+        self.igv_total = 0
+        self.clientes = ContadorDistintos(umbral_exacto, precision)
+        self.clientes_por_sede = {}
+        self.clientes_por_canal = {}
+        self.cubo = CuboVentas()
+
+    def combinar(self, otro):
+        """Suma los agregados de otro objeto sobre este y lo devuelve"""
+        for propio, ajeno in [(self.ventas_por_sede, otro.ventas_por_sede),
+                              (self.canales_ventas, otro.canales_ventas),
+                              (self.segmento_ventas, otro.segmento_ventas),
+                              (self.conteo_modelos, otro.conteo_modelos)]:
+            for clave, valor in ajeno.items():
+                propio[clave] = propio.get(clave, 0) + valor
+
+        self.total_ventas += otro.total_ventas
+        self.venta_total_con_igv += otro.venta_total_con_igv
+        self.venta_total_sin_igv += otro.venta_total_sin_igv
+        self.igv_total += otro.igv_total
+        self.clientes.combinar(otro.clientes)
+        for atributo in self.CLIENTES_POR:
+            propios = getattr(self, atributo)
+            for clave, contador in getattr(otro, atributo).items():
+                propios.setdefault(clave, ContadorDistintos(self.clientes.umbral,
+                                                            self.clientes.precision)).combinar(contador)
+        self.cubo.combinar(otro.cubo)
+        return self
+
+    def a_dict(self):
+        """
+        Representación serializable en JSON. Del cubo solo incluye la lista de
+        particiones: las celdas las escribe cubo.guardar_particiones (guardar lo
+        hace antes de escribir el JSON)
+        """
+        return {
+            'ventas_por_sede': self.ventas_por_sede,
+            'canales_ventas': self.canales_ventas,
+            'segmento_ventas': self.segmento_ventas,
+            'conteo_modelos': self.conteo_modelos,
+            'total_ventas': self.total_ventas,
+            'venta_total_con_igv': self.venta_total_con_igv,
+            'venta_total_sin_igv': self.venta_total_sin_igv,
+            'igv_total': self.igv_total,
+            'unidad_montos': 'centimos',
+            'clientes': self.clientes.a_dict(),
+            'clientes_por_sede': {clave: contador.a_dict()
+                                  for clave, contador in self.clientes_por_sede.items()},
+            'clientes_por_canal': {clave: contador.a_dict()
+                                   for clave, contador in self.clientes_por_canal.items()},
+            'cubo': self.cubo.a_manifiesto(),
+        }
+
+    @classmethod
+    def desde_dict(cls, datos, carpeta_cubo=None):
+        """
+        Reconstruye los agregados a partir de a_dict()
+
+        Args:
+            carpeta_cubo (str): Carpeta de las particiones del cubo
+        """
+        agregados = cls()
+        datos = dict(datos)
+        if datos.pop('unidad_montos', None) != 'centimos':
+            # Formato anterior: montos en soles (float)
+            for atributo in cls.MONTOS_POR:
+                datos[atributo] = {clave: _a_centimos(valor) for clave, valor in datos.get(atributo, {}).items()}
+            for atributo in cls.TOTALES:
+                datos[atributo] = _a_centimos(datos.get(atributo, 0))
+        for atributo, valor in datos.items():
+            setattr(agregados, atributo, valor)
+        clientes = datos.get('clientes', {})
+        if isinstance(clientes, list):
+            # Formato anterior: lista de clientes en claro
+            agregados.clientes = ContadorDistintos().agregar(pd.Series(clientes, dtype=object))
+        else:
+            agregados.clientes = ContadorDistintos.desde_dict(clientes)
+        for atributo in cls.CLIENTES_POR:
+            setattr(agregados, atributo, {clave: ContadorDistintos.desde_dict(contador)
+                                          for clave, contador in datos.get(atributo, {}).items()})
+        cubo = datos.get('cubo')
+        if cubo is None:
+            agregados.cubo = CuboVentas()
+        elif 'particiones' in cubo:
+            if carpeta_cubo is None:
+                raise ValueError("Los agregados referencian particiones del cubo: falta carpeta_cubo")
+            agregados.cubo = CuboVentas.cargar_particiones(carpeta_cubo, cubo)
+        else:
+            # Formato anterior: celdas embebidas (pasan a particiones al volver a guardar)
+            agregados.cubo = CuboVentas.desde_dict(cubo)
+        return agregados
+
+    def guardar(self, ruta):
+        """
+        Guarda los agregados en JSON (escritura atómica) y las celdas nuevas
+        del cubo en <ruta sin extensión>_cubo/ (ver cubos_ventas.carpeta_particiones)
+        """
+        carpeta = carpeta_particiones(ruta)
+        self.cubo.guardar_particiones(carpeta)
+        temporal = ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self.a_dict(), f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+        self.cubo.limpiar_particiones(carpeta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Lee agregados guardados con guardar()"""
+        with open(ruta, encoding='utf-8') as f:
+            return cls.desde_dict(json.load(f), carpeta_particiones(ruta))
+
+    def a_resultados(self, top_n=5):
+        """
+        Devuelve el diccionario con la misma forma que AnalizadorVentas.resultados
+        """
+        ventas_sede = _serie_ordenada(self.ventas_por_sede, 'SEDE', 'PRECIO_SIN_IGV')
+        canales = _serie_ordenada(self.canales_ventas, 'CANAL_VENTA', 'PRECIO_SIN_IGV')
+        segmentos = _serie_ordenada(self.segmento_ventas, 'SEGMENTO_CLIENTE', 'PRECIO_SIN_IGV')
+        modelos = _serie_ordenada(self.conteo_modelos, 'MODELO_VEHICULO', 'count')
+
+        return {
+            'ventas_por_sede': ventas_sede.sort_values(ascending=False),
+            'top_modelos': modelos.sort_values(ascending=False).head(top_n),
+            'canales_ventas': canales.sort_values(ascending=False),
+            'segmento_ventas': segmentos,
+            'clientes_por_sede': cardinalidades(self.clientes_por_sede, 'SEDE'),
+            'clientes_por_canal': cardinalidades(self.clientes_por_canal, 'CANAL_VENTA'),
+            'cubo_temporal': self.cubo,
+            'metricas': {
+                'clientes_unicos': self.clientes.cardinalidad(),
+                'total_ventas': self.total_ventas,
+                'venta_total_con_igv': self.venta_total_con_igv / ESCALA_MONEDA,
+                'venta_total_sin_igv': self.venta_total_sin_igv / ESCALA_MONEDA,
+                'igv_total': self.igv_total / ESCALA_MONEDA,
+                'sedes_unicas': len(self.ventas_por_sede),
+                'modelos_unicos': len(self.conteo_modelos),
+            },
+        }
+
+
+def _serie_ordenada(valores, indice, nombre):
+    """Serie ordenada por etiqueta, igual que la salida de un groupby (montos en soles)"""
+    if nombre == 'count':
+        serie = pd.Series(valores, name=nombre, dtype='int64')
+    else:
+        serie = pd.Series(valores, name=nombre, dtype='int64') / ESCALA_MONEDA
+    serie = serie.sort_index()
+    serie.index.name = indice
+    return serie
+
+
+def _codificar(serie):
+    """Devuelve (códigos enteros, etiquetas); los nulos quedan con código -1"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), serie.cat.categories
+    codigos, etiquetas = pd.factorize(serie, sort=True)
+    return codigos, etiquetas
+
+
+def _a_centimos(valor):
+    return int(round(float(valor) * ESCALA_MONEDA))
+
+
+def _sumar_enteros(codigos, pesos, n):
+    """Suma exacta de pesos int64 por código"""
+    if not len(pesos) or int(np.abs(pesos).max()) * len(pesos) < LIMITE_SUMA_FLOAT:
+        return np.rint(np.bincount(codigos, weights=pesos, minlength=n)).astype(np.int64)
+    sumas = np.zeros(n, dtype=np.int64)
+    np.add.at(sumas, codigos, pesos)
+    return sumas
+
+
+def _reducir(codigos, etiquetas, pesos=None):
+    """bincount por clave (pesos en céntimos int64); solo conserva las claves observadas"""
+    n = len(etiquetas)
+    validos = codigos >= 0
+    if not validos.all():
+        codigos = codigos[validos]
+        pesos = pesos[validos] if pesos is not None else None
+    conteos = np.bincount(codigos, minlength=n)
+    sumas = _sumar_enteros(codigos, pesos, n) if pesos is not None else conteos
+    observados = np.flatnonzero(conteos)
+    return {etiquetas[i]: int(sumas[i]) for i in observados}
+
+
+def agregar_dataframe(df, umbral_exacto=UMBRAL_EXACTO, precision=PRECISION_HLL):
+    """
+    Calcula los agregados del DataFrame estandarizado en una sola pasada por
+    columna. Requiere PRECIO_SIN_IGV ya calculado.
+
+    Args:
+        umbral_exacto (int): Clientes distintos hasta los que el conteo es exacto
+        precision (int): Precisión de los bocetos HyperLogLog por encima del umbral
+
+    Returns:
+        AgregadosVentas
+    """
+    agregados = AgregadosVentas(umbral_exacto, precision)
+    agregados.total_ventas = len(df)
+    if agregados.total_ventas == 0:
+        return agregados
+
+    sin_igv = centimos(df['PRECIO_SIN_IGV'])
+
+    for atributo, columna in AgregadosVentas.MONTOS_POR.items():
+        codigos, etiquetas = _codificar(df[columna])
+        setattr(agregados, atributo, _reducir(codigos, etiquetas, sin_igv))
+
+    codigos, etiquetas = _codificar(df['MODELO_VEHICULO'])
+    agregados.conteo_modelos = _reducir(codigos, etiquetas)
+
+    # Los hashes de los clientes se calculan una vez y se reparten por sede y canal
+    hashes, validos = hashear(df['CLIENTE'])
+    agregados.clientes.agregar_hashes(hashes)
+    for atributo, columna in AgregadosVentas.CLIENTES_POR.items():
+        setattr(agregados, atributo, contar_por_grupo(hashes, df[columna][validos],
+                                                      umbral_exacto, precision))
+
+    for atributo, columna in AgregadosVentas.TOTALES.items():
+        setattr(agregados, atributo, int(centimos(df[columna]).sum()))
+
+    if 'FECHA' in df.columns:
+        agregados.cubo = construir_cubo(df)
+
+    return agregados
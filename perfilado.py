@@ -0,0 +1,230 @@
+"""
+Perfilado por etapas del análisis de ventas.
+Cada etapa (lectura de hojas, concat, merge, estandarización, agregados,
+gráficos...) registra tiempo de pared, tiempo de CPU, pico de memoria residente
+(RSS) alcanzado durante la etapa y filas por segundo. Las etapas se anidan y las que se repiten con la misma
+ruta (por ejemplo, una por bloque) se acumulan.
+El resultado se exporta como JSON y como pilas colapsadas
+("a;b;c microsegundos"), el formato que leen flamegraph.pl y speedscope.
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+def rss_pico():
+    """
+    Pico de memoria residente del proceso en bytes desde que arrancó o desde el
+    último reiniciar_rss_pico() (None si no se puede medir)
+    """
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa KB; macOS, bytes
+        return pico if sys.platform == 'darwin' else pico * 1024
+    if psutil is not None:
+        memoria = psutil.Process().memory_info()
+        return getattr(memoria, 'peak_wset', memoria.rss)
+    return None
+
+
+def rss_actual():
+    """Memoria residente actual del proceso en bytes (None si no se puede medir)"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def reiniciar_rss_pico():
+    """
+    Reinicia el pico de memoria residente del proceso para que rss_pico() mida
+    a partir de aquí. Solo en Linux (escribiendo 5 en /proc/self/clear_refs).
+
+    Returns:
+        bool: True si se pudo reiniciar
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _maximo(*valores):
+    valores = [valor for valor in valores if valor is not None]
+    return max(valores) if valores else None
+
+
+class Perfilador:
+    def __init__(self, activo=True):
+        """
+        Args:
+            activo (bool): Con False las etapas no miden nada (coste prácticamente nulo)
+        """
+        self.activo = activo
+        self.etapas = {}
+        self._pila = []
+        self._inicio = time.perf_counter()
+        # Cada etapa reinicia el pico del sistema: el del proceso se lleva aquí
+        self._rss_proceso = rss_pico() if activo else None
+        self._reiniciar_pico = None
+
+    def _registro(self, ruta):
+        """Entrada de la etapa; se crea al abrirla para conservar el orden padre -> hijos"""
+        return self.etapas.setdefault(ruta, {
+            'etapa': ruta[-1], 'ruta': ';'.join(ruta), 'llamadas': 0, 'pared_s': 0.0,
+            'cpu_s': 0.0, 'propio_s': 0.0, 'filas': None, 'rss_pico_bytes': None,
+        })
+
+    def _acumular(self, ruta, pared_s, cpu_s, filas=None, rss=None, propio_s=None):
+        registro = self._registro(ruta)
+        registro['llamadas'] += 1
+        registro['pared_s'] += pared_s
+        registro['cpu_s'] += cpu_s
+        registro['propio_s'] += pared_s if propio_s is None else propio_s
+        if filas is not None:
+            registro['filas'] = (registro['filas'] or 0) + filas
+        if rss is not None:
+            registro['rss_pico_bytes'] = max(registro['rss_pico_bytes'] or 0, rss)
+
+    def _abrir_pico(self):
+        """
+        Empieza a medir el pico de una etapa. Antes guarda en la etapa padre y
+        en el proceso el pico alcanzado hasta ahora, porque se va a reiniciar.
+        """
+        pico = rss_pico()
+        self._rss_proceso = _maximo(self._rss_proceso, pico)
+        if self._pila:
+            self._pila[-1][2][0] = _maximo(self._pila[-1][2][0], pico)
+        if self._reiniciar_pico is None:
+            self._reiniciar_pico = reiniciar_rss_pico()
+        elif self._reiniciar_pico:
+            reiniciar_rss_pico()
+        return rss_actual()
+
+    def _cerrar_pico(self, pico):
+        """
+        Pico de la etapa que se cierra: el del sistema desde que se abrió (o,
+        si no se puede reiniciar, el máximo del RSS al abrir y al cerrar) y el
+        de sus hijas. Se propaga a la etapa padre.
+        """
+        fin = rss_pico() if self._reiniciar_pico else rss_actual()
+        pico = _maximo(pico, fin)
+        self._rss_proceso = _maximo(self._rss_proceso, pico)
+        if self._pila:
+            self._pila[-1][2][0] = _maximo(self._pila[-1][2][0], pico)
+        return pico
+
+    @contextmanager
+    def etapa(self, nombre, filas=None):
+        """
+        Mide el bloque `with`. Las filas procesadas pueden indicarse al abrir la
+        etapa o asignarse después en el diccionario devuelto: etapa['filas'] = n.
+        rss_pico_bytes es el pico de memoria residente del proceso mientras
+        duró la etapa (en Linux, exacto; en otros sistemas, el mayor RSS
+        observado al abrirla y al cerrarla, ella y sus hijas).
+        """
+        medicion = {'filas': filas}
+        if not self.activo:
+            yield medicion
+            return
+
+        ruta = (self._pila[-1][0] if self._pila else ()) + (nombre,)
+        hijos = [0.0]
+        self._registro(ruta)
+        pico = [self._abrir_pico()]
+        self._pila.append((ruta, hijos, pico))
+        inicio, inicio_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield medicion
+        finally:
+            pared = time.perf_counter() - inicio
+            cpu = time.process_time() - inicio_cpu
+            self._pila.pop()
+            if self._pila:
+                self._pila[-1][1][0] += pared
+            self._acumular(ruta, pared, cpu, medicion['filas'], self._cerrar_pico(pico[0]),
+                           pared - hijos[0])
+
+    def registrar(self, nombre, pared_s, cpu_s, filas=None):
+        """
+        Añade una etapa medida fuera de este proceso (por ejemplo, un gráfico
+        renderizado en el pool) como hija de la etapa actual
+        """
+        if not self.activo:
+            return
+        if self._pila:
+            self._pila[-1][1][0] += pared_s
+        ruta = (self._pila[-1][0] if self._pila else ()) + (nombre,)
+        self._acumular(ruta, pared_s, cpu_s, filas)
+
+    def rss_pico_proceso(self):
+        """Pico de memoria residente del proceso en bytes, sumando los reinicios de cada etapa"""
+        return _maximo(self._rss_proceso, rss_pico())
+
+    def a_dict(self):
+        """
+        Etapas en orden de aparición con sus métricas y filas/s. rss_pico_bytes
+        es, en cada etapa, su propio pico y, arriba, el del proceso entero.
+        """
+        etapas = []
+        for registro in self.etapas.values():
+            registro = dict(registro)
+            registro['filas_por_s'] = (registro['filas'] / registro['pared_s']
+                                       if registro['filas'] and registro['pared_s'] else None)
+            etapas.append(registro)
+        return {
+            'generado': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'duracion_total_s': time.perf_counter() - self._inicio,
+            'rss_pico_bytes': self.rss_pico_proceso(),
+            'etapas': etapas,
+        }
+
+    def exportar_json(self, ruta):
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(self.a_dict(), f, ensure_ascii=False, indent=2)
+        logger.info(f"⏱️ Perfil JSON guardado en {ruta}")
+
+    def exportar_flamegraph(self, ruta):
+        """Pilas colapsadas con el tiempo propio de cada etapa en microsegundos"""
+        with open(ruta, 'w', encoding='utf-8') as f:
+            for registro in self.etapas.values():
+                microsegundos = int(round(max(registro['propio_s'], 0.0) * 1e6))
+                if microsegundos:
+                    nombre = registro['ruta'].replace(' ', '_')
+                    f.write(f"{nombre} {microsegundos}\n")
+        logger.info(f"🔥 Perfil para flamegraph guardado en {ruta}")
+
+    def resumen(self):
+        """Tabla de texto con las etapas, indentadas según su anidamiento"""
+        lineas = [f"{'Etapa':<36} {'Pared':>9} {'CPU':>9} {'RSS pico':>10} {'Filas/s':>12}"]
+        for registro in self.a_dict()['etapas']:
+            nombre = '  ' * registro['ruta'].count(';') + registro['etapa']
+            if registro['llamadas'] > 1:
+                nombre += f" (x{registro['llamadas']})"
+            rss = (f"{registro['rss_pico_bytes'] / 1024 ** 2:,.0f} MB"
+                   if registro['rss_pico_bytes'] else '-')
+            filas_s = f"{registro['filas_por_s']:,.0f}" if registro['filas_por_s'] else '-'
+            lineas.append(f"{nombre[:36]:<36} {registro['pared_s']:>8.3f}s {registro['cpu_s']:>8.3f}s "
+                          f"{rss:>10} {filas_s:>12}")
+        return '\n'.join(lineas)
@@ -0,0 +1,334 @@
+"""
+Reportes personalizados por destinatario (por ejemplo, un gerente por sede).
+Se calcula una sola vez una tabla sede × canal × segmento × modelo con las
+ventas y los montos (del cubo por fecha si existe; si no, con un único
+groupby sobre el DataFrame). Cada reporte se obtiene filtrando esa tabla
+pequeña, y los destinatarios con el mismo filtro comparten resultados y
+gráficos: enviar a 50 gerentes cuesta casi lo mismo que enviar a uno.
+
+Destinatarios (JSON):
+    [{"nombre": "Gerente Ate", "numero": "+51999999999", "filtros": {"SEDE": "Ate"}}]
+
+Uso:
+    python personalizacion.py destinatarios.json --salida reportes_personalizados
+    python personalizacion.py destinatarios.json --enviar
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+from conteo_distintos import ContadorDistintos
+from cubos_ventas import DIMENSIONES, MEDIDAS
+from grafo_metricas import TOP_MODELOS
+from tipos_ventas import ESCALA_MONEDA, centimos
+
+logger = logging.getLogger(__name__)
+
+# Dimensión -> atributo de AgregadosVentas con sus contadores de clientes
+CONTADORES_CLIENTES = {'SEDE': 'clientes_por_sede', 'CANAL_VENTA': 'clientes_por_canal'}
+
+
+class Destinatario:
+    def __init__(self, nombre, numero, filtros=None):
+        """
+        Args:
+            nombre (str): Nombre que encabeza el reporte
+            numero (str): Número de WhatsApp
+            filtros (dict): Columna -> valor o lista de valores, p. ej. {'SEDE': 'Ate'}
+        """
+        self.nombre = nombre
+        self.numero = numero
+        self.filtros = {columna: (list(valor) if isinstance(valor, (list, tuple, set)) else [valor])
+                        for columna, valor in (filtros or {}).items()}
+        desconocidas = set(self.filtros) - set(DIMENSIONES)
+        if desconocidas:
+            raise ValueError(f"Filtros no soportados para {nombre}: {sorted(desconocidas)}")
+
+    @property
+    def clave(self):
+        """Identifica el filtro: destinatarios con la misma clave reciben el mismo contenido"""
+        return tuple(sorted((columna, tuple(sorted(map(str, valores))))
+                            for columna, valores in self.filtros.items()))
+
+    def descripcion(self):
+        if not self.filtros:
+            return "Todas las ventas"
+        return '; '.join(f"{columna} = {', '.join(map(str, valores))}"
+                         for columna, valores in self.filtros.items())
+
+    def __repr__(self):
+        return f"Destinatario({self.nombre!r}, {self.descripcion()})"
+
+
+def cargar_destinatarios(ruta):
+    """Lee la lista de destinatarios de un JSON (ver docstring del módulo)"""
+    with open(ruta, 'r', encoding='utf-8') as f:
+        datos = json.load(f)
+    return [Destinatario(d['nombre'], d.get('numero'), d.get('filtros')) for d in datos]
+
+
+def carpeta_de(clave, carpeta_base):
+    """Subcarpeta de gráficos de un filtro, p. ej. <base>/SEDE-Ate"""
+    partes = ['_'.join([columna] + list(valores)) for columna, valores in clave] or ['todas']
+    nombre = re.sub(r'[^\w.-]+', '-', '__'.join(partes)).strip('-')
+    return os.path.join(carpeta_base, nombre)
+
+
+def tabla_dimensiones(analizador):
+    """
+    Agregado multidimensional compartido por todos los destinatarios:
+    una fila por combinación observada de DIMENSIONES con sus MEDIDAS (montos
+    en céntimos, como en el cubo)
+    """
+    agregados = analizador.agregados
+    df = analizador.df
+    if agregados is not None and len(agregados.cubo):
+        # Ya calculado al agregar: basta con sumar los días. Las filas sin fecha
+        # no están en el cubo; si hay DataFrame, se usa para no perderlas.
+        if agregados.cubo.filas_sin_fecha and df is not None:
+            return _tabla_desde_df(df)
+        if agregados.cubo.filas_sin_fecha:
+            logger.warning(f"⚠️ {agregados.cubo.filas_sin_fecha} ventas sin fecha no entran "
+                           f"en los reportes personalizados")
+        datos = agregados.cubo.datos
+        return (datos.groupby(DIMENSIONES, observed=True, dropna=False)[list(MEDIDAS)]
+                .sum().reset_index())
+
+    if df is None:
+        raise ValueError("No hay datos ni cubo de ventas para personalizar reportes")
+    return _tabla_desde_df(df)
+
+
+def _tabla_desde_df(df):
+    valores = pd.DataFrame({
+        'ventas': 1,
+        'venta_sin_igv': centimos(df['PRECIO_SIN_IGV']),
+        'venta_con_igv': centimos(df['PRECIO_VENTA']),
+    }, index=df.index)
+    return (valores.groupby([df[dimension] for dimension in DIMENSIONES], observed=True, dropna=False)
+            .sum().reset_index())
+
+
+def _por(tabla, dimension, medida, nombre):
+    serie = tabla.groupby(dimension, observed=True)[medida].sum()
+    serie = serie[serie > 0].rename(nombre)
+    if medida != 'ventas':
+        serie = serie / ESCALA_MONEDA
+    serie.index.name = dimension
+    return serie
+
+
+class ReportesPersonalizados:
+    def __init__(self, analizador, top_n=TOP_MODELOS):
+        """
+        Args:
+            analizador (AnalizadorVentas): Con los datos o los agregados ya calculados
+        """
+        self.tabla = tabla_dimensiones(analizador)
+        self.agregados = analizador.agregados
+        self.top_n = top_n
+        self._resultados = {}
+
+    def _clientes_unicos(self, filtros):
+        """
+        Clientes únicos del filtro si se pueden obtener de los contadores
+        combinables (filtro por una sola dimensión con contadores); None si no
+        """
+        if self.agregados is None:
+            return None
+        if not filtros:
+            return self.agregados.clientes.cardinalidad()
+        if len(filtros) != 1:
+            return None
+        columna, valores = next(iter(filtros.items()))
+        if columna not in CONTADORES_CLIENTES:
+            return None
+        contadores = getattr(self.agregados, CONTADORES_CLIENTES[columna])
+        total = ContadorDistintos(self.agregados.clientes.umbral, self.agregados.clientes.precision)
+        for valor in valores:
+            if valor in contadores:
+                total.combinar(contadores[valor])
+        return total.cardinalidad()
+
+    def resultados(self, destinatario):
+        """
+        Resultados del filtro del destinatario, con la misma forma que
+        AnalizadorVentas.resultados. El IGV es la diferencia entre los montos con
+        y sin IGV de las ventas filtradas. Si los clientes únicos no pueden
+        obtenerse para el filtro, 'metricas' los deja en None.
+        """
+        clave = destinatario.clave
+        if clave in self._resultados:
+            return self._resultados[clave]
+
+        tabla = self.tabla
+        for columna, valores in destinatario.filtros.items():
+            tabla = tabla[tabla[columna].isin(valores)]
+
+        modelos = _por(tabla, 'MODELO_VEHICULO', 'ventas', 'count')
+        con_igv = int(tabla['venta_con_igv'].sum())
+        sin_igv = int(tabla['venta_sin_igv'].sum())
+        resultados = {
+            'ventas_por_sede': _por(tabla, 'SEDE', 'venta_sin_igv', 'PRECIO_SIN_IGV')
+            .sort_values(ascending=False),
+            'top_modelos': modelos.sort_values(ascending=False, kind='stable').head(self.top_n),
+            'canales_ventas': _por(tabla, 'CANAL_VENTA', 'venta_sin_igv', 'PRECIO_SIN_IGV')
+            .sort_values(ascending=False),
+            'segmento_ventas': _por(tabla, 'SEGMENTO_CLIENTE', 'venta_sin_igv', 'PRECIO_SIN_IGV'),
+            'metricas': {
+                'clientes_unicos': self._clientes_unicos(destinatario.filtros),
+                'total_ventas': int(tabla['ventas'].sum()),
+                'venta_total_con_igv': con_igv / ESCALA_MONEDA,
+                'venta_total_sin_igv': sin_igv / ESCALA_MONEDA,
+                'igv_total': (con_igv - sin_igv) / ESCALA_MONEDA,
+                'sedes_unicas': int((tabla.groupby('SEDE', observed=True)['ventas'].sum() > 0).sum()),
+                'modelos_unicos': len(modelos),
+            },
+        }
+        self._resultados[clave] = resultados
+        return resultados
+
+    def reporte(self, destinatario, enlaces=None):
+        """Reporte de texto para WhatsApp del destinatario"""
+        resultados = self.resultados(destinatario)
+        metricas = resultados['metricas']
+        clientes = (f"{metricas['clientes_unicos']:,}" if metricas['clientes_unicos'] is not None
+                    else 'N/D')
+        lineas = [
+            f"📊 REPORTE DE VENTAS - {destinatario.nombre} 📊",
+            f"🔎 {destinatario.descripcion()}",
+            "",
+            "📈 MÉTRICAS PRINCIPALES:",
+            f"• Clientes Únicos: {clientes}",
+            f"• Total de Ventas: {metricas['total_ventas']:,}",
+            f"• Ventas Totales sin IGV: S/ {metricas['venta_total_sin_igv']:,.2f}",
+            f"• Ventas Totales con IGV: S/ {metricas['venta_total_con_igv']:,.2f}",
+        ]
+        if len(resultados['ventas_por_sede']) > 1:
+            lineas += ["", "🏢 VENTAS POR SEDE:"]
+            lineas += [f"• {sede}: S/ {venta:,.2f}" for sede, venta in resultados['ventas_por_sede'].items()]
+        lineas += ["", f"🚗 TOP {self.top_n} MODELOS MÁS VENDIDOS:"]
+        lineas += [f"• {modelo}: {cantidad} unidades" for modelo, cantidad in resultados['top_modelos'].items()]
+        lineas += ["", "📞 CANALES CON MÁS VENTAS:"]
+        lineas += [f"• {canal}: S/ {venta:,.2f}" for canal, venta in resultados['canales_ventas'].items()]
+        lineas += ["", "👥 VENTAS POR SEGMENTO:"]
+        lineas += [f"• {segmento}: S/ {venta:,.2f}"
+                   for segmento, venta in resultados['segmento_ventas'].items()]
+        if enlaces:
+            from publicacion_graficos import ETIQUETAS_GRAFICOS
+            lineas += ["", "🖼️ ENLACES A GRÁFICOS VISUALES:"]
+            lineas += [f"• {etiqueta}: {enlaces[nombre]}"
+                       for nombre, etiqueta in ETIQUETAS_GRAFICOS.items() if nombre in enlaces]
+        lineas += ["", f" Generado: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"]
+        return '\n'.join(lineas)
+
+    def generar_graficos(self, destinatarios, carpeta_base='graficos_personalizados', paralelo=False):
+        """
+        Dibuja los gráficos de cada filtro distinto (una vez por filtro, no por
+        destinatario). Sin clientes únicos conocidos no se dibuja el dashboard.
+
+        Returns:
+            dict: Clave del filtro -> carpeta con sus gráficos
+        """
+        from graficos_ventas import GRAFICOS, generar_graficos
+
+        carpetas = {}
+        for destinatario in destinatarios:
+            clave = destinatario.clave
+            if clave in carpetas:
+                continue
+            resultados = self.resultados(destinatario)
+            nombres = [nombre for nombre in GRAFICOS if nombre != 'dashboard_resumen'
+                       or resultados['metricas']['clientes_unicos'] is not None]
+            carpeta = carpeta_de(clave, carpeta_base)
+            estado = generar_graficos(resultados, carpeta, paralelo=paralelo, nombres=nombres)
+            errores = {nombre: error for nombre, error in estado.items() if error}
+            if errores:
+                logger.error(f"Gráficos con error para {destinatario.descripcion()}: {errores}")
+            carpetas[clave] = carpeta
+        logger.info(f"✅ Gráficos de {len(carpetas)} filtros para {len(destinatarios)} destinatarios")
+        return carpetas
+
+
+def enviar_personalizados(personalizados, destinatarios, sender, enlaces_por_clave=None, **opciones):
+    """
+    Envía a cada destinatario su reporte (y sus gráficos publicados) en un solo lote
+
+    Args:
+        sender (WhatsAppSender): Con credenciales de Twilio
+        enlaces_por_clave (dict): Clave del filtro -> {nombre del gráfico: URL}
+        **opciones: max_hilos, mensajes_por_segundo, url_base (ver MotorEnvio)
+
+    Returns:
+        dict: Resumen del lote (ver MotorEnvio.enviar_lote) o None si no hay credenciales
+    """
+    from envio_masivo import MotorEnvio
+
+    if not all([sender.account_sid, sender.auth_token, sender.twilio_whatsapp_number]):
+        logger.error("Credenciales de Twilio no disponibles")
+        return None
+
+    enlaces_por_clave = enlaces_por_clave or {}
+    por_numero = {}
+    for destinatario in destinatarios:
+        enlaces = enlaces_por_clave.get(destinatario.clave, {})
+        mensajes = [(personalizados.reporte(destinatario, enlaces), None)]
+        mensajes += [(descripcion, url) for url, descripcion in sender._urls_imagenes(enlaces=enlaces)]
+        por_numero[destinatario.numero] = mensajes
+
+    with MotorEnvio(sender.account_sid, sender.auth_token, sender.twilio_whatsapp_number,
+                    **opciones) as motor:
+        return motor.enviar_lote(list(por_numero), por_numero.get)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reportes de ventas personalizados por destinatario")
+    parser.add_argument('destinatarios', help="JSON con nombre, número y filtros de cada destinatario")
+    parser.add_argument('--archivo', default="Ventas Fundamentos.xlsx", help="Libro de ventas")
+    parser.add_argument('--agregados', help="Usar estos agregados guardados sin leer el Excel")
+    parser.add_argument('--salida', default='reportes_personalizados',
+                        help="Carpeta de reportes y gráficos")
+    parser.add_argument('--sin-graficos', action='store_true')
+    parser.add_argument('--enviar', action='store_true', help="Enviar por WhatsApp al terminar")
+    args = parser.parse_args(argv)
+
+    from ventas_rpa import AnalizadorVentas
+
+    destinatarios = cargar_destinatarios(args.destinatarios)
+    analizador = AnalizadorVentas(args.archivo)
+    if args.agregados:
+        from motor_agregacion import AgregadosVentas
+        analizador.agregados = AgregadosVentas.cargar(args.agregados)
+    elif not analizador.ejecutar_analisis_completo(generar_graficos=False):
+        print(" El análisis no pudo completarse")
+        return False
+
+    personalizados = ReportesPersonalizados(analizador)
+    carpetas = {} if args.sin_graficos else personalizados.generar_graficos(destinatarios, args.salida)
+
+    os.makedirs(args.salida, exist_ok=True)
+    for destinatario in destinatarios:
+        nombre = re.sub(r'[^\w.-]+', '-', destinatario.nombre).strip('-')
+        with open(os.path.join(args.salida, f'{nombre}.txt'), 'w', encoding='utf-8') as f:
+            f.write(personalizados.reporte(destinatario))
+    print(f"📝 {len(destinatarios)} reportes en {args.salida}/")
+
+    if args.enviar:
+        from main import publicar_graficos
+        from whatsapp_sender import WhatsAppSender
+
+        enlaces = {clave: publicar_graficos(carpeta) for clave, carpeta in carpetas.items()}
+        resumen = enviar_personalizados(personalizados, destinatarios, WhatsAppSender(), enlaces)
+        return bool(resumen) and resumen['fallidos'] == 0
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
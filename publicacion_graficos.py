@@ -0,0 +1,166 @@
+"""
+Publicación de los gráficos generados.
+Comprime los PNG para verlos en el móvil, los sube en paralelo a un
+almacenamiento intercambiable y devuelve las URL para el reporte. Cada imagen
+se identifica por el hash de su contenido comprimido: si ya se publicó, no se
+vuelve a subir y se reutiliza su URL.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+URL_SUBIDA_IMGBB = 'https://api.imgbb.com/1/upload'
+
+# Gráficos enlazados en los reportes: nombre del gráfico -> etiqueta
+ETIQUETAS_GRAFICOS = {
+    'ventas_por_sede': '📊 Ventas por Sede',
+    'top_modelos': '🚗 Top Modelos',
+    'canales_ventas': '📞 Canales de Venta',
+    'segmento_clientes': '👥 Segmento Clientes',
+    'dashboard_resumen': '📈 Dashboard Resumen',
+}
+
+
+def comprimir_para_movil(ruta_png, ancho_maximo=1280, colores=256):
+    """
+    Reduce el PNG al ancho indicado y a una paleta de `colores` colores
+    (suficiente para gráficos de barras y texto)
+
+    Returns:
+        bytes: PNG comprimido
+    """
+    from PIL import Image
+
+    with Image.open(ruta_png) as imagen:
+        imagen = imagen.convert('RGB')
+        if imagen.width > ancho_maximo:
+            alto = round(imagen.height * ancho_maximo / imagen.width)
+            imagen = imagen.resize((ancho_maximo, alto), Image.LANCZOS)
+        imagen = imagen.quantize(colors=colores, method=Image.Quantize.MEDIANCUT)
+        salida = io.BytesIO()
+        imagen.save(salida, format='PNG', optimize=True)
+    return salida.getvalue()
+
+
+class AlmacenamientoLocal:
+    """Copia las imágenes a una carpeta servida en url_base (útil para pruebas)"""
+
+    def __init__(self, carpeta, url_base):
+        self.carpeta = carpeta
+        self.url_base = url_base.rstrip('/')
+        os.makedirs(carpeta, exist_ok=True)
+
+    def subir(self, nombre, contenido):
+        ruta = os.path.join(self.carpeta, nombre)
+        with open(ruta + '.tmp', 'wb') as f:
+            f.write(contenido)
+        os.replace(ruta + '.tmp', ruta)
+        return f"{self.url_base}/{nombre}"
+
+
+class AlmacenamientoImgBB:
+    """Sube las imágenes a ImgBB (o a un servidor compatible en url_subida)"""
+
+    def __init__(self, api_key, url_subida=URL_SUBIDA_IMGBB, timeout=60):
+        import requests
+
+        self.api_key = api_key
+        self.url_subida = url_subida
+        self.timeout = timeout
+        self.sesion = requests.Session()
+
+    def subir(self, nombre, contenido):
+        respuesta = self.sesion.post(
+            self.url_subida,
+            params={'key': self.api_key},
+            data={'image': base64.b64encode(contenido).decode('ascii'),
+                  'name': os.path.splitext(nombre)[0]},
+            timeout=self.timeout,
+        )
+        respuesta.raise_for_status()
+        return respuesta.json()['data']['url']
+
+
+class PublicadorGraficos:
+    def __init__(self, almacenamiento, ruta_indice='.publicaciones_graficos.json', max_hilos=4,
+                 ancho_maximo=1280):
+        """
+        Args:
+            almacenamiento: Objeto con subir(nombre, contenido) -> URL
+            ruta_indice (str): JSON hash de contenido -> URL ya publicada
+            max_hilos (int): Subidas simultáneas
+            ancho_maximo (int): Ancho máximo en píxeles de las imágenes publicadas
+        """
+        self.almacenamiento = almacenamiento
+        self.ruta_indice = ruta_indice
+        self.max_hilos = max_hilos
+        self.ancho_maximo = ancho_maximo
+        self.lock = threading.Lock()
+        self.indice = self._leer_indice()
+
+    def _leer_indice(self):
+        try:
+            with open(self.ruta_indice, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _guardar_indice(self):
+        with open(self.ruta_indice + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.indice, f, indent=2)
+        os.replace(self.ruta_indice + '.tmp', self.ruta_indice)
+
+    def _publicar_uno(self, nombre, ruta):
+        contenido = comprimir_para_movil(ruta, self.ancho_maximo)
+        huella = hashlib.sha256(contenido).hexdigest()
+
+        with self.lock:
+            url = self.indice.get(huella)
+        if url:
+            logger.info(f"♻️ {nombre}: contenido ya publicado, se reutiliza {url}")
+            return url
+
+        url = self.almacenamiento.subir(f"{nombre}-{huella[:12]}.png", contenido)
+        with self.lock:
+            self.indice[huella] = url
+        logger.info(f"☁️ {nombre} publicado ({len(contenido) / 1024:,.0f} KB): {url}")
+        return url
+
+    def publicar(self, rutas):
+        """
+        Comprime y publica las imágenes en paralelo
+
+        Args:
+            rutas (dict): Nombre del gráfico -> ruta del PNG
+
+        Returns:
+            dict: Nombre del gráfico -> URL (los que fallaron no aparecen)
+        """
+        enlaces = {}
+        with ThreadPoolExecutor(max_workers=self.max_hilos) as pool:
+            futuros = {nombre: pool.submit(self._publicar_uno, nombre, ruta)
+                       for nombre, ruta in rutas.items() if os.path.exists(ruta)}
+            for nombre, futuro in futuros.items():
+                try:
+                    enlaces[nombre] = futuro.result()
+                except Exception as e:
+                    logger.error(f"Error al publicar {nombre}: {str(e)}")
+
+        with self.lock:
+            self._guardar_indice()
+        return enlaces
+
+
+def rutas_graficos(carpeta='graficos'):
+    """Rutas de los PNG que genera generar_graficos, por nombre de gráfico"""
+    from graficos_ventas import GRAFICOS
+
+    return {nombre: os.path.join(carpeta, f'{nombre}.png') for nombre in GRAFICOS}
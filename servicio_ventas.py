@@ -0,0 +1,325 @@
+"""
+Servicio residente de análisis de ventas.
+Mantiene en memoria el AnalizadorVentas (DataFrame, agregados y resultados)
+y vigila el libro de Excel: solo vuelve a cargarlo cuando cambian su fecha de
+modificación o su tamaño. Los reportes y métricas se sirven por HTTP local
+(o por un socket Unix), de modo que cada consulta del flujo de WhatsApp
+responde en milisegundos sin pagar el arranque de Python ni la lectura del
+Excel.
+
+Rutas:
+    GET  /salud                      Estado del servicio y de la última carga
+    GET  /metricas                   Métricas y resultados en JSON
+    GET  /reporte                    Reporte en texto (?formato=whatsapp para el de main.py)
+    GET  /ultimos_dias?dias=7&por=SEDE  Totales recientes desde el cubo por fecha
+    POST /recargar                   Fuerza una nueva carga del libro
+
+Uso:
+    python servicio_ventas.py "Ventas Fundamentos.xlsx" --puerto 8765
+    python servicio_ventas.py "Ventas Fundamentos.xlsx" --socket /tmp/ventas.sock
+"""
+
+import argparse
+import json
+import logging
+import os
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from ventas_rpa import AnalizadorVentas
+
+logger = logging.getLogger(__name__)
+
+HOST_POR_DEFECTO = '127.0.0.1'
+PUERTO_POR_DEFECTO = 8765
+
+
+def huella_archivo(ruta):
+    """(mtime_ns, tamaño) del archivo, o None si no existe"""
+    try:
+        estado = os.stat(ruta)
+    except OSError:
+        return None
+    return estado.st_mtime_ns, estado.st_size
+
+
+def _a_json(valor):
+    """Convierte Series, DataFrames y escalares de numpy a tipos de JSON"""
+    if isinstance(valor, pd.Series):
+        return {str(clave): _a_json(dato) for clave, dato in valor.items()}
+    if isinstance(valor, pd.DataFrame):
+        return [{str(columna): _a_json(dato) for columna, dato in fila.items()}
+                for fila in valor.reset_index().to_dict('records')]
+    if isinstance(valor, dict):
+        return {str(clave): _a_json(dato) for clave, dato in valor.items()}
+    if isinstance(valor, (np.integer,)):
+        return int(valor)
+    if isinstance(valor, (np.floating, float)):
+        return None if np.isnan(valor) else float(valor)
+    if isinstance(valor, (pd.Timestamp, pd.Period)):
+        return str(valor)
+    return valor
+
+
+class ServicioVentas:
+    def __init__(self, archivo_excel, intervalo=2.0, generar_graficos=False,
+                 carpeta_graficos='graficos', ruta_estado=None):
+        """
+        Args:
+            archivo_excel (str): Libro a mantener cargado
+            intervalo (float): Segundos entre comprobaciones del libro
+            generar_graficos (bool): Regenerar los gráficos en cada carga
+            ruta_estado (str): Si se indica, las recargas usan el modo incremental
+                (solo procesan las filas nuevas de NUEVOS REGISTROS)
+        """
+        self.archivo_excel = archivo_excel
+        self.intervalo = intervalo
+        self.generar_graficos = generar_graficos
+        self.carpeta_graficos = carpeta_graficos
+        self.ruta_estado = ruta_estado
+
+        self.analizador = None
+        self.huella = None
+        self.cargado_en = None
+        self.duracion_carga_s = None
+        self.cargas = 0
+        self.ultimo_error = None
+        self.inicio = time.time()
+
+        self._bloqueo_carga = threading.Lock()
+        self._detener = threading.Event()
+        self._vigilante = None
+
+    def actualizar(self, forzar=False):
+        """
+        Vuelve a cargar el libro si cambió desde la última carga. Mientras
+        carga, las consultas siguen respondiendo con el estado anterior.
+
+        Returns:
+            bool: True si se hizo una carga nueva con éxito
+        """
+        with self._bloqueo_carga:
+            huella = huella_archivo(self.archivo_excel)
+            if huella is None:
+                self.ultimo_error = f"No se encuentra {self.archivo_excel}"
+                return False
+            if not forzar and huella == self.huella:
+                return False
+
+            inicio = time.perf_counter()
+            logger.info(f"🔄 Cargando {self.archivo_excel}...")
+            try:
+                analizador = AnalizadorVentas(self.archivo_excel)
+                if self.ruta_estado:
+                    completado = analizador.ejecutar_analisis_incremental(
+                        self.ruta_estado, generar_graficos=self.generar_graficos)
+                else:
+                    completado = analizador.ejecutar_analisis_completo(
+                        carpeta_salida=self.carpeta_graficos, generar_graficos=self.generar_graficos)
+            except Exception as e:
+                completado, analizador = False, None
+                logger.error(f"Error al cargar {self.archivo_excel}: {str(e)}")
+
+            # Se registra la huella aunque falle para no reintentar en bucle
+            # hasta que el libro vuelva a cambiar
+            self.huella = huella
+            if not completado:
+                self.ultimo_error = "El análisis no pudo completarse (ver log)"
+                logger.error(f"❌ Se mantiene el estado anterior: {self.ultimo_error}")
+                return False
+
+            self.analizador = analizador
+            self.cargado_en = time.time()
+            self.duracion_carga_s = time.perf_counter() - inicio
+            self.cargas += 1
+            self.ultimo_error = None
+            logger.info(f"✅ Estado actualizado en {self.duracion_carga_s:.2f}s")
+            return True
+
+    def _vigilar(self):
+        anterior = huella_archivo(self.archivo_excel)
+        while not self._detener.wait(self.intervalo):
+            huella = huella_archivo(self.archivo_excel)
+            # Esperar a que el libro deje de cambiar (p. ej. mientras Excel lo guarda)
+            if huella != self.huella and huella == anterior:
+                self.actualizar()
+            anterior = huella
+
+    def iniciar_vigilancia(self):
+        """Carga el libro y arranca el hilo que lo vigila"""
+        self.actualizar()
+        self._vigilante = threading.Thread(target=self._vigilar, name='vigilante-ventas', daemon=True)
+        self._vigilante.start()
+
+    def detener(self):
+        self._detener.set()
+        if self._vigilante:
+            self._vigilante.join()
+
+    def salud(self):
+        analizador = self.analizador
+        return {
+            'estado': 'ok' if analizador is not None else 'sin_datos',
+            'archivo': self.archivo_excel,
+            'filas': int(analizador.resultados['metricas']['total_ventas']) if analizador else 0,
+            'cargas': self.cargas,
+            'cargado_en': (time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.cargado_en))
+                           if self.cargado_en else None),
+            'duracion_carga_s': self.duracion_carga_s,
+            'activo_s': time.time() - self.inicio,
+            'ultimo_error': self.ultimo_error,
+        }
+
+    def metricas(self):
+        analizador = self._analizador_listo()
+        return {nombre: _a_json(analizador.resultados[nombre]) for nombre in analizador.resultados
+                if nombre != 'cubo_temporal'}
+
+    def reporte(self, formato='texto'):
+        analizador = self._analizador_listo()
+        if formato == 'whatsapp':
+            from main import generar_reporte_completo
+            return generar_reporte_completo(analizador)
+        return analizador.generar_reporte_texto()
+
+    def ultimos_dias(self, dias=7, por='SEDE', medida='venta_sin_igv'):
+        analizador = self._analizador_listo()
+        if 'cubo_temporal' not in analizador.resultados:
+            raise LookupError("Los datos no tienen columna de fecha")
+        return _a_json(analizador.resultados['cubo_temporal'].ultimos_dias(dias, medida, por or None))
+
+    def _analizador_listo(self):
+        analizador = self.analizador
+        if analizador is None:
+            raise LookupError(self.ultimo_error or "Todavía no hay datos cargados")
+        return analizador
+
+
+class ManejadorVentas(BaseHTTPRequestHandler):
+    servicio = None
+
+    def _responder(self, codigo, cuerpo, tipo='application/json'):
+        if tipo == 'application/json':
+            cuerpo = json.dumps(cuerpo, ensure_ascii=False)
+        datos = cuerpo.encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', f'{tipo}; charset=utf-8')
+        self.send_header('Content-Length', str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        consulta = parse_qs(url.query, keep_blank_values=True)
+        parametros = {clave: valores[-1] for clave, valores in consulta.items()}
+        try:
+            if url.path == '/salud':
+                self._responder(200, self.servicio.salud())
+            elif url.path == '/metricas':
+                self._responder(200, self.servicio.metricas())
+            elif url.path == '/reporte':
+                self._responder(200, self.servicio.reporte(parametros.get('formato', 'texto')),
+                                'text/plain')
+            elif url.path == '/ultimos_dias':
+                self._responder(200, self.servicio.ultimos_dias(
+                    int(parametros.get('dias', 7)), parametros.get('por', 'SEDE'),
+                    parametros.get('medida', 'venta_sin_igv')))
+            else:
+                self._responder(404, {'error': f"Ruta desconocida: {url.path}"})
+        except LookupError as e:
+            self._responder(503, {'error': str(e)})
+        except (ValueError, KeyError) as e:
+            self._responder(400, {'error': str(e)})
+        except Exception as e:
+            logger.error(f"Error al atender {self.path}: {str(e)}")
+            self._responder(500, {'error': str(e)})
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/recargar':
+            self._responder(404, {'error': f"Ruta desconocida: {self.path}"})
+            return
+        recargado = self.servicio.actualizar(forzar=True)
+        self._responder(200 if recargado else 500, self.servicio.salud())
+
+    def address_string(self):
+        # Con un socket Unix, client_address no es una tupla (host, puerto)
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, formato, *args):
+        logger.debug(f"{self.address_string()} - {formato % args}")
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class ServidorUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+else:  # Windows
+    ServidorUnix = None
+
+
+def consultar(ruta, url_base=f"http://{HOST_POR_DEFECTO}:{PUERTO_POR_DEFECTO}", timeout=5):
+    """
+    Cliente mínimo del servicio (por ejemplo, para el flujo de WhatsApp)
+
+    Returns:
+        dict | str: JSON decodificado o texto, según la respuesta
+    """
+    from urllib.request import urlopen
+    with urlopen(url_base + ruta, timeout=timeout) as respuesta:
+        cuerpo = respuesta.read().decode('utf-8')
+        if respuesta.headers.get_content_type() == 'application/json':
+            return json.loads(cuerpo)
+        return cuerpo
+
+
+def crear_servidor(servicio, host=HOST_POR_DEFECTO, puerto=PUERTO_POR_DEFECTO, socket_unix=None):
+    """Servidor HTTP (multihilo) que atiende las consultas con el estado del servicio"""
+    manejador = type('Manejador', (ManejadorVentas,), {'servicio': servicio})
+    if socket_unix:
+        if ServidorUnix is None:
+            raise OSError("Los sockets Unix no están disponibles en este sistema")
+        if os.path.exists(socket_unix):
+            os.remove(socket_unix)
+        return ServidorUnix(socket_unix, manejador)
+    return ThreadingHTTPServer((host, puerto), manejador)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio residente de análisis de ventas")
+    parser.add_argument('archivo', nargs='?', default='Ventas Fundamentos.xlsx', help="Libro de ventas")
+    parser.add_argument('--host', default=HOST_POR_DEFECTO)
+    parser.add_argument('--puerto', type=int, default=PUERTO_POR_DEFECTO)
+    parser.add_argument('--socket', help="Escuchar en este socket Unix en lugar de TCP")
+    parser.add_argument('--intervalo', type=float, default=2.0,
+                        help="Segundos entre comprobaciones del libro")
+    parser.add_argument('--graficos', action='store_true', help="Regenerar los gráficos en cada carga")
+    parser.add_argument('--incremental', metavar='ESTADO',
+                        help="Recargar en modo incremental guardando el estado en ESTADO")
+    args = parser.parse_args(argv)
+
+    servicio = ServicioVentas(args.archivo, args.intervalo, args.graficos,
+                              ruta_estado=args.incremental)
+    servicio.iniciar_vigilancia()
+    servidor = crear_servidor(servicio, args.host, args.puerto, args.socket)
+    direccion = args.socket or f"http://{args.host}:{args.puerto}"
+    print(f"🚀 Servicio de ventas escuchando en {direccion} (Ctrl+C para salir)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Servicio detenido")
+    finally:
+        servidor.server_close()
+        servicio.detener()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
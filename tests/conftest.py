@@ -0,0 +1,97 @@
+"""
+Fixtures compartidas: un libro sintético pequeño con el esquema del Excel del
+profesor (crear_datos_prueba.py), un directorio de trabajo temporal para que
+cachés, estados y CSV de cuarentena no se escriban en el repositorio y un
+servidor HTTP local que imita la API de mensajes de Twilio.
+"""
+
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+from crear_datos_prueba import crear_libro  # noqa: E402
+
+VENTAS_PRUEBA = 2_000
+NUEVOS_PRUEBA = 7
+
+
+@pytest.fixture(scope='session')
+def libro_ventas(tmp_path_factory):
+    """Ruta de un .xlsx con VENTAS, VEHICULOS y NUEVOS REGISTROS"""
+    return crear_libro(str(tmp_path_factory.mktemp('datos') / 'ventas.xlsx'),
+                       n_ventas=VENTAS_PRUEBA, n_nuevos=NUEVOS_PRUEBA)
+
+
+@pytest.fixture(autouse=True)
+def directorio_trabajo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def analizador(libro_ventas):
+    from ventas_rpa import AnalizadorVentas
+    return AnalizadorVentas(libro_ventas, usar_cache=False)
+
+
+class _ManejadorTwilio(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        datos = {clave: valores[0] for clave, valores in
+                 parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode()).items()}
+        servidor = self.server
+        with servidor.lock:
+            servidor.recibidos.append((time.monotonic(), datos))
+            # Respuestas de error programadas por cuerpo del mensaje, en orden
+            pendientes = servidor.fallos.get(datos.get('Body'), [])
+            estado = pendientes.pop(0) if pendientes else 201
+            demora = servidor.demoras.pop(datos.get('Body'), 0)
+        # Mensaje recibido pero respondido tarde (timeout de lectura del cliente)
+        time.sleep(demora)
+        if estado == 201:
+            cuerpo = json.dumps({'sid': f"SM{next(servidor.contador)}"}).encode()
+        else:
+            cuerpo = b'{"message": "error"}'
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        if estado == 429:
+            self.send_header('Retry-After', '0')
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor_twilio():
+    """
+    Servidor con .url, .recibidos [(instante, datos del formulario)] y .fallos
+    {cuerpo: [códigos HTTP a devolver antes de aceptar el mensaje]} y .demoras
+    {cuerpo: segundos de espera antes de responder la primera vez}
+    """
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _ManejadorTwilio)
+    servidor.lock = threading.Lock()
+    servidor.recibidos = []
+    servidor.fallos = {}
+    servidor.demoras = {}
+    servidor.contador = itertools.count(1)
+    servidor.url = f"http://127.0.0.1:{servidor.server_address[1]}"
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
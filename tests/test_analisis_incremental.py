@@ -0,0 +1,138 @@
+import json
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from analisis_incremental import VERSION_ESTADO, EstadoIncremental
+from crear_datos_prueba import _escribir_hoja, generar_vehiculos, generar_ventas, iterar_ventas
+from ventas_rpa import AnalizadorVentas
+
+VENTAS = 1_500
+
+
+def _escribir_libro(ruta, n_nuevos, semilla_ventas=42, sin_id=()):
+    """
+    Libro cuyas VENTAS y VEHICULOS no cambian entre llamadas (misma huella) y
+    cuyos NUEVOS REGISTROS son los primeros n_nuevos de una misma lista
+    (con el ID vacío en las posiciones sin_id)
+    """
+    nuevos = generar_ventas(20, id_inicial=VENTAS + 1, rng=np.random.default_rng(7), nuevos=True)
+    if sin_id:
+        nuevos['ID'] = nuevos['ID'].astype('float64')
+        nuevos.loc[list(sin_id), 'ID'] = np.nan
+    libro = Workbook(write_only=True)
+    _escribir_hoja(libro, 'VENTAS', iterar_ventas(VENTAS, semilla=semilla_ventas))
+    _escribir_hoja(libro, 'VEHICULOS', [generar_vehiculos()])
+    _escribir_hoja(libro, 'NUEVOS REGISTROS', [nuevos.head(n_nuevos)])
+    libro.save(ruta)
+    return str(ruta)
+
+
+def _incremental(ruta, estado):
+    analizador = AnalizadorVentas(ruta, usar_cache=False)
+    assert analizador.ejecutar_analisis_incremental(str(estado), generar_graficos=False)
+    return analizador
+
+
+def _completo(ruta):
+    analizador = AnalizadorVentas(ruta, usar_cache=False)
+    assert analizador.ejecutar_analisis_completo(generar_graficos=False)
+    return analizador
+
+
+def _comparar(incremental, completo):
+    assert incremental.resultados['metricas'] == completo.resultados['metricas']
+    for nombre in ('ventas_por_sede', 'canales_ventas', 'top_modelos'):
+        pd.testing.assert_series_equal(incremental.resultados[nombre], completo.resultados[nombre],
+                                       check_dtype=False, check_names=False)
+
+
+def test_la_marca_de_agua_procesa_solo_los_registros_nuevos(tmp_path):
+    ruta, estado = tmp_path / 'ventas.xlsx', tmp_path / 'estado.json'
+
+    _escribir_libro(ruta, 5)
+    primera = _incremental(ruta, estado)
+    assert EstadoIncremental.cargar(str(estado)).ultimo_id == VENTAS + 5
+    _comparar(primera, _completo(ruta))
+
+    _escribir_libro(ruta, 12)
+    segunda = _incremental(ruta, estado)
+    # Solo se preparan las 7 filas nuevas, pero los resultados son los del libro entero
+    assert len(segunda.df) == 7
+    assert EstadoIncremental.cargar(str(estado)).ultimo_id == VENTAS + 12
+    _comparar(segunda, _completo(ruta))
+
+    # Sin filas nuevas no se vuelve a sumar nada
+    tercera = _incremental(ruta, estado)
+    assert len(tercera.df) == 0
+    _comparar(tercera, _completo(ruta))
+
+
+def test_filas_sin_id_se_procesan_una_sola_vez(tmp_path, caplog):
+    ruta, estado = tmp_path / 'ventas.xlsx', tmp_path / 'estado.json'
+    sin_id = (2, 8, 9)
+
+    _escribir_libro(ruta, 5, sin_id=sin_id)
+    _comparar(_incremental(ruta, estado), _completo(ruta))
+    assert 'sin ID' in caplog.text
+
+    _escribir_libro(ruta, 12, sin_id=sin_id)
+    segunda = _incremental(ruta, estado)
+    assert len(segunda.df) == 7
+    assert EstadoIncremental.cargar(str(estado)).ultimo_id == VENTAS + 12
+    _comparar(segunda, _completo(ruta))
+
+    # Solo quedan filas sin ID ya procesadas: nada que sumar ni que avisar
+    caplog.clear()
+    tercera = _incremental(ruta, estado)
+    assert len(tercera.df) == 0
+    assert 'sin ID' not in caplog.text
+    _comparar(tercera, _completo(ruta))
+
+
+def test_un_delta_solo_con_filas_sin_id(tmp_path):
+    ruta, estado = tmp_path / 'ventas.xlsx', tmp_path / 'estado.json'
+    _escribir_libro(ruta, 5)
+    _incremental(ruta, estado)
+
+    _escribir_libro(ruta, 7, sin_id=(5, 6))
+    segunda = _incremental(ruta, estado)
+
+    assert len(segunda.df) == 2
+    assert EstadoIncremental.cargar(str(estado)).ultimo_id == VENTAS + 5
+    _comparar(segunda, _completo(ruta))
+
+
+def test_cambiar_ventas_reconstruye_desde_cero(tmp_path):
+    ruta, estado = tmp_path / 'ventas.xlsx', tmp_path / 'estado.json'
+    _escribir_libro(ruta, 5)
+    _incremental(ruta, estado)
+
+    _escribir_libro(ruta, 5, semilla_ventas=43)
+    reconstruido = _incremental(ruta, estado)
+
+    assert len(reconstruido.df) == VENTAS + 5
+    _comparar(reconstruido, _completo(ruta))
+
+
+def test_estado_de_otra_version_se_descarta(tmp_path):
+    ruta, estado = tmp_path / 'ventas.xlsx', tmp_path / 'estado.json'
+    _escribir_libro(ruta, 5)
+    _incremental(ruta, estado)
+
+    datos = json.loads(estado.read_text(encoding='utf-8'))
+    datos['version'] = VERSION_ESTADO - 1
+    estado.write_text(json.dumps(datos), encoding='utf-8')
+
+    assert EstadoIncremental.cargar(str(estado)) is None
+    assert len(_incremental(ruta, estado).df) == VENTAS + 5
+
+
+def test_sin_columna_id_la_marca_es_la_posicion():
+    estado = EstadoIncremental()
+    nuevos = pd.DataFrame({'CLIENTE': ['a', 'b', 'c']})
+    estado.avanzar(nuevos, estado.filtrar_no_vistos(nuevos))
+
+    mas_nuevos = pd.DataFrame({'CLIENTE': ['a', 'b', 'c', 'd', 'e']})
+    assert estado.filtrar_no_vistos(mas_nuevos)['CLIENTE'].tolist() == ['d', 'e']
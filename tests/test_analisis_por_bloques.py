@@ -0,0 +1,39 @@
+import pandas as pd
+
+from analisis_por_bloques import AnalizadorVentasPorBloques
+
+
+def _metricas_completas(analizador):
+    assert analizador.ejecutar_analisis_completo(generar_graficos=False)
+    return analizador.resultados['metricas']
+
+
+def test_bloques_igual_que_en_memoria(libro_ventas, analizador):
+    esperado = _metricas_completas(analizador)
+    por_bloques = AnalizadorVentasPorBloques(libro_ventas, tamano_bloque=300)
+
+    assert por_bloques.ejecutar_analisis_completo(generar_graficos=False)
+
+    assert por_bloques.bloques_procesados > 1
+    assert por_bloques.resultados['metricas'] == esperado
+    pd.testing.assert_series_equal(por_bloques.resultados['ventas_por_sede'],
+                                   analizador.resultados['ventas_por_sede'])
+
+
+def test_interfaz_heredada_delega_en_bloques(libro_ventas, analizador):
+    esperado = _metricas_completas(analizador)
+
+    por_bloques = AnalizadorVentasPorBloques(libro_ventas, tamano_bloque=500)
+    assert por_bloques.preparar_datos()
+    assert por_bloques.resultados['metricas'] == esperado
+    assert 'No hay resultados' not in por_bloques.generar_reporte_texto()
+
+    por_bloques = AnalizadorVentasPorBloques(libro_ventas, tamano_bloque=500)
+    assert por_bloques.cargar_datos_multiple_hojas()
+    assert por_bloques.resultados['metricas'] == esperado
+
+
+def test_fuente_inexistente_devuelve_false(tmp_path):
+    por_bloques = AnalizadorVentasPorBloques(str(tmp_path / 'no_existe.xlsx'))
+    assert por_bloques.preparar_datos() is False
+    assert por_bloques.cargar_datos_multiple_hojas() is False
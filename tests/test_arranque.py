@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+from benchmark_rpa import MODULOS_PESADOS, PRESUPUESTO_ARRANQUE_S, medir_arranque
+
+# El tiempo de pared depende de la carga de la máquina: el presupuesto solo se
+# comprueba si se pide (MEDIR_ARRANQUE=1 python -m pytest tests/test_arranque.py)
+MEDIR_ARRANQUE = os.getenv('MEDIR_ARRANQUE', '') not in ('', '0')
+
+
+@pytest.fixture(scope='module')
+def medicion(libro_ventas, tmp_path_factory):
+    return medir_arranque(libro_ventas, repeticiones=3,
+                          directorio=str(tmp_path_factory.mktemp('arranque')))
+
+
+@pytest.mark.skipif(not MEDIR_ARRANQUE, reason="Medición de tiempo opcional: MEDIR_ARRANQUE=1")
+def test_report_text_arranca_dentro_del_presupuesto(medicion):
+    assert medicion['ok'], medicion['error']
+    assert medicion['report_text'] <= PRESUPUESTO_ARRANQUE_S, (
+        f"report-text tardó {medicion['report_text']:.3f}s "
+        f"(presupuesto {PRESUPUESTO_ARRANQUE_S:.3f}s)")
+
+
+def test_report_text_no_importa_modulos_pesados(medicion):
+    assert medicion['error'] is None, medicion['error']
+    assert medicion['ok']
+    assert not set(medicion['modulos']) & set(MODULOS_PESADOS)
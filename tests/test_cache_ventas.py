@@ -0,0 +1,78 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import ventas_rpa
+from cache_ventas import CacheColumnar
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def libro(libro_ventas, tmp_path):
+    """Copia del libro de prueba que cada prueba puede modificar"""
+    return shutil.copy(libro_ventas, tmp_path / 'ventas.xlsx')
+
+
+def _df():
+    return pd.DataFrame({'ID': [1, 2], 'SEDE': pd.Categorical(['Lima', 'Cusco']),
+                         'MODELO': ['A', 7]})
+
+
+def test_ida_y_vuelta(libro, tmp_path):
+    cache = CacheColumnar(str(tmp_path / 'cache'))
+    assert cache.cargar(libro) is None
+
+    assert cache.guardar(libro, _df())
+    leido = cache.cargar(libro)
+
+    assert leido['ID'].tolist() == [1, 2]
+    assert leido['SEDE'].tolist() == ['Lima', 'Cusco']
+    # Las columnas de tipos mezclados se guardan como texto
+    assert leido['MODELO'].tolist() == ['A', '7']
+
+
+def test_cambiar_el_libro_invalida_la_cache(libro, tmp_path):
+    cache = CacheColumnar(str(tmp_path / 'cache'))
+    cache.guardar(libro, _df())
+
+    with open(libro, 'ab') as f:
+        f.write(b'\0')
+    assert cache.cargar(libro) is None
+
+
+def test_cambiar_solo_la_fecha_invalida_la_cache(libro, tmp_path):
+    cache = CacheColumnar(str(tmp_path / 'cache'))
+    cache.guardar(libro, _df())
+
+    estado = os.stat(libro)
+    os.utime(libro, ns=(estado.st_atime_ns, estado.st_mtime_ns + 10 ** 9))
+    assert cache.cargar(libro) is None
+
+
+def test_guardar_elimina_las_entradas_obsoletas(libro, tmp_path):
+    carpeta = tmp_path / 'cache'
+    cache = CacheColumnar(str(carpeta))
+    cache.guardar(libro, _df())
+    with open(libro, 'ab') as f:
+        f.write(b'\0')
+
+    cache.guardar(libro, _df())
+
+    assert len(os.listdir(carpeta)) == 1
+    assert cache.cargar(libro) is not None
+
+
+def test_el_analizador_no_relee_el_libro_con_la_cache(libro, monkeypatch):
+    primero = ventas_rpa.AnalizadorVentas(libro)
+    assert primero.cargar_datos_multiple_hojas()
+
+    def sin_lectura(*args, **kwargs):
+        raise AssertionError("el libro no debería leerse de nuevo")
+
+    monkeypatch.setattr(ventas_rpa, 'leer_hojas_excel', sin_lectura)
+    segundo = ventas_rpa.AnalizadorVentas(libro)
+    assert segundo.cargar_datos_multiple_hojas()
+    pd.testing.assert_frame_equal(segundo.df, primero.df)
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+
+import cola_envios
+from cola_envios import ColaEnvios, DespachadorCola, ENVIADO, FALLIDO, PENDIENTE, clave_idempotencia
+
+
+def _cola(tmp_path):
+    return ColaEnvios(str(tmp_path / 'cola.db'))
+
+
+def test_encolar_informa_si_inserto(tmp_path):
+    cola = _cola(tmp_path)
+    clave, insertado = cola.encolar('+51999', 'hola', lote='a')
+    assert insertado
+    assert cola.encolar('+51999', 'hola', lote='a') == (clave, False)
+    assert cola.resumen() == {PENDIENTE: 1}
+
+
+def test_mismo_mensaje_otro_dia_no_se_descarta(tmp_path, monkeypatch):
+    cola = _cola(tmp_path)
+    monkeypatch.setattr(cola_envios, 'lote_del_dia', lambda: '2026-01-01')
+    assert cola.encolar('+51999', 'grafico', media_url='https://x/sede.png')[1]
+    assert not cola.encolar('+51999', 'grafico', media_url='https://x/sede.png')[1]
+
+    monkeypatch.setattr(cola_envios, 'lote_del_dia', lambda: '2026-01-02')
+    assert cola.encolar('+51999', 'grafico', media_url='https://x/sede.png')[1]
+    assert cola.pendientes() == 2
+
+
+def test_clave_depende_de_destino_contenido_y_lote():
+    base = clave_idempotencia('+51999', 'hola', None, 'a')
+    assert base == clave_idempotencia('+51999', 'hola', None, 'a')
+    assert base != clave_idempotencia('+51888', 'hola', None, 'a')
+    assert base != clave_idempotencia('+51999', 'adios', None, 'a')
+    assert base != clave_idempotencia('+51999', 'hola', None, 'b')
+
+
+def test_recuperar_tras_caida(tmp_path):
+    ruta = str(tmp_path / 'cola.db')
+    cola = ColaEnvios(ruta)
+    cola.encolar('+51999', 'hola', lote='a')
+    assert len(cola.tomar()) == 1
+    cola.cerrar()
+
+    cola = ColaEnvios(ruta)
+    assert cola.tomar() == []
+    assert cola.recuperar() == 1
+    assert len(cola.tomar()) == 1
+
+
+def test_un_mensaje_por_destino_a_la_vez(tmp_path):
+    cola = _cola(tmp_path)
+    for i in range(3):
+        cola.encolar('+51999', f'mensaje {i}', lote='a')
+    cola.encolar('+51888', 'otro', lote='a')
+
+    tomados = cola.tomar()
+    assert sorted(mensaje['destino'] for mensaje in tomados) == ['+51888', '+51999']
+    assert [m['cuerpo'] for m in tomados if m['destino'] == '+51999'] == ['mensaje 0']
+
+
+def test_reintentos_con_espera_y_descarte(tmp_path):
+    cola = _cola(tmp_path)
+    cola.encolar('+51999', 'hola', lote='a')
+    llamadas = []
+
+    def falla(destino, cuerpo, media_url):
+        llamadas.append(destino)
+        raise RuntimeError('503')
+
+    despachador = DespachadorCola(cola, falla, max_intentos=3, espera_base=0.0, intervalo=0.01)
+    assert despachador.drenar(timeout=5)
+    assert len(llamadas) == 3
+    assert cola.resumen() == {FALLIDO: 1}
+
+    assert cola.reintentar_fallidos() == 1
+    despachador.enviar = lambda destino, cuerpo, media_url: 'SM123'
+    assert despachador.drenar(timeout=5)
+    assert cola.resumen() == {ENVIADO: 1}
+
+
+def test_espera_exponencial_con_tope(tmp_path):
+    despachador = DespachadorCola(_cola(tmp_path), None, espera_base=2.0, espera_maxima=30.0)
+    for intentos, esperada in [(1, 2.0), (2, 4.0), (3, 8.0), (10, 30.0)]:
+        espera = despachador.calcular_espera(intentos)
+        assert 0.8 * esperada <= espera <= 1.2 * esperada
+
+
+def test_whatsapp_sender_informa_duplicados(tmp_path, monkeypatch):
+    for variable in ['TWILIO_ACCOUNT_SID', 'TWILIO_AUTH_TOKEN', 'TWILIO_WHATSAPP_NUMBER']:
+        monkeypatch.setenv(variable, '')
+    from whatsapp_sender import WhatsAppSender
+
+    emisor = WhatsAppSender(cola=_cola(tmp_path))
+    assert emisor.enviar_imagen('+51999', 'https://x/sede.png', 'Sede')
+    assert not emisor.enviar_imagen('+51999', 'https://x/sede.png', 'Sede')
+    assert emisor.enviar_imagen('+51999', 'https://x/sede.png', 'Sede', lote='otra-ejecucion')
+
+
+def test_reporte_completo_repetido_no_se_duplica(analizador, tmp_path, monkeypatch):
+    for variable in ['TWILIO_ACCOUNT_SID', 'TWILIO_AUTH_TOKEN', 'TWILIO_WHATSAPP_NUMBER']:
+        monkeypatch.setenv(variable, '')
+    import ventas_rpa
+    from whatsapp_sender import WhatsAppSender
+
+    class Reloj(datetime):
+        instante = datetime(2025, 3, 1, 8, 0, 0)
+
+        @classmethod
+        def now(cls, tz=None):
+            # Cada reporte se genera un segundo después que el anterior
+            cls.instante += timedelta(seconds=1)
+            return cls.instante
+
+    monkeypatch.setattr(ventas_rpa, 'datetime', Reloj)
+    assert analizador.ejecutar_analisis_completo(generar_graficos=False)
+    cola = _cola(tmp_path)
+    emisor = WhatsAppSender(cola=cola)
+    enlaces = {'ventas_por_sede': 'https://img/sede.png', 'top_modelos': 'https://img/top.png'}
+
+    assert emisor.enviar_reporte_completo('+51999', analizador, enlaces=enlaces)
+    # Tras una caída, la misma ejecución vuelve a enviar el mismo reporte
+    assert emisor.enviar_reporte_completo('+51999', analizador, enlaces=enlaces)
+    assert cola.resumen() == {'pendiente': 3}
+
+    # Con otro lote explícito, sí es un envío nuevo
+    assert emisor.enviar_reporte_completo('+51999', analizador, enlaces=enlaces, lote='reenvio')
+    assert cola.resumen() == {'pendiente': 6}
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+from conteo_distintos import ContadorDistintos, contar_clientes
+
+
+def _clientes(inicio, fin):
+    return pd.Series([f'cliente {i}' for i in range(inicio, fin)])
+
+
+def test_exacto_bajo_el_umbral_y_combinable():
+    lunes = ContadorDistintos().agregar(_clientes(0, 600))
+    martes = ContadorDistintos().agregar(_clientes(400, 1000))
+
+    assert lunes.es_exacto
+    assert lunes.combinar(martes).cardinalidad() == 1000
+
+
+def test_los_nulos_no_cuentan_y_el_tipo_no_cambia_el_hash():
+    texto = ContadorDistintos().agregar(pd.Series(['a', 'b', None, 'a']))
+    categoria = ContadorDistintos().agregar(pd.Series(['b', 'a', 'b'], dtype='category'))
+
+    assert texto.cardinalidad() == 2
+    assert texto.combinar(categoria).cardinalidad() == 2
+
+
+def test_combinar_bocetos_hll_es_preciso():
+    # Dos días con 60 mil clientes en común: la unión tiene 240 mil
+    lunes = ContadorDistintos(umbral=50_000).agregar(_clientes(0, 150_000))
+    martes = ContadorDistintos(umbral=50_000).agregar(_clientes(90_000, 240_000))
+    union = ContadorDistintos(umbral=50_000).agregar(_clientes(0, 240_000))
+
+    combinado = lunes.combinar(martes)
+
+    assert not combinado.es_exacto
+    # Combinar es el máximo de los registros: igual que contar la unión de una vez
+    np.testing.assert_array_equal(combinado.registros, union.registros)
+    # Error típico de ~0,8 % con precisión 14; el límite es de más de 3 sigmas
+    assert abs(combinado.cardinalidad() - 240_000) / 240_000 < 0.03
+
+
+def test_combinar_exacto_con_hll():
+    boceto = ContadorDistintos(umbral=1_000).agregar(_clientes(0, 20_000))
+    exacto = ContadorDistintos(umbral=1_000).agregar(_clientes(19_500, 20_500))
+
+    combinado = exacto.combinar(boceto)
+
+    assert not combinado.es_exacto
+    assert abs(combinado.cardinalidad() - 20_500) / 20_500 < 0.03
+
+
+def test_ida_y_vuelta_por_dict():
+    for contador in (ContadorDistintos().agregar(_clientes(0, 300)),
+                     ContadorDistintos(umbral=100).agregar(_clientes(0, 5_000))):
+        copia = ContadorDistintos.desde_dict(contador.a_dict())
+        assert copia.es_exacto == contador.es_exacto
+        assert copia.cardinalidad() == contador.cardinalidad()
+
+
+def test_contar_clientes_por_grupo():
+    df = pd.DataFrame({'CLIENTE': ['a', 'b', 'a', 'c', None],
+                       'SEDE': ['Lima', 'Lima', 'Cusco', 'Cusco', 'Cusco']})
+
+    por_sede = contar_clientes(df, 'SEDE')
+
+    assert {sede: contador.cardinalidad() for sede, contador in por_sede.items()} == {'Lima': 2, 'Cusco': 2}
+    assert contar_clientes(df).cardinalidad() == 3
@@ -0,0 +1,117 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from cubos_ventas import CuboVentas, carpeta_particiones, construir_cubo
+from motor_agregacion import AgregadosVentas, agregar_dataframe
+
+
+def _ventas(fechas, sede='Ate', precio=100.0):
+    n = len(fechas)
+    return pd.DataFrame({
+        'FECHA': pd.to_datetime(fechas),
+        'SEDE': [sede] * n,
+        'CANAL_VENTA': ['CRM'] * n,
+        'SEGMENTO_CLIENTE': ['Persona'] * n,
+        'MODELO_VEHICULO': ['CIVIC'] * n,
+        'CLIENTE': [f'CLIENTE {i}' for i in range(n)],
+        'PRECIO_VENTA': [precio * 1.18] * n,
+        'PRECIO_SIN_IGV': [precio] * n,
+        'IGV': [0.18] * n,
+    })
+
+
+def _archivos(carpeta):
+    return sorted(os.path.relpath(os.path.join(directorio, archivo), carpeta).replace(os.sep, '/')
+                  for directorio, _, archivos in os.walk(carpeta) for archivo in archivos)
+
+
+def test_json_de_agregados_no_embebe_las_celdas(tmp_path):
+    ruta = str(tmp_path / 'agregados.json')
+    agregados = agregar_dataframe(_ventas(['2017-01-01', '2017-01-02', '2017-01-02']))
+
+    agregados.guardar(ruta)
+
+    with open(ruta, encoding='utf-8') as f:
+        cubo = json.load(f)['cubo']
+    assert 'claves' not in cubo
+    assert len(cubo['particiones']) == 2
+    assert _archivos(carpeta_particiones(ruta)) == sorted(cubo['particiones'])
+
+
+def test_guardar_un_delta_solo_anade_sus_dias(tmp_path):
+    ruta = str(tmp_path / 'estado.json')
+    agregar_dataframe(_ventas(['2017-01-01', '2017-01-02', '2017-01-03'])).guardar(ruta)
+    antes = _archivos(carpeta_particiones(ruta))
+
+    agregados = AgregadosVentas.cargar(ruta)
+    agregados.combinar(agregar_dataframe(_ventas(['2017-01-03', '2017-01-04'], sede='La Molina')))
+    agregados.guardar(ruta)
+
+    despues = _archivos(carpeta_particiones(ruta))
+    nuevas = sorted(set(despues) - set(antes))
+    assert set(antes) <= set(despues)
+    assert [particion.split('/')[0] for particion in nuevas] == ['2017-01-03', '2017-01-04']
+
+    cubo = AgregadosVentas.cargar(ruta).cubo
+    assert int(cubo.datos['ventas'].sum()) == 5
+    assert cubo.ultimos_dias(1, por=None, hasta='2017-01-03') == 200.0
+
+
+def test_guardar_completo_borra_particiones_no_referenciadas(tmp_path):
+    ruta = str(tmp_path / 'agregados.json')
+    agregar_dataframe(_ventas(['2017-01-01'])).guardar(ruta)
+    agregar_dataframe(_ventas(['2017-02-01'])).guardar(ruta)
+
+    assert [particion.split('/')[0] for particion in _archivos(carpeta_particiones(ruta))] == ['2017-02-01']
+    assert AgregadosVentas.cargar(ruta).cubo.rango_fechas[0] == pd.Timestamp('2017-02-01')
+
+
+def test_formato_anterior_con_cubo_embebido(tmp_path):
+    ruta = str(tmp_path / 'agregados.json')
+    agregados = agregar_dataframe(_ventas(['2017-01-01', '2017-01-02']))
+    datos = agregados.a_dict()
+    datos['cubo'] = agregados.cubo.a_dict()
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(datos, f)
+
+    cargados = AgregadosVentas.cargar(ruta)
+    assert int(cargados.cubo.datos['ventas'].sum()) == 2
+
+    cargados.guardar(ruta)
+    assert len(_archivos(carpeta_particiones(ruta))) == 2
+    assert int(AgregadosVentas.cargar(ruta).cubo.datos['ventas'].sum()) == 2
+
+
+def test_particiones_sin_carpeta_es_un_error():
+    datos = agregar_dataframe(_ventas(['2017-01-01'])).a_dict()
+    with pytest.raises(ValueError):
+        AgregadosVentas.desde_dict(datos)
+
+
+def test_cubo_combinado_igual_que_completo():
+    df = _ventas(['2017-01-01', '2017-01-01', '2017-01-02', '2017-01-05'])
+    completo = construir_cubo(df)
+    partido = CuboVentas().combinar(construir_cubo(df.iloc[:1])).combinar(construir_cubo(df.iloc[1:]))
+
+    pd.testing.assert_series_equal(partido.serie(), completo.serie())
+    assert partido.serie().loc['2017-01-03'] == 0
+
+
+def test_guardar_en_otra_ruta_copia_el_cubo(tmp_path):
+    origen, destino = str(tmp_path / 'A.json'), str(tmp_path / 'B.json')
+    agregar_dataframe(_ventas(['2015-01-01', '2015-01-02'])).guardar(origen)
+
+    cargados = AgregadosVentas.cargar(origen)
+    cargados.combinar(agregar_dataframe(_ventas(['2015-01-03'])))
+    cargados.guardar(destino)
+    # B no depende de las particiones de A
+    for archivo in _archivos(carpeta_particiones(origen)):
+        os.remove(os.path.join(carpeta_particiones(origen), archivo))
+
+    copia = AgregadosVentas.cargar(destino)
+    assert len(copia.cubo.particiones) == 3
+    pd.testing.assert_frame_equal(copia.cubo.datos, cargados.cubo.datos)
+    assert copia.a_resultados()['metricas'] == cargados.a_resultados()['metricas']
@@ -0,0 +1,114 @@
+import socket
+
+import pytest
+import requests
+
+from envio_masivo import EnvioIncierto, LimitadorTasa, MotorEnvio
+
+
+def _motor(servidor, **opciones):
+    opciones.setdefault('espera_base', 0.0)
+    return MotorEnvio('AC123', 'token', '+10000000000', url_base=servidor.url, **opciones)
+
+
+def test_envia_a_todos_en_orden_por_destino(servidor_twilio):
+    mensajes = [('reporte', None), ('sede', 'https://img/sede.png'), ('modelos', 'https://img/top.png')]
+    destinos = [f'+5199900{i:02d}' for i in range(6)]
+
+    with _motor(servidor_twilio, max_hilos=4, mensajes_por_segundo=None) as motor:
+        resumen = motor.enviar_lote(destinos, mensajes)
+
+    assert resumen['enviados'] == 18 and resumen['fallidos'] == 0
+    assert set(resumen['detalle']) == set(destinos)
+    for destino in destinos:
+        cuerpos = [datos['Body'] for _, datos in servidor_twilio.recibidos
+                   if datos['To'] == f'whatsapp:{destino}']
+        assert cuerpos == ['reporte', 'sede', 'modelos']
+    assert all(datos['From'] == 'whatsapp:+10000000000' for _, datos in servidor_twilio.recibidos)
+
+
+def test_limitador_de_tasa(servidor_twilio):
+    with _motor(servidor_twilio, max_hilos=8, mensajes_por_segundo=20) as motor:
+        motor.limitador = LimitadorTasa(20, rafaga=1)
+        resumen = motor.enviar_lote([f'+51999{i:04d}' for i in range(11)], [('hola', None)])
+
+    assert resumen['enviados'] == 11
+    instantes = sorted(instante for instante, _ in servidor_twilio.recibidos)
+    # 11 envíos a 20/s con ráfaga de 1: al menos 10 intervalos de 50 ms
+    assert instantes[-1] - instantes[0] >= 0.45
+
+
+def test_reintenta_429_y_5xx(servidor_twilio):
+    servidor_twilio.fallos['hola'] = [429, 503]
+
+    with _motor(servidor_twilio, reintentos=3, mensajes_por_segundo=None) as motor:
+        sid = motor.enviar('+51999', 'hola')
+
+    assert sid.startswith('SM')
+    assert len(servidor_twilio.recibidos) == 3
+
+
+def test_agota_reintentos_y_no_reintenta_4xx(servidor_twilio):
+    servidor_twilio.fallos['caido'] = [500] * 5
+    servidor_twilio.fallos['invalido'] = [400]
+
+    with _motor(servidor_twilio, reintentos=2, mensajes_por_segundo=None) as motor:
+        with pytest.raises(requests.HTTPError):
+            motor.enviar('+51999', 'caido')
+        assert len(servidor_twilio.recibidos) == 3
+        with pytest.raises(requests.HTTPError):
+            motor.enviar('+51999', 'invalido')
+        assert len(servidor_twilio.recibidos) == 4
+
+
+def test_fallo_de_un_mensaje_no_detiene_los_siguientes(servidor_twilio):
+    servidor_twilio.fallos['roto'] = [400]
+
+    with _motor(servidor_twilio, mensajes_por_segundo=None) as motor:
+        resumen = motor.enviar_lote(['+51999'], [('roto', None), ('sigue', None)])
+
+    assert resumen['enviados'] == 1 and resumen['fallidos'] == 1
+    assert [r['error'] is None for r in resumen['detalle']['+51999']] == [False, True]
+
+
+def test_destinos_repetidos_se_envian_una_vez(servidor_twilio):
+    with _motor(servidor_twilio, mensajes_por_segundo=None) as motor:
+        resumen = motor.enviar_lote(['+51999', 'whatsapp:+51999', '+51888', '+51999'],
+                                    [('hola', None)])
+
+    assert resumen['duplicados'] == 2
+    assert resumen['destinos'] == 2
+    assert resumen['enviados'] == 2
+    assert len(servidor_twilio.recibidos) == 2
+
+
+def test_timeout_de_lectura_no_se_reintenta(servidor_twilio):
+    # La API recibe el mensaje pero responde tarde: reintentar podría duplicarlo
+    servidor_twilio.demoras['lento'] = 1.0
+
+    with _motor(servidor_twilio, timeout=0.2, reintentos=3, mensajes_por_segundo=None) as motor:
+        with pytest.raises(EnvioIncierto):
+            motor.enviar('+51999', 'lento')
+        servidor_twilio.demoras['lento'] = 1.0
+        resumen = motor.enviar_lote(['+51888'], [('lento', None), ('sigue', None)])
+
+    assert [datos['Body'] for _, datos in servidor_twilio.recibidos].count('lento') == 2
+    assert resumen['fallidos'] == 1 and resumen['inciertos'] == 1 and resumen['enviados'] == 1
+    assert [r['incierto'] for r in resumen['detalle']['+51888']] == [True, False]
+
+
+def test_reintenta_si_no_puede_conectar(servidor_twilio):
+    with socket.socket() as libre:
+        libre.bind(('127.0.0.1', 0))
+        puerto = libre.getsockname()[1]
+    motor = MotorEnvio('AC123', 'token', '+10000000000', url_base=f"http://127.0.0.1:{puerto}",
+                       reintentos=2, espera_base=0.0, mensajes_por_segundo=None)
+    intentos = []
+    post = motor.sesion.post
+    motor.sesion.post = lambda *args, **kwargs: intentos.append(1) or post(*args, **kwargs)
+
+    with motor:
+        with pytest.raises(requests.ConnectionError):
+            motor.enviar('+51999', 'hola')
+
+    assert len(intentos) == 3
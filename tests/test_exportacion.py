@@ -0,0 +1,85 @@
+import json
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from analisis_por_bloques import AnalizadorVentasPorBloques
+from exportacion import ExportadorResultados
+from tipos_ventas import a_soles
+
+
+@pytest.fixture
+def analizado(analizador):
+    assert analizador.ejecutar_analisis_completo(generar_graficos=False)
+    return analizador
+
+
+def _leer(carpeta, nombre, formato):
+    if formato == 'csv':
+        return pd.read_csv(os.path.join(carpeta, f'{nombre}.csv'))
+    if formato == 'jsonl':
+        return pd.read_json(os.path.join(carpeta, f'{nombre}.jsonl'), lines=True)
+    if formato == 'parquet':
+        return pd.read_parquet(os.path.join(carpeta, f'{nombre}.parquet'))
+    with sqlite3.connect(os.path.join(carpeta, 'ventas.sqlite')) as conexion:
+        return pd.read_sql(f'SELECT * FROM "{nombre}"', conexion)
+
+
+@pytest.mark.parametrize('formato', ['csv', 'jsonl', 'parquet', 'sqlite'])
+def test_ida_y_vuelta_de_resultados_y_filas(analizado, tmp_path, formato):
+    if formato == 'parquet':
+        pytest.importorskip('pyarrow')
+    carpeta = str(tmp_path / 'exportacion')
+    with ExportadorResultados(carpeta, [formato], tamano_lote=700) as exportador:
+        exportador.escribir_resultados(analizado.resultados)
+        exportador.agregar_filas(analizado.df)
+
+    metricas = _leer(carpeta, 'metricas', formato).iloc[0]
+    for clave, valor in analizado.resultados['metricas'].items():
+        assert metricas[clave] == pytest.approx(valor)
+
+    sedes = _leer(carpeta, 'ventas_por_sede', formato).set_index('SEDE')['venta_sin_igv']
+    esperado = analizado.resultados['ventas_por_sede']
+    assert sedes.to_dict() == pytest.approx(esperado.to_dict())
+
+    # Varios lotes de 700 filas en la misma tabla, con los montos en soles
+    filas = _leer(carpeta, 'ventas', formato)
+    assert len(filas) == len(analizado.df)
+    assert filas['ID'].tolist() == analizado.df['ID'].tolist()
+    assert filas['PRECIO_SIN_IGV'].sum() == pytest.approx(a_soles(analizado.df['PRECIO_SIN_IGV']).sum())
+
+    diario = _leer(carpeta, 'ventas_diarias', formato)
+    assert diario['ventas'].sum() == analizado.resultados['metricas']['total_ventas']
+
+
+def test_sqlite_crea_indices_por_dimension(analizado, tmp_path):
+    carpeta = str(tmp_path / 'exportacion')
+    assert analizado.exportar_resultados(carpeta, ['sqlite'], incluir_filas=True)
+
+    with sqlite3.connect(os.path.join(carpeta, 'ventas.sqlite')) as conexion:
+        indices = {fila[0] for fila in conexion.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'ventas'")}
+    assert {'idx_ventas_fecha', 'idx_ventas_sede', 'idx_ventas_cliente'} <= indices
+
+
+def test_exportar_de_nuevo_reemplaza_las_filas(analizado, tmp_path):
+    carpeta = str(tmp_path / 'exportacion')
+    for _ in range(2):
+        assert analizado.exportar_resultados(carpeta, ['csv', 'jsonl'], incluir_filas=True)
+
+    assert len(_leer(carpeta, 'ventas', 'csv')) == len(analizado.df)
+    with open(os.path.join(carpeta, 'ventas.jsonl'), encoding='utf-8') as f:
+        assert sum(1 for linea in f if json.loads(linea)) == len(analizado.df)
+
+
+def test_por_bloques_exporta_cada_bloque(libro_ventas, analizado, tmp_path):
+    carpeta = str(tmp_path / 'exportacion')
+    with ExportadorResultados(carpeta, ['csv']) as exportador:
+        por_bloques = AnalizadorVentasPorBloques(libro_ventas, tamano_bloque=400, exportador=exportador)
+        assert por_bloques.ejecutar_analisis_completo(generar_graficos=False)
+
+    filas = _leer(carpeta, 'ventas', 'csv')
+    assert por_bloques.bloques_procesados > 1
+    assert sorted(filas['ID']) == sorted(analizado.df['ID'])
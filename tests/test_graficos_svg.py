@@ -0,0 +1,60 @@
+import os
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+
+from graficos_svg import GRAFICOS_SVG, PAGINA_HTML, generar_graficos
+
+SVG = '{http://www.w3.org/2000/svg}'
+
+
+def _resultados():
+    # Etiquetas con caracteres que hay que escapar en XML
+    sedes = pd.Series([52_340.5, 18_000.0, 7_250.25], index=pd.Index(['Ate', 'San Isidro', 'Surco & <Centro>'], name='SEDE'))
+    return {
+        'ventas_por_sede': sedes,
+        'top_modelos': pd.Series([40, 25, 9], index=pd.Index(['CIVIC', 'HR-V', 'CR-V "EX"'], name='MODELO_VEHICULO')),
+        'canales_ventas': pd.Series([60_000.0, 17_590.75], index=pd.Index(['CRM', 'Web'], name='CANAL_VENTA')),
+        'segmento_ventas': pd.Series([50_000.0, 27_590.75], index=pd.Index(['Persona', 'Empresa'], name='SEGMENTO_CLIENTE')),
+        'metricas': {'total_ventas': 74, 'clientes_unicos': 70, 'sedes_unicas': 3, 'modelos_unicos': 3,
+                     'venta_total_sin_igv': 77_590.75, 'venta_total_con_igv': 91_557.09,
+                     'igv_total': 13_966.34},
+    }
+
+
+def test_cada_grafico_es_svg_valido_y_la_pagina_los_incluye(tmp_path):
+    carpeta = str(tmp_path / 'graficos')
+
+    estado = generar_graficos(_resultados(), carpeta)
+
+    assert estado == dict.fromkeys(GRAFICOS_SVG)
+    for nombre in GRAFICOS_SVG:
+        raiz = ET.parse(os.path.join(carpeta, nombre + '.svg')).getroot()
+        assert raiz.tag == f'{SVG}svg'
+        assert next(raiz.iter(f'{SVG}text'), None) is not None
+    textos = ''.join(texto.text or '' for texto in
+                     ET.parse(os.path.join(carpeta, 'ventas_por_sede.svg')).iter(f'{SVG}text'))
+    assert 'Surco & <Centro>' in textos
+
+    with open(os.path.join(carpeta, PAGINA_HTML), encoding='utf-8') as f:
+        pagina = f.read()
+    cuerpo = ET.fromstring(pagina[pagina.index('<body>'):pagina.index('</html>')])
+    figuras = cuerpo.findall('figure')
+    assert len(figuras) == len(GRAFICOS_SVG)
+    for figura, nombre in zip(figuras, GRAFICOS_SVG):
+        with open(os.path.join(carpeta, nombre + '.svg'), encoding='utf-8') as f:
+            esperado = ET.fromstring(f.read().split('?>', 1)[-1].strip())
+        assert ET.tostring(figura.find(f'{SVG}svg')) == ET.tostring(esperado), nombre
+
+
+def test_faltan_resultados_solo_omite_sus_graficos(tmp_path):
+    resultados = _resultados()
+    del resultados['metricas']
+    carpeta = str(tmp_path / 'graficos')
+
+    estado = generar_graficos(resultados, carpeta)
+
+    assert estado['dashboard_resumen'].startswith("Faltan resultados")
+    assert not os.path.exists(os.path.join(carpeta, 'dashboard_resumen.svg'))
+    with open(os.path.join(carpeta, PAGINA_HTML), encoding='utf-8') as f:
+        assert f.read().count('<figure>') == len(GRAFICOS_SVG) - 1
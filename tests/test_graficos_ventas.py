@@ -0,0 +1,111 @@
+import os
+
+import pytest
+
+import graficos_ventas
+from graficos_ventas import GRAFICOS, generar_graficos
+
+
+@pytest.fixture
+def resultados(analizador):
+    assert analizador.ejecutar_analisis_completo(generar_graficos=False)
+    return dict(analizador.resultados)
+
+
+@pytest.fixture
+def renderizados(monkeypatch):
+    """Nombres de los gráficos que se dibujan en el proceso actual"""
+    nombres = []
+    original = graficos_ventas._renderizar
+
+    def contar(nombre, *args, **kwargs):
+        nombres.append(nombre)
+        return original(nombre, *args, **kwargs)
+
+    monkeypatch.setattr(graficos_ventas, '_renderizar', contar)
+    return nombres
+
+
+def test_segunda_llamada_con_los_mismos_datos_no_redibuja(resultados, tmp_path, renderizados):
+    carpeta = str(tmp_path / 'graficos')
+    assert not any(generar_graficos(resultados, carpeta, formato='movil').values())
+    assert sorted(renderizados) == sorted(GRAFICOS)
+
+    renderizados.clear()
+    assert generar_graficos(resultados, carpeta, formato='movil') == dict.fromkeys(GRAFICOS)
+    assert renderizados == []
+
+
+def test_solo_se_redibujan_los_graficos_afectados(resultados, tmp_path, renderizados, monkeypatch):
+    carpeta = str(tmp_path / 'graficos')
+    generar_graficos(resultados, carpeta, formato='movil')
+
+    # Nuevos datos de una sede: su gráfico y el dashboard, que también la usa
+    renderizados.clear()
+    resultados['ventas_por_sede'] = resultados['ventas_por_sede'] * 2
+    generar_graficos(resultados, carpeta, formato='movil')
+    assert sorted(renderizados) == ['dashboard_resumen', 'ventas_por_sede']
+
+    # Otra resolución cambia todos los archivos
+    renderizados.clear()
+    generar_graficos(resultados, carpeta, formato='png', nombres=['top_modelos'])
+    assert renderizados == ['top_modelos']
+
+    # Otro estilo también
+    renderizados.clear()
+    monkeypatch.setattr(graficos_ventas, 'ESTILO', 'ggplot')
+    generar_graficos(resultados, carpeta, formato='png', nombres=['top_modelos', 'canales_ventas'])
+    assert sorted(renderizados) == ['canales_ventas', 'top_modelos']
+
+
+def test_un_archivo_borrado_se_vuelve_a_dibujar(resultados, tmp_path, renderizados):
+    carpeta = str(tmp_path / 'graficos')
+    generar_graficos(resultados, carpeta, formato='movil')
+    os.remove(os.path.join(carpeta, 'canales_ventas.png'))
+
+    renderizados.clear()
+    generar_graficos(resultados, carpeta, formato='movil')
+    assert renderizados == ['canales_ventas']
+
+
+def test_pool_y_serie_producen_los_mismos_archivos(resultados, tmp_path):
+    serie, pool = str(tmp_path / 'serie'), str(tmp_path / 'pool')
+
+    assert not any(generar_graficos(resultados, serie, formato='movil', usar_cache=False).values())
+    assert not any(generar_graficos(resultados, pool, paralelo=True, max_procesos=2,
+                                    formato='movil', usar_cache=False).values())
+
+    for nombre in GRAFICOS:
+        with open(os.path.join(serie, nombre + '.png'), 'rb') as a, \
+                open(os.path.join(pool, nombre + '.png'), 'rb') as b:
+            assert a.read() == b.read(), nombre
+
+
+@pytest.mark.parametrize('paralelo', [False, True])
+def test_un_grafico_que_falla_no_impide_los_demas(resultados, tmp_path, monkeypatch, paralelo):
+    def falla(*args, **kwargs):
+        raise ValueError("serie vacía")
+
+    _, claves, figsize = GRAFICOS['top_modelos']
+    monkeypatch.setitem(GRAFICOS, 'top_modelos', (falla, claves, figsize))
+    carpeta = str(tmp_path / 'graficos')
+
+    estado = generar_graficos(resultados, carpeta, paralelo=paralelo, max_procesos=2, formato='movil')
+
+    assert estado['top_modelos'] == "ValueError: serie vacía"
+    otros = [nombre for nombre in GRAFICOS if nombre != 'top_modelos']
+    assert all(estado[nombre] is None for nombre in otros)
+    assert sorted(archivo for archivo in os.listdir(carpeta) if archivo.endswith('.png')) == \
+        sorted(nombre + '.png' for nombre in otros)
+    # El gráfico con error no entra en el manifiesto: la próxima vez se reintenta
+    assert 'top_modelos' not in graficos_ventas._leer_manifiesto(carpeta)
+
+
+def test_faltan_resultados_se_informa_por_grafico(resultados, tmp_path):
+    del resultados['segmento_ventas']
+
+    estado = generar_graficos(resultados, str(tmp_path / 'graficos'), formato='movil')
+
+    assert estado['segmento_clientes'].startswith("Faltan resultados")
+    assert estado['dashboard_resumen'].startswith("Faltan resultados")
+    assert estado['ventas_por_sede'] is None
@@ -0,0 +1,79 @@
+from grafo_metricas import ResultadosPerezosos
+from ventas_rpa import AnalizadorVentas
+
+
+def test_top_n_distinto_no_oculta_las_demas_metricas(analizador):
+    assert analizador.preparar_datos()
+    top = analizador.top_modelos_vendidos(top_n=3)
+
+    assert len(top) == 3
+    assert analizador.resultados['top_modelos'].equals(top)
+    ventas_sede = analizador.analizar_ventas_por_sede()
+    assert ventas_sede.sum() == analizador.df['PRECIO_SIN_IGV'].sum() / 100
+    reporte = analizador.generar_reporte_texto()
+    assert reporte != "No hay resultados disponibles"
+    assert 'MÉTRICAS GENERALES' in reporte
+
+
+def test_calculo_perezoso_y_memorizado(analizador):
+    assert analizador.preparar_datos()
+    resultados = analizador.resultados
+
+    resultados['ventas_por_sede']
+    resultados['ventas_por_sede']
+    assert resultados.calculadas == 1
+    resultados['top_modelos']
+    assert resultados.calculadas == 2
+
+
+def test_invalidar_columna_recalcula_solo_dependientes(analizador):
+    assert analizador.preparar_datos()
+    resultados = analizador.resultados
+    antes = resultados['ventas_por_sede'].sum()
+    resultados['top_modelos']
+    calculadas = resultados.calculadas
+
+    analizador.df['PRECIO_SIN_IGV'] = analizador.df['PRECIO_SIN_IGV'] * 2
+    resultados.invalidar('PRECIO_SIN_IGV')
+
+    assert resultados['ventas_por_sede'].sum() == 2 * antes
+    resultados['top_modelos']
+    assert resultados.calculadas == calculadas + 1
+
+
+def test_asignar_metricas_manda_sobre_sus_componentes(analizador):
+    assert analizador.preparar_datos()
+    resultados = analizador.resultados
+    metricas = dict(resultados['metricas'], total_ventas=-1)
+
+    resultados['metricas'] = metricas
+
+    assert resultados['total_ventas'] == -1
+    assert 'ventas_por_sede' in resultados
+
+
+def test_reemplazo_completo_congela(analizador):
+    assert analizador.preparar_datos()
+    fijos = {'metricas': {'total_ventas': 5}}
+
+    analizador.resultados = fijos
+
+    assert list(analizador.resultados) == ['metricas']
+    assert 'ventas_por_sede' not in analizador.resultados
+    assert analizador.resultados['total_ventas'] == 5
+
+
+def test_sin_datos_no_hay_resultados():
+    resultados = ResultadosPerezosos(lambda: None)
+    assert len(resultados) == 0
+    assert 'metricas' not in resultados
+
+
+def test_df_nuevo_descarta_valores_asignados(libro_ventas):
+    analizador = AnalizadorVentas(libro_ventas, usar_cache=False)
+    assert analizador.preparar_datos()
+    analizador.resultados = {'metricas': {}}
+
+    assert analizador.preparar_datos()
+
+    assert analizador.resultados['metricas']['total_ventas'] == len(analizador.df)
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indice_vehiculos import ATRIBUTOS_VEHICULO, IndiceVehiculos, obtener_indice
+
+
+def _vehiculos(ids):
+    n = len(ids)
+    return pd.DataFrame({
+        'ID_Vehiculo': ids,
+        'MARCA': ['HONDA', 'TOYOTA', 'KIA', 'HONDA'][:n],
+        'MODELO': ['CIVIC', 'YARIS', 'RIO', 'HR-V'][:n],
+        'TIPO VEHÍCULO': ['SEDAN', 'HATCHBACK', 'SEDAN', 'SUV'][:n],
+        'AÑO': [2015, 2016, 2017, 2018][:n],
+    })
+
+
+def _comparar_con_merge(df_vehiculos, ids_ventas):
+    ventas = pd.DataFrame({'ID': range(len(ids_ventas)), 'ID_Vehículo': ids_ventas})
+    esperado = ventas.merge(df_vehiculos, left_on='ID_Vehículo', right_on='ID_Vehiculo', how='left')
+
+    enriquecido = IndiceVehiculos(df_vehiculos).enriquecer(ventas.copy())
+
+    assert len(enriquecido) == len(ventas)
+    for columna in ATRIBUTOS_VEHICULO:
+        obtenido = enriquecido[columna].astype(object).where(enriquecido[columna].notna(), None)
+        referencia = esperado[columna].astype(object).where(esperado[columna].notna(), None)
+        assert obtenido.tolist() == referencia.tolist(), columna
+
+
+@pytest.mark.parametrize('ids_catalogo', [
+    [1, 2, 3, 5],                      # denso
+    [10, 2_000_000_000, 7, 123_456],   # disperso: tabla hash
+])
+def test_enriquecer_igual_que_merge_por_la_izquierda(ids_catalogo):
+    presentes = ids_catalogo * 3
+    # IDs que no están en VEHICULOS, vacíos, negativos y fuera de rango
+    ausentes = [4, 999_999_999_999, -1, np.nan, 0]
+    ids_ventas = pd.Series(presentes + ausentes, dtype='float64').sample(frac=1, random_state=1).tolist()
+
+    _comparar_con_merge(_vehiculos(ids_catalogo), ids_ventas)
+
+
+def test_ids_duplicados_en_el_catalogo_usan_la_primera_aparicion():
+    catalogo = _vehiculos([1, 2, 2, 3])
+    ventas = pd.DataFrame({'ID_Vehículo': [2, 3]})
+
+    enriquecido = IndiceVehiculos(catalogo).enriquecer(ventas)
+
+    assert enriquecido['MODELO'].tolist() == ['YARIS', 'HR-V']
+
+
+def test_el_indice_se_reutiliza_si_el_catalogo_no_cambia():
+    catalogo = _vehiculos([1, 2, 3, 5])
+
+    assert obtener_indice(catalogo) is obtener_indice(catalogo.copy())
+    assert obtener_indice(catalogo) is not obtener_indice(_vehiculos([1, 2, 3, 6]))
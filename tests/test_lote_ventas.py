@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+from openpyxl import Workbook
+
+from crear_datos_prueba import _escribir_hoja, generar_vehiculos, generar_ventas
+from lote_ventas import ejecutar_lote, expandir_entradas
+from ventas_rpa import AnalizadorVentas
+
+
+def _ventas(semilla, id_inicial, n=800):
+    return generar_ventas(n, id_inicial=id_inicial, rng=np.random.default_rng(semilla), clientes=2_000)
+
+
+def _libro(ruta, ventas):
+    """Libro con el mismo catálogo de VEHICULOS y NUEVOS REGISTROS vacía"""
+    libro = Workbook(write_only=True)
+    _escribir_hoja(libro, 'VENTAS', ventas)
+    _escribir_hoja(libro, 'VEHICULOS', [generar_vehiculos()])
+    _escribir_hoja(libro, 'NUEVOS REGISTROS', [ventas[0].head(0)])
+    libro.save(ruta)
+    return str(ruta)
+
+
+def _metricas_completas(ruta):
+    analizador = AnalizadorVentas(ruta, usar_cache=False)
+    assert analizador.ejecutar_analisis_completo(generar_graficos=False)
+    return analizador.resultados['metricas']
+
+
+def test_consolidar_en_el_pool_igual_que_un_solo_libro(tmp_path):
+    lunes, martes = _ventas(1, 1), _ventas(2, 801)
+    libros = [_libro(tmp_path / 'lunes.xlsx', [lunes]), _libro(tmp_path / 'martes.xlsx', [martes])]
+    esperado = _metricas_completas(_libro(tmp_path / 'semana.xlsx', [lunes, martes]))
+
+    consolidado, estados = ejecutar_lote(libros, max_procesos=2, graficos=False,
+                                         carpeta_salida=str(tmp_path / 'salida'),
+                                         carpeta_agregados=str(tmp_path / 'agregados'))
+
+    assert [estado['ok'] for estado in estados] == [True, True]
+    assert consolidado.resultados['metricas'] == esperado
+
+    # Un día ya analizado entra como agregados JSON junto a un libro nuevo
+    consolidado, estados = ejecutar_lote([str(tmp_path / 'agregados' / 'lunes.json'), libros[1]],
+                                         max_procesos=1, graficos=False,
+                                         carpeta_salida=str(tmp_path / 'salida'))
+    assert [estado['archivo'] for estado in estados] == [str(tmp_path / 'agregados' / 'lunes.json'),
+                                                         libros[1]]
+    assert consolidado.resultados['metricas'] == esperado
+
+
+def test_un_libro_con_error_no_detiene_el_lote(tmp_path):
+    libro = _libro(tmp_path / 'lunes.xlsx', [_ventas(1, 1)])
+    roto = tmp_path / 'roto.xlsx'
+    roto.write_bytes(b'no es un zip')
+
+    consolidado, estados = ejecutar_lote([libro, str(roto)], max_procesos=1, graficos=False,
+                                         carpeta_salida=str(tmp_path / 'salida'))
+
+    assert [estado['ok'] for estado in estados] == [True, False]
+    assert estados[1]['error']
+    assert consolidado.resultados['metricas']['total_ventas'] == 800
+
+
+def test_expandir_entradas_ignora_temporales_y_duplicados(tmp_path):
+    carpeta = tmp_path / 'ventas'
+    carpeta.mkdir()
+    for nombre in ['b.xlsx', 'a.xlsx', '~$a.xlsx', 'notas.txt', 'dia.json', 'macro.xlsm']:
+        (carpeta / nombre).write_bytes(b'')
+
+    archivos = expandir_entradas([str(carpeta), str(carpeta / '*.xlsx')])
+
+    assert [os.path.basename(archivo) for archivo in archivos] == ['a.xlsx', 'b.xlsx', 'dia.json', 'macro.xlsm']
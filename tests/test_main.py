@@ -0,0 +1,57 @@
+import os
+
+import envio_masivo
+import main
+
+
+def _motor_contra(servidor, monkeypatch):
+    """MotorEnvio que apunta al servidor de prueba en vez de a la API real"""
+    class MotorPrueba(envio_masivo.MotorEnvio):
+        def __init__(self, *args, **opciones):
+            super().__init__(*args, url_base=servidor.url, espera_base=0.0, **opciones)
+    monkeypatch.setattr(envio_masivo, 'MotorEnvio', MotorPrueba)
+
+
+def test_send_dibuja_los_graficos_antes_de_publicarlos(libro_ventas, tmp_path, monkeypatch,
+                                                       servidor_twilio):
+    carpeta = tmp_path / 'graficos'
+    carpeta.mkdir()
+    # Un gráfico viejo de otros datos no debe publicarse tal cual
+    (carpeta / 'ventas_por_sede.png').write_bytes(b'viejo')
+    publicados = {}
+
+    def publicar(carpeta_graficos):
+        publicados.update({nombre: open(os.path.join(carpeta_graficos, nombre + '.png'), 'rb').read()
+                           for nombre in main.ETIQUETAS_GRAFICOS})
+        return {'ventas_por_sede': 'https://img/sede.png'}
+
+    monkeypatch.setattr(main, 'IMGBB_API_KEY', 'clave')
+    monkeypatch.setattr(main, 'publicar_graficos', publicar)
+    _motor_contra(servidor_twilio, monkeypatch)
+
+    assert main.main(['--archivo', libro_ventas, 'send', '+51999', '--graficos', str(carpeta)])
+
+    assert set(publicados) == set(main.ETIQUETAS_GRAFICOS)
+    assert all(contenido.startswith(b'\x89PNG') for contenido in publicados.values())
+    [(_, datos)] = servidor_twilio.recibidos
+    assert 'https://img/sede.png' in datos['Body']
+
+
+def test_send_usa_el_motor_masivo(libro_ventas, monkeypatch, servidor_twilio):
+    monkeypatch.setattr(main, 'IMGBB_API_KEY', '')
+    _motor_contra(servidor_twilio, monkeypatch)
+    servidor_twilio.fallos = {}
+
+    assert main.main(['--archivo', libro_ventas, 'send', '+51999', '+51888', '+51999'])
+
+    destinos = sorted(datos['To'] for _, datos in servidor_twilio.recibidos)
+    assert destinos == ['whatsapp:+51888', 'whatsapp:+51999']
+
+
+def test_send_falla_si_algun_envio_falla(libro_ventas, monkeypatch, servidor_twilio):
+    monkeypatch.setattr(main, 'IMGBB_API_KEY', '')
+    _motor_contra(servidor_twilio, monkeypatch)
+    monkeypatch.setattr(main, 'generar_reporte_completo', lambda analizador, enlaces: 'roto')
+    servidor_twilio.fallos['roto'] = [400]
+
+    assert not main.main(['--archivo', libro_ventas, 'send', '+51999'])
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from motor_agregacion import AgregadosVentas, agregar_dataframe
+from tipos_ventas import centimos, sumar_montos
+
+FILAS = 20_000
+
+
+def _ventas_en_soles(semilla=3):
+    """
+    Montos float64 en soles con céntimos (su suma en float depende del orden)
+    y dimensiones categóricas, como tras tipar_dataframe
+    """
+    rng = np.random.default_rng(semilla)
+    sin_igv = rng.integers(1, 5_000_000, size=FILAS) / 100
+    df = pd.DataFrame({
+        'SEDE': rng.choice(['Lima', 'Cusco', 'Arequipa'], size=FILAS),
+        'CANAL_VENTA': rng.choice(['Web', 'Tienda'], size=FILAS),
+        'SEGMENTO_CLIENTE': rng.choice(['Retail', 'Corporativo'], size=FILAS),
+        'MODELO_VEHICULO': rng.choice(['A', 'B', 'C', 'D'], size=FILAS),
+        'CLIENTE': [f'cliente {i}' for i in rng.integers(0, 8_000, size=FILAS)],
+        'PRECIO_SIN_IGV': sin_igv,
+        'PRECIO_VENTA': np.round(sin_igv * 1.18, 2),
+        'IGV': np.full(FILAS, 0.18),
+        'FECHA': pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 90, size=FILAS), unit='D'),
+    })
+    dimensiones = ['SEDE', 'CANAL_VENTA', 'SEGMENTO_CLIENTE', 'MODELO_VEHICULO', 'CLIENTE']
+    return df.astype({columna: 'category' for columna in dimensiones})
+
+
+def _por_particiones(df, cortes, orden):
+    limites = list(zip([0] + cortes, cortes + [len(df)]))
+    partes = [df.iloc[inicio:fin] for inicio, fin in limites]
+    agregados = AgregadosVentas()
+    for indice in orden:
+        agregados.combinar(agregar_dataframe(partes[indice]))
+    return agregados
+
+
+def test_totales_exactos_al_centimo_sin_importar_las_particiones():
+    df = _ventas_en_soles()
+    # Total exacto con enteros de Python, céntimo a céntimo
+    exacto = sum(int(round(valor * 100)) for valor in df['PRECIO_SIN_IGV'])
+    completo = agregar_dataframe(df)
+
+    particiones = [
+        _por_particiones(df, [7, 8_000, 8_001, 15_000], [4, 2, 0, 3, 1]),
+        _por_particiones(df, list(range(1_000, FILAS, 1_000)), list(range(19, -1, -1))),
+    ]
+
+    assert completo.venta_total_sin_igv == exacto
+    for agregados in particiones:
+        assert agregados.venta_total_sin_igv == exacto
+        assert agregados.venta_total_con_igv == completo.venta_total_con_igv
+        assert agregados.ventas_por_sede == completo.ventas_por_sede
+        assert agregados.a_resultados()['metricas'] == completo.a_resultados()['metricas']
+        pd.testing.assert_frame_equal(agregados.cubo.datos, completo.cubo.datos)
+
+
+def test_centimos_redondea_y_suma_en_enteros():
+    serie = pd.Series([0.1] * 10 + [None])
+
+    assert centimos(serie).tolist() == [10] * 10 + [0]
+    assert sumar_montos(serie) == 1.0
+    assert sumar_montos(pd.Series([1999, 1], dtype='int32')) == 20.0
+
+
+def test_guardar_y_cargar_conserva_los_agregados(tmp_path):
+    df = _ventas_en_soles()
+    agregados = agregar_dataframe(df, umbral_exacto=2_000)
+    ruta = str(tmp_path / 'agregados.json')
+
+    agregados.guardar(ruta)
+    cargados = AgregadosVentas.cargar(ruta)
+
+    assert cargados.a_resultados()['metricas'] == agregados.a_resultados()['metricas']
+    assert cargados.clientes_por_sede['Lima'].cardinalidad() == agregados.clientes_por_sede['Lima'].cardinalidad()
+    pd.testing.assert_frame_equal(cargados.cubo.datos, agregados.cubo.datos)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from perfilado import Perfilador, reiniciar_rss_pico
+
+MB = 1024 ** 2
+
+
+def _etapas(perfilador):
+    return {registro['ruta']: registro for registro in perfilador.a_dict()['etapas']}
+
+
+@pytest.mark.skipif(not reiniciar_rss_pico(), reason="el pico de RSS solo se reinicia en Linux")
+def test_el_pico_de_rss_es_el_de_cada_etapa():
+    perfilador = Perfilador()
+    with perfilador.etapa('carga'):
+        with perfilador.etapa('pesada'):
+            datos = np.ones(300 * MB // 8)
+            datos.sum()
+            del datos
+        with perfilador.etapa('ligera'):
+            sum(range(1000))
+    with perfilador.etapa('despues'):
+        pass
+
+    etapas = _etapas(perfilador)
+    pesada = etapas['carga;pesada']['rss_pico_bytes']
+    # Las etapas posteriores no heredan el pico de la anterior
+    assert etapas['carga;ligera']['rss_pico_bytes'] < pesada - 200 * MB
+    assert etapas['despues']['rss_pico_bytes'] < pesada - 200 * MB
+    # La etapa padre y el proceso sí incluyen el pico de sus hijas
+    assert etapas['carga']['rss_pico_bytes'] >= pesada
+    assert perfilador.a_dict()['rss_pico_bytes'] >= pesada
+
+
+def test_etapas_anidadas_acumulan_tiempo_y_filas():
+    perfilador = Perfilador()
+    for _ in range(3):
+        with perfilador.etapa('bloques'):
+            with perfilador.etapa('lectura_bloque') as etapa:
+                etapa['filas'] = 10
+
+    etapas = _etapas(perfilador)
+    assert etapas['bloques;lectura_bloque']['llamadas'] == 3
+    assert etapas['bloques;lectura_bloque']['filas'] == 30
+    assert etapas['bloques']['pared_s'] >= etapas['bloques;lectura_bloque']['pared_s']
+    assert etapas['bloques']['rss_pico_bytes'] > 0
+
+
+def test_perfilador_inactivo_no_mide():
+    perfilador = Perfilador(activo=False)
+    with perfilador.etapa('carga') as etapa:
+        etapa['filas'] = 5
+    assert perfilador.a_dict()['etapas'] == []
@@ -0,0 +1,63 @@
+import pytest
+
+import graficos_ventas
+from personalizacion import Destinatario, ReportesPersonalizados
+from publicacion_graficos import ETIQUETAS_GRAFICOS
+from tipos_ventas import ESCALA_MONEDA
+
+
+@pytest.fixture
+def completo(analizador):
+    assert analizador.ejecutar_analisis_completo(generar_graficos=False)
+    return analizador
+
+
+def test_totales_de_una_sede_igual_que_filtrar_el_dataframe(completo):
+    personalizados = ReportesPersonalizados(completo)
+    resultados = personalizados.resultados(Destinatario('Gerente Ate', '+51999999999', {'SEDE': 'Ate'}))
+
+    df = completo.df[completo.df['SEDE'] == 'Ate']
+    metricas = resultados['metricas']
+    assert metricas['total_ventas'] == len(df)
+    assert metricas['venta_total_sin_igv'] == df['PRECIO_SIN_IGV'].sum() / ESCALA_MONEDA
+    assert metricas['venta_total_con_igv'] == df['PRECIO_VENTA'].sum() / ESCALA_MONEDA
+    assert metricas['clientes_unicos'] == df['CLIENTE'].nunique()
+    assert metricas['sedes_unicas'] == 1
+    assert metricas['modelos_unicos'] == df['MODELO_VEHICULO'].nunique()
+    assert list(resultados['ventas_por_sede'].index) == ['Ate']
+
+    canales = df.groupby('CANAL_VENTA', observed=True)['PRECIO_SIN_IGV'].sum()
+    for canal, venta in resultados['canales_ventas'].items():
+        assert venta == canales[canal] / ESCALA_MONEDA
+    modelos = df['MODELO_VEHICULO'].value_counts()
+    for modelo, cantidad in resultados['top_modelos'].items():
+        assert cantidad == modelos[modelo]
+
+
+def test_destinatarios_con_el_mismo_filtro_comparten_resultados(completo, monkeypatch, tmp_path):
+    personalizados = ReportesPersonalizados(completo)
+    destinatarios = [
+        Destinatario('Gerente Ate', '+51911111111', {'SEDE': 'Ate'}),
+        Destinatario('Jefe de tienda Ate', '+51922222222', {'SEDE': ['Ate']}),
+        Destinatario('Gerente Norte', '+51933333333', {'SEDE': ['San Miguel', 'Ate']}),
+        Destinatario('Gerente Norte (copia)', '+51944444444', {'SEDE': ['Ate', 'San Miguel']}),
+    ]
+    assert personalizados.resultados(destinatarios[0]) is personalizados.resultados(destinatarios[1])
+    assert personalizados.resultados(destinatarios[2]) is personalizados.resultados(destinatarios[3])
+
+    dibujados = []
+    monkeypatch.setattr(graficos_ventas, 'generar_graficos',
+                        lambda resultados, carpeta, **opciones: dibujados.append(carpeta) or {})
+    carpetas = personalizados.generar_graficos(destinatarios, str(tmp_path / 'graficos'))
+
+    assert len(carpetas) == 2
+    assert sorted(dibujados) == sorted(carpetas.values())
+
+
+def test_reporte_enlaza_los_graficos_publicados(completo):
+    personalizados = ReportesPersonalizados(completo)
+    enlaces = {'ventas_por_sede': 'https://ejemplo.com/sede.png'}
+
+    reporte = personalizados.reporte(Destinatario('Gerente Ate', None, {'SEDE': 'Ate'}), enlaces)
+
+    assert f"{ETIQUETAS_GRAFICOS['ventas_por_sede']}: https://ejemplo.com/sede.png" in reporte
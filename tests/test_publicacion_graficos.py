@@ -0,0 +1,84 @@
+import os
+
+import pytest
+from PIL import Image
+
+import main
+from publicacion_graficos import AlmacenamientoLocal, PublicadorGraficos
+
+
+class AlmacenamientoContado(AlmacenamientoLocal):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.subidas = []
+
+    def subir(self, nombre, contenido):
+        self.subidas.append(nombre)
+        return super().subir(nombre, contenido)
+
+
+def _png(ruta, color, ancho=200):
+    Image.new('RGB', (ancho, 100), color).save(ruta)
+    return str(ruta)
+
+
+@pytest.fixture
+def graficos(tmp_path):
+    carpeta = tmp_path / 'graficos'
+    carpeta.mkdir()
+    return {
+        'ventas_por_sede': _png(carpeta / 'ventas_por_sede.png', 'red'),
+        'top_modelos': _png(carpeta / 'top_modelos.png', 'blue'),
+        # Mismo contenido que ventas_por_sede con otro nombre
+        'canales_ventas': _png(carpeta / 'canales_ventas.png', 'red'),
+    }
+
+
+def test_no_vuelve_a_subir_contenido_ya_publicado(graficos, tmp_path):
+    almacenamiento = AlmacenamientoContado(str(tmp_path / 'publicados'), 'https://cdn.ejemplo.com/g/')
+    enlaces = PublicadorGraficos(almacenamiento, max_hilos=1).publicar(graficos)
+
+    assert set(enlaces) == set(graficos)
+    assert enlaces['canales_ventas'] == enlaces['ventas_por_sede']
+    assert len(almacenamiento.subidas) == 2
+    assert all(url.startswith('https://cdn.ejemplo.com/g/') for url in enlaces.values())
+
+    # Otra ejecución lee el índice guardado: nada nuevo que subir
+    almacenamiento.subidas.clear()
+    assert PublicadorGraficos(almacenamiento).publicar(graficos) == enlaces
+    assert almacenamiento.subidas == []
+
+    # Solo se sube el gráfico cuyo contenido cambió
+    _png(graficos['top_modelos'], 'green')
+    nuevos = PublicadorGraficos(almacenamiento).publicar(graficos)
+    assert len(almacenamiento.subidas) == 1
+    assert nuevos['top_modelos'] != enlaces['top_modelos']
+    assert nuevos['ventas_por_sede'] == enlaces['ventas_por_sede']
+
+
+def test_comprime_para_movil(graficos, tmp_path):
+    ancho = _png(tmp_path / 'ancho.png', 'white', ancho=3000)
+    almacenamiento = AlmacenamientoLocal(str(tmp_path / 'publicados'), 'http://localhost')
+
+    enlaces = PublicadorGraficos(almacenamiento, ancho_maximo=1280).publicar({'ancho': ancho})
+
+    with Image.open(tmp_path / 'publicados' / os.path.basename(enlaces['ancho'])) as imagen:
+        assert imagen.width == 1280
+
+
+def test_almacenamiento_local_desde_la_configuracion(graficos, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, 'ALMACENAMIENTO', 'local')
+    monkeypatch.setattr(main, 'IMGBB_API_KEY', '')
+    monkeypatch.setattr(main, 'URL_BASE', '')
+    assert not main.publicacion_configurada()
+    assert main.publicar_graficos(os.path.dirname(graficos['top_modelos'])) == {}
+
+    monkeypatch.setattr(main, 'URL_BASE', 'http://intranet/graficos')
+    monkeypatch.setattr(main, 'CARPETA_PUBLICACION', str(tmp_path / 'publicados'))
+    assert main.publicacion_configurada()
+    enlaces = main.publicar_graficos(os.path.dirname(graficos['top_modelos']))
+
+    assert set(enlaces) == set(graficos)
+    for url in enlaces.values():
+        assert url.startswith('http://intranet/graficos/')
+        assert (tmp_path / 'publicados' / url.rsplit('/', 1)[1]).exists()
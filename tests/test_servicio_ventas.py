@@ -0,0 +1,105 @@
+import json
+import os
+import shutil
+import threading
+from urllib.request import urlopen
+
+import pytest
+
+import servicio_ventas
+from servicio_ventas import ServicioVentas, crear_servidor, huella_archivo
+
+
+@pytest.fixture
+def libro(libro_ventas, tmp_path):
+    """Copia del libro que cada prueba puede modificar"""
+    return shutil.copy(libro_ventas, tmp_path / 'ventas.xlsx')
+
+
+@pytest.fixture
+def cargas(monkeypatch):
+    """Cuenta los AnalizadorVentas que crea el servicio"""
+    creados = []
+    original = servicio_ventas.AnalizadorVentas
+
+    def contar(*args, **kwargs):
+        creados.append(args[0])
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(servicio_ventas, 'AnalizadorVentas', contar)
+    return creados
+
+
+def _tocar(ruta):
+    """Cambia la fecha de modificación sin cambiar el contenido"""
+    mtime_ns = os.stat(ruta).st_mtime_ns + 1_000_000_000
+    os.utime(ruta, ns=(mtime_ns, mtime_ns))
+
+
+def test_solo_recarga_si_cambia_la_huella(libro, cargas):
+    servicio = ServicioVentas(str(libro))
+
+    assert servicio.actualizar()
+    assert not servicio.actualizar()
+    assert not servicio.actualizar()
+    assert len(cargas) == 1 and servicio.cargas == 1
+
+    _tocar(libro)
+    assert servicio.actualizar()
+    assert len(cargas) == 2
+    assert servicio.huella == huella_archivo(str(libro))
+
+    assert servicio.actualizar(forzar=True)
+    assert len(cargas) == 3
+
+
+def test_una_recarga_fallida_mantiene_el_estado_anterior(libro, cargas):
+    servicio = ServicioVentas(str(libro))
+    assert servicio.actualizar()
+    anterior = servicio.analizador
+    metricas = servicio.metricas()
+
+    with open(libro, 'wb') as f:
+        f.write(b'libro a medio guardar')
+
+    assert not servicio.actualizar()
+    assert servicio.analizador is anterior
+    assert servicio.metricas() == metricas
+    assert servicio.ultimo_error
+    assert servicio.salud()['estado'] == 'ok'
+    # La huella fallida se recuerda: no se reintenta hasta que el libro cambie
+    assert not servicio.actualizar()
+    assert len(cargas) == 2
+
+
+def test_metricas_por_http_son_json_valido(libro):
+    servicio = ServicioVentas(str(libro))
+    assert servicio.actualizar()
+    servidor = crear_servidor(servicio, puerto=0)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    try:
+        url = f"http://127.0.0.1:{servidor.server_address[1]}"
+        with urlopen(url + '/metricas', timeout=10) as respuesta:
+            assert respuesta.headers.get_content_type() == 'application/json'
+            cuerpo = respuesta.read().decode('utf-8')
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+    def rechazar(constante):
+        raise ValueError(f"{constante} no es JSON estándar")
+
+    datos = json.loads(cuerpo, parse_constant=rechazar)
+    esperado = servicio.analizador.resultados['metricas']
+    assert datos['metricas']['total_ventas'] == esperado['total_ventas']
+    assert datos['metricas']['venta_total_sin_igv'] == pytest.approx(esperado['venta_total_sin_igv'])
+    assert datos['ventas_por_sede']
+    assert 'cubo_temporal' not in datos
+
+
+def test_sin_datos_responde_503(tmp_path):
+    servicio = ServicioVentas(str(tmp_path / 'no_existe.xlsx'))
+    assert not servicio.actualizar()
+    with pytest.raises(LookupError, match='No se encuentra'):
+        servicio.metricas()
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tipos_ventas import (ESCALA_MONEDA, a_soles, centimos, escalar_montos, sumar_montos,
+                          sumar_montos_por, tipar_dataframe)
+
+
+@pytest.mark.parametrize('soles, esperado', [
+    (0.1 + 0.2, 30),
+    (1.005, 101),
+    (2.675, 268),
+    (1234.565, 123457),
+    (-1.005, -101),
+    (0.004999, 0),
+    (19.99, 1999),
+])
+def test_centimos_redondea_al_centimo(soles, esperado):
+    assert centimos(pd.Series([soles])).tolist() == [esperado]
+
+
+def test_centimos_nulos_cuentan_cero():
+    assert centimos(pd.Series([1.5, np.nan, None], dtype='float64')).tolist() == [150, 0, 0]
+    assert centimos(pd.Series([150, None], dtype='Int64')).tolist() == [150, 0]
+
+
+def test_sumas_exactas_sin_depender_del_orden():
+    montos = pd.Series([0.1] * 10 + [0.2] * 10 + [1.005])
+    assert sumar_montos(montos) == 4.01
+    assert sumar_montos(montos[::-1]) == sumar_montos(montos)
+
+
+def test_escalar_montos_solo_si_no_pierde_precision():
+    escalada = escalar_montos(pd.Series([0.1 + 0.2, 19.99, 1_000_000.5]))
+    assert escalada.dtype == 'int32'
+    assert escalada.tolist() == [30, 1999, 100_000_050]
+    # Con medio céntimo o nulos se queda en soles, pero suma lo mismo
+    for serie in [pd.Series([1.005, 2.0]), pd.Series([1.0, np.nan])]:
+        resultado = escalar_montos(serie)
+        assert resultado.dtype == 'float64'
+        assert sumar_montos(resultado) == sumar_montos(serie)
+
+
+def _ventas(n=3_000, semilla=7):
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        'SEDE': rng.choice(['Ate', 'San Miguel', 'La Molina', None], n).astype(object),
+        'CANAL_VENTA': rng.choice(['Tienda', 'Web', 'Teléfono'], n).astype(object),
+        'MODELO_VEHICULO': rng.choice([f"Modelo {i}" for i in range(40)], n).astype(object),
+        'PRECIO_VENTA': np.round(rng.uniform(10_000, 90_000, n), 2),
+        'PRECIO_SIN_IGV': np.round(rng.uniform(8_000, 75_000, n), 2),
+    })
+
+
+def _como_objeto(indice):
+    """Índice categórico -> etiquetas de texto, para comparar con el groupby original"""
+    if isinstance(indice, pd.MultiIndex):
+        return indice.set_levels([nivel.astype(object) for nivel in indice.levels])
+    return indice.astype(object)
+
+
+@pytest.mark.parametrize('claves', [['SEDE'], ['CANAL_VENTA', 'SEDE'], ['MODELO_VEHICULO']])
+def test_categoricas_conservan_los_groupby(claves):
+    original = _ventas()
+    tipado, _ = tipar_dataframe(original.copy())
+    assert all(isinstance(tipado[clave].dtype, pd.CategoricalDtype) for clave in claves)
+    assert pd.api.types.is_integer_dtype(tipado['PRECIO_VENTA'].dtype)
+
+    esperado = original.groupby(claves)['PRECIO_VENTA'].agg(['sum', 'count'])
+    obtenido = tipado.groupby(claves, observed=True)['PRECIO_VENTA'].agg(['sum', 'count'])
+    obtenido.index = _como_objeto(obtenido.index)
+    assert obtenido.index.equals(esperado.index)
+    assert obtenido['count'].tolist() == esperado['count'].tolist()
+    assert np.allclose(obtenido['sum'] / ESCALA_MONEDA, esperado['sum'], rtol=0, atol=1e-6)
+
+    por_grupo = sumar_montos_por(tipado['PRECIO_VENTA'], [tipado[clave] for clave in claves])
+    assert np.allclose(por_grupo.to_numpy(), esperado['sum'].to_numpy(), rtol=0, atol=1e-6)
+    assert a_soles(tipado['PRECIO_VENTA']).sum() == pytest.approx(original['PRECIO_VENTA'].sum())
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from validacion_datos import ValidadorVentas
+
+
+def _ventas(**columnas):
+    base = {
+        'ID': [1, 2, 3],
+        'ID_Vehículo': [10, 11, 12],
+        'MODELO_VEHICULO': ['A', 'B', 'C'],
+        'PRECIO_VENTA': [118.0, 236.0, 100.0],
+        'IGV': [0.18, 0.18, 0.18],
+        'CLIENTE': ['c1', 'c2', 'c3'],
+        'SEDE': ['Lima', 'Lima', 'Cusco'],
+        'FECHA': pd.to_datetime(['2025-01-01'] * 3),
+    }
+    base.update(columnas)
+    return pd.DataFrame(base)
+
+
+@pytest.mark.parametrize('columna', ['PRECIO_SIN_IGV', 'PRECIO_SIN_IGV_ORIGINAL'])
+def test_reglas_de_precio_sin_igv_aceptan_cualquiera_de_las_columnas(columna):
+    validador = ValidadorVentas(ruta_cuarentena=None)
+    validos = validador.validar(_ventas(**{columna: [100.0, -5.0, 100.0]}))
+
+    assert not {'precio_sin_igv_invalido', 'igv_inconsistente'} & validador.omitidas
+    assert validador.conteos['precio_sin_igv_invalido'] == 1
+    # 100 * 1.18 = 118 cuadra; la fila 3 (100 con IGV incluido) no
+    assert validador.conteos['igv_inconsistente'] == 2
+    assert validos['ID'].tolist() == [1, 3]
+
+
+def test_sin_precio_sin_igv_las_reglas_se_omiten():
+    validador = ValidadorVentas(ruta_cuarentena=None)
+    validos = validador.validar(_ventas())
+
+    assert {'precio_sin_igv_invalido', 'igv_inconsistente'} <= validador.omitidas
+    assert len(validos) == 3
+
+
+def test_cuarentena_guarda_las_reglas_incumplidas(tmp_path):
+    ruta = tmp_path / 'cuarentena.csv'
+    validador = ValidadorVentas(ruta_cuarentena=str(ruta))
+    validador.validar(_ventas(PRECIO_SIN_IGV=[100.0, 200.0, 84.75], ID_Vehículo=[10, None, 12]))
+    validador.validar(_ventas(PRECIO_SIN_IGV=[100.0, 200.0, 84.75], PRECIO_VENTA=[118.0, 0.0, 100.0]))
+
+    cuarentena = pd.read_csv(ruta)
+    assert cuarentena['REGLAS_INCUMPLIDAS'].tolist() == ['id_vehiculo_nulo', 'precio_venta_invalido']
+    assert validador.a_dict()['filas_en_cuarentena'] == 2
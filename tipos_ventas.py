@@ -0,0 +1,184 @@
+"""
+Etapa de tipado del DataFrame de ventas.
+Convierte las claves de agrupación de baja cardinalidad a categóricas y guarda
+los montos como enteros escalados (céntimos) cuando la conversión no pierde
+información, reduciendo la memoria del proceso.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Claves de agrupación con pocos valores distintos
+COLUMNAS_CATEGORICAS = ['SEDE', 'CANAL_VENTA', 'SEGMENTO_CLIENTE', 'MODELO_VEHICULO',
+                        'MARCA', 'TIPO VEHÍCULO']
+
+# Columnas de montos. Tras el tipado, una columna de montos con dtype entero
+# está expresada en céntimos (ESCALA_MONEDA); si es flotante, está en soles.
+COLUMNAS_MONEDA = ['PRECIO_VENTA', 'PRECIO_SIN_IGV_ORIGINAL', 'PRECIO_SIN_IGV', 'IGV']
+ESCALA_MONEDA = 100
+
+# Enteros no monetarios que pueden reducirse a un dtype más pequeño
+COLUMNAS_ENTERAS = ['ID', 'ID_Vehículo', 'AÑO']
+
+# Fechas de venta (del Excel llegan como datetime; de un CSV, como texto)
+COLUMNAS_FECHA = ['FECHA']
+
+
+def es_escalada(serie):
+    """Indica si una serie de montos está guardada en céntimos"""
+    return pd.api.types.is_integer_dtype(serie.dtype)
+
+
+def a_soles(serie):
+    """Devuelve la serie de montos expresada en soles (float64)"""
+    if es_escalada(serie):
+        return serie.astype('float64') / ESCALA_MONEDA
+    return serie
+
+
+def redondear_centimos(valores):
+    """
+    Montos en soles (float64) a céntimos redondeados, con las mitades lejos
+    de cero como en una boleta. Antes se descarta el error binario del
+    producto (1.005 * 100 = 100.49999999999999) para que 1.005 dé 101.
+    """
+    escalados = np.round(np.asarray(valores, dtype=np.float64) * ESCALA_MONEDA, 6)
+    return np.copysign(np.floor(np.abs(escalados) + 0.5), escalados)
+
+
+def centimos(serie):
+    """
+    Montos como arreglo int64 de céntimos (los nulos cuentan 0). Las series en
+    soles se redondean al céntimo: las sumas en enteros son exactas y no
+    dependen del orden ni de cómo se partan los datos.
+    """
+    if es_escalada(serie):
+        return serie.to_numpy(dtype=np.int64, na_value=0)
+    valores = serie.to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.nan_to_num(redondear_centimos(valores)).astype(np.int64)
+
+
+def sumar_montos(serie):
+    """Suma exacta (en céntimos) de una serie de montos; devuelve el total en soles"""
+    return int(centimos(serie).sum()) / ESCALA_MONEDA
+
+
+def sumar_montos_por(serie, claves):
+    """Suma exacta de montos por grupo (como serie.groupby(claves).sum()), en soles"""
+    sumas = pd.Series(centimos(serie), index=serie.index, name=serie.name)
+    return sumas.groupby(claves, observed=True).sum() / ESCALA_MONEDA
+
+
+def restar_montos(minuendo, sustraendo):
+    """Resta dos series de montos conservando la escala si ambas están en céntimos"""
+    if es_escalada(minuendo) and es_escalada(sustraendo):
+        return minuendo.astype('int64') - sustraendo.astype('int64')
+    return a_soles(minuendo) - a_soles(sustraendo)
+
+
+def escalar_montos(serie):
+    """
+    Convierte una serie de montos a céntimos enteros si no pierde precisión.
+    Si hay nulos o más de dos decimales, la serie se deja en float64.
+    La serie de entrada debe estar en soles.
+    """
+    valores = pd.to_numeric(serie, errors='coerce').astype('float64')
+    if valores.isna().any():
+        return valores
+
+    centimos = np.round(valores.to_numpy() * ESCALA_MONEDA)
+    if not np.allclose(valores.to_numpy() * ESCALA_MONEDA, centimos, rtol=0, atol=1e-4):
+        return valores
+
+    limite = np.iinfo(np.int32).max
+    dtype = 'int32' if np.abs(centimos).max(initial=0) <= limite else 'int64'
+    return pd.Series(centimos.astype(dtype), index=serie.index, name=serie.name)
+
+
+def como_categoria(serie):
+    """
+    Convierte una columna de etiquetas a categórica. Los valores no textuales
+    (p. ej. un MODELO numérico) se guardan como texto para que las categorías
+    sean ordenables y homogéneas.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie
+    if serie.dtype == object:
+        serie = serie.where(serie.isna(), serie.astype(str))
+    return serie.astype('category')
+
+
+def concatenar_categorias(izquierda, derecha, separador=' '):
+    """
+    Concatena dos columnas de etiquetas trabajando sobre los pares distintos
+    en lugar de construir un texto nuevo por fila. Devuelve una categórica.
+    """
+    izquierda = como_categoria(izquierda)
+    derecha = como_categoria(derecha)
+
+    pares = pd.MultiIndex.from_arrays([izquierda.cat.codes, derecha.cat.codes])
+    codigos_pares, unicos = pares.factorize()
+
+    codigos_izq = unicos.get_level_values(0).to_numpy()
+    codigos_der = unicos.get_level_values(1).to_numpy()
+    etiquetas_izq = np.asarray(izquierda.cat.categories, dtype=object)
+    etiquetas_der = np.asarray(derecha.cat.categories, dtype=object)
+    etiquetas = [
+        None if i < 0 or d < 0 else f"{etiquetas_izq[i]}{separador}{etiquetas_der[d]}"
+        for i, d in zip(codigos_izq, codigos_der)
+    ]
+
+    categorias_pares = pd.Categorical(etiquetas)
+    codigos = categorias_pares.codes[codigos_pares]
+    return pd.Series(pd.Categorical.from_codes(codigos, categorias_pares.categories),
+                     index=izquierda.index)
+
+
+def tipar_dataframe(df):
+    """
+    Aplica los tipos compactos al DataFrame de ventas.
+    Debe ejecutarse una sola vez sobre los datos estandarizados (montos en soles).
+
+    Returns:
+        tuple: (DataFrame tipado, DataFrame con la memoria por columna antes y después)
+    """
+    antes = df.memory_usage(deep=True, index=False)
+
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna in df.columns:
+            df[columna] = como_categoria(df[columna])
+
+    for columna in COLUMNAS_MONEDA:
+        if columna in df.columns:
+            df[columna] = escalar_montos(df[columna])
+
+    for columna in COLUMNAS_ENTERAS:
+        if columna in df.columns and pd.api.types.is_integer_dtype(df[columna].dtype):
+            df[columna] = pd.to_numeric(df[columna], downcast='integer')
+
+    for columna in COLUMNAS_FECHA:
+        if columna in df.columns and not pd.api.types.is_datetime64_any_dtype(df[columna].dtype):
+            df[columna] = pd.to_datetime(df[columna], errors='coerce')
+
+    despues = df.memory_usage(deep=True, index=False)
+    reporte = pd.DataFrame({
+        'antes_bytes': antes,
+        'despues_bytes': despues.reindex(antes.index),
+        'dtype': df.dtypes.astype(str).reindex(antes.index),
+    })
+    return df, reporte
+
+
+def registrar_reporte_memoria(reporte):
+    """Escribe en el log la memoria por columna antes y después del tipado"""
+    logger.info("🧮 Memoria por columna (antes -> después):")
+    for columna, fila in reporte.iterrows():
+        logger.info(f"   - {columna}: {fila['antes_bytes'] / 1024:,.1f} KB -> "
+                    f"{fila['despues_bytes'] / 1024:,.1f} KB ({fila['dtype']})")
+    total_antes = reporte['antes_bytes'].sum()
+    total_despues = reporte['despues_bytes'].sum()
+    logger.info(f"   Total: {total_antes / 1024 ** 2:,.2f} MB -> {total_despues / 1024 ** 2:,.2f} MB")
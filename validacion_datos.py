@@ -0,0 +1,211 @@
+"""
+Validación de calidad de datos por reglas vectorizadas.
+Cada regla es una máscara booleana calculada sobre columnas completas, sin
+recorrer filas, por lo que el coste es lineal y de unas pocas operaciones de
+numpy por regla también con millones de filas. Las filas que incumplen una
+regla de cuarentena se apartan a un CSV (con las reglas que incumplen) y no
+entran en las métricas; las reglas de aviso solo se cuentan.
+"""
+
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from tipos_ventas import COLUMNAS_MONEDA, a_soles
+
+logger = logging.getLogger(__name__)
+
+RUTA_CUARENTENA = 'cuarentena_ventas.csv'
+
+CUARENTENA = 'cuarentena'
+AVISO = 'aviso'
+
+# Diferencia máxima en soles entre el precio con IGV y el calculado
+TOLERANCIA_IGV = 0.05
+
+# En las columnas de una regla, una tupla se cumple con cualquiera de sus columnas
+PRECIO_SIN_IGV = ('PRECIO_SIN_IGV', 'PRECIO_SIN_IGV_ORIGINAL')
+
+
+def _soles(df, columna):
+    """Montos en soles como float64 (NaN para los nulos)"""
+    return a_soles(df[columna]).to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _tiene_columnas(df, columnas):
+    return all(any(opcion in df.columns for opcion in columna) if isinstance(columna, tuple)
+               else columna in df.columns
+               for columna in columnas)
+
+
+def _precio_sin_igv(df):
+    return _soles(df, 'PRECIO_SIN_IGV' if 'PRECIO_SIN_IGV' in df.columns else 'PRECIO_SIN_IGV_ORIGINAL')
+
+
+def id_vehiculo_nulo(df):
+    return df['ID_Vehículo'].isna().to_numpy()
+
+
+def vehiculo_no_encontrado(df):
+    """El ID existe pero no está en el catálogo de VEHICULOS (el merge dejó el modelo vacío)"""
+    return df['ID_Vehículo'].notna().to_numpy() & df['MODELO_VEHICULO'].isna().to_numpy()
+
+
+def precio_venta_invalido(df):
+    # ~(x > 0) también marca los nulos (NaN > 0 es False)
+    return ~(_soles(df, 'PRECIO_VENTA') > 0)
+
+
+def precio_sin_igv_invalido(df):
+    return ~(_precio_sin_igv(df) > 0)
+
+
+def igv_inconsistente(df):
+    """
+    El IGV del libro puede venir como tasa (0.18) o como monto. Como tasa se
+    exige PRECIO_VENTA = PRECIO_SIN_IGV * (1 + IGV); como monto,
+    IGV = PRECIO_VENTA - PRECIO_SIN_IGV. Los nulos los marcan otras reglas.
+    """
+    venta = _soles(df, 'PRECIO_VENTA')
+    sin_igv = _precio_sin_igv(df)
+    igv = _soles(df, 'IGV')
+    es_tasa = np.abs(igv) <= 1
+    diferencia = np.where(es_tasa, venta - sin_igv * (1 + igv), igv - (venta - sin_igv))
+    return np.abs(diferencia) > TOLERANCIA_IGV
+
+
+def cliente_nulo(df):
+    return df['CLIENTE'].isna().to_numpy()
+
+
+def sede_nula(df):
+    return df['SEDE'].isna().to_numpy()
+
+
+def fecha_invalida(df):
+    return df['FECHA'].isna().to_numpy()
+
+
+def id_duplicado(df):
+    return df['ID'].duplicated(keep=False).to_numpy()
+
+
+# Nombre -> (función(df) -> máscara de filas inválidas, columnas, acción, descripción)
+REGLAS = {
+    'id_vehiculo_nulo': (id_vehiculo_nulo, ['ID_Vehículo'], CUARENTENA,
+                         "Venta sin ID_Vehículo"),
+    'vehiculo_no_encontrado': (vehiculo_no_encontrado, ['ID_Vehículo', 'MODELO_VEHICULO'], CUARENTENA,
+                               "ID_Vehículo que no está en VEHICULOS"),
+    'precio_venta_invalido': (precio_venta_invalido, ['PRECIO_VENTA'], CUARENTENA,
+                              "PRECIO_VENTA nulo, cero o negativo"),
+    'precio_sin_igv_invalido': (precio_sin_igv_invalido, [PRECIO_SIN_IGV], CUARENTENA,
+                                "Precio sin IGV nulo, cero o negativo"),
+    # Aviso por defecto: las métricas por sede usan el precio sin IGV, que sigue siendo válido
+    'igv_inconsistente': (igv_inconsistente, ['PRECIO_VENTA', PRECIO_SIN_IGV, 'IGV'], AVISO,
+                          "IGV que no cuadra con PRECIO_VENTA y el precio sin IGV"),
+    'cliente_nulo': (cliente_nulo, ['CLIENTE'], AVISO, "Venta sin cliente"),
+    'sede_nula': (sede_nula, ['SEDE'], AVISO, "Venta sin sede"),
+    'fecha_invalida': (fecha_invalida, ['FECHA'], AVISO, "Fecha vacía o no reconocida"),
+    'id_duplicado': (id_duplicado, ['ID'], AVISO, "ID de venta repetido en los mismos datos"),
+}
+
+
+class ValidadorVentas:
+    def __init__(self, reglas=None, ruta_cuarentena=RUTA_CUARENTENA, acciones=None):
+        """
+        Args:
+            reglas (dict): Reglas a aplicar (por defecto, REGLAS)
+            ruta_cuarentena (str): CSV donde se apartan las filas rechazadas
+                (None para no escribirlas)
+            acciones (dict): Cambia la acción de algunas reglas, por ejemplo
+                {'igv_inconsistente': CUARENTENA}
+        """
+        self.reglas = dict(REGLAS if reglas is None else reglas)
+        for nombre, accion in (acciones or {}).items():
+            funcion, columnas, _, descripcion = self.reglas[nombre]
+            self.reglas[nombre] = (funcion, columnas, accion, descripcion)
+        self.ruta_cuarentena = ruta_cuarentena
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Pone a cero los conteos; la próxima cuarentena sobrescribe el CSV"""
+        self.conteos = {nombre: 0 for nombre in self.reglas}
+        self.omitidas = set()
+        self.filas_revisadas = 0
+        self.filas_en_cuarentena = 0
+        self._cuarentena_abierta = False
+
+    def validar(self, df):
+        """
+        Aplica todas las reglas. Se puede llamar una vez por bloque: los conteos
+        se acumulan y las filas rechazadas se añaden al mismo CSV.
+
+        Returns:
+            pd.DataFrame: df sin las filas en cuarentena (el mismo objeto si no hay ninguna)
+        """
+        rechazo = np.zeros(len(df), dtype=bool)
+        mascaras = {}
+        for nombre, (funcion, columnas, accion, _) in self.reglas.items():
+            if not _tiene_columnas(df, columnas):
+                self.omitidas.add(nombre)
+                continue
+            mascara = np.asarray(funcion(df), dtype=bool)
+            self.conteos[nombre] += int(mascara.sum())
+            if accion == CUARENTENA:
+                mascaras[nombre] = mascara
+                rechazo |= mascara
+        self.filas_revisadas += len(df)
+
+        rechazadas = int(rechazo.sum())
+        if not rechazadas:
+            return df
+        self.filas_en_cuarentena += rechazadas
+        if self.ruta_cuarentena:
+            self._guardar_cuarentena(df, rechazo, mascaras)
+        return df[~rechazo].reset_index(drop=True)
+
+    def _guardar_cuarentena(self, df, rechazo, mascaras):
+        """Añade las filas rechazadas al CSV con las reglas que incumple cada una"""
+        filas = df[rechazo].copy()
+        motivos = np.full(len(filas), '', dtype=object)
+        for nombre, mascara in mascaras.items():
+            incumple = mascara[rechazo]
+            motivos[incumple] = motivos[incumple] + nombre + ';'
+        filas.insert(0, 'REGLAS_INCUMPLIDAS', pd.Series(motivos, index=filas.index).str.rstrip(';'))
+        # Montos en soles para que el archivo se lea igual que el Excel
+        for columna in COLUMNAS_MONEDA:
+            if columna in filas.columns:
+                filas[columna] = a_soles(filas[columna])
+
+        directorio = os.path.dirname(self.ruta_cuarentena)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        filas.to_csv(self.ruta_cuarentena, mode='a' if self._cuarentena_abierta else 'w',
+                     header=not self._cuarentena_abierta, index=False, encoding='utf-8')
+        self._cuarentena_abierta = True
+
+    def a_dict(self):
+        """Conteos por regla, serializables en JSON"""
+        return {
+            'filas_revisadas': self.filas_revisadas,
+            'filas_en_cuarentena': self.filas_en_cuarentena,
+            'ruta_cuarentena': self.ruta_cuarentena if self._cuarentena_abierta else None,
+            'reglas': {nombre: {'filas': self.conteos[nombre], 'accion': accion, 'descripcion': descripcion,
+                                'omitida': nombre in self.omitidas}
+                       for nombre, (_, _, accion, descripcion) in self.reglas.items()},
+        }
+
+    def registrar_resumen(self):
+        """Escribe en el log las filas que incumple cada regla"""
+        logger.info(f"🧪 Validación de filas: {self.filas_revisadas:,} revisadas, "
+                    f"{self.filas_en_cuarentena:,} en cuarentena")
+        for nombre, (_, _, accion, descripcion) in self.reglas.items():
+            if nombre in self.omitidas and not self.conteos[nombre]:
+                logger.info(f"   - {nombre}: omitida (faltan columnas)")
+            elif self.conteos[nombre]:
+                icono = '⛔' if accion == CUARENTENA else '⚠️'
+                logger.warning(f"   {icono} {nombre}: {self.conteos[nombre]:,} filas ({descripcion})")
+        if self.filas_en_cuarentena and self._cuarentena_abierta:
+            logger.warning(f"   Filas rechazadas guardadas en {self.ruta_cuarentena}")
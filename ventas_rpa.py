@@ -1,20 +1,143 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
 import os
 from datetime import datetime
+from itertools import islice
 import logging
 
+from cache_ventas import CacheColumnar
+from perfilado import Perfilador
+from motor_agregacion import agregar_dataframe
+from grafo_metricas import ResultadosPerezosos, TOP_MODELOS
+from indice_vehiculos import obtener_indice
+from analisis_incremental import EstadoIncremental, huella_hojas
+from validacion_datos import ValidadorVentas
+from tipos_ventas import (tipar_dataframe, registrar_reporte_memoria, concatenar_categorias,
+                          restar_montos)
+
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Columnas que el análisis realmente utiliza de cada hoja del Excel
+COLUMNAS_VENTAS = ['ID', 'Fecha', 'Sede', 'Canal', 'Segmento', 'Cliente', 'ID_Vehículo',
+                   'Precio Venta sin IGV', 'IGV', 'Precio Venta Real']
+COLUMNAS_VEHICULOS = ['ID_Vehiculo', 'MARCA', 'MODELO', 'TIPO VEHÍCULO', 'AÑO']
+
+HOJAS_EXCEL = {
+    'VENTAS': COLUMNAS_VENTAS,
+    'VEHICULOS': COLUMNAS_VEHICULOS,
+    'NUEVOS REGISTROS': COLUMNAS_VENTAS,
+}
+
+
+def _recorrer_hoja(hoja, columnas):
+    """
+    Recorre una hoja de openpyxl fila a fila conservando solo las columnas indicadas
+
+    Returns:
+        tuple: (nombres de las columnas encontradas, generador de filas)
+    """
+    filas = hoja.iter_rows(values_only=True)
+    encabezado = next(filas, ())
+    posiciones = [i for i, columna in enumerate(encabezado) if columna in columnas]
+    nombres = [encabezado[i] for i in posiciones]
+    ultima = max(posiciones, default=-1)
+
+    def _generar():
+        for fila in filas:
+            if len(fila) <= ultima:
+                fila = tuple(fila) + (None,) * (ultima + 1 - len(fila))
+            valores = [fila[i] for i in posiciones]
+            # Omitir filas completamente vacías (igual que pd.read_excel)
+            if any(valor is not None for valor in valores):
+                yield valores
+
+    return nombres, _generar()
+
+
+def _abrir_libro(archivo_excel):
+    from openpyxl import load_workbook
+    return load_workbook(archivo_excel, read_only=True, data_only=True, keep_links=False)
+
+
+def leer_hojas_excel(archivo_excel, hojas=None):
+    """
+    Lee varias hojas del Excel abriendo el libro una sola vez.
+    Usa el modo de solo lectura de openpyxl (recorrido fila a fila) y conserva
+    únicamente las columnas indicadas para cada hoja.
+
+    Args:
+        archivo_excel (str): Ruta del archivo .xlsx
+        hojas (dict): Nombre de hoja -> lista de columnas a conservar
+
+    Returns:
+        dict: Nombre de hoja -> DataFrame
+    """
+    hojas = hojas or HOJAS_EXCEL
+    libro = _abrir_libro(archivo_excel)
+    try:
+        resultado = {}
+        for nombre_hoja, columnas in hojas.items():
+            nombres, filas = _recorrer_hoja(libro[nombre_hoja], columnas)
+            resultado[nombre_hoja] = pd.DataFrame(list(filas), columns=nombres)
+        return resultado
+    finally:
+        libro.close()
+
+
+def leer_bloques_excel(archivo_excel, hojas, tamano_bloque):
+    """
+    Generador que recorre las hojas indicadas en bloques de como máximo
+    tamano_bloque filas, sin cargar la hoja completa en memoria
+
+    Yields:
+        tuple: (nombre de hoja, DataFrame del bloque)
+    """
+    libro = _abrir_libro(archivo_excel)
+    try:
+        for nombre_hoja, columnas in hojas.items():
+            nombres, filas = _recorrer_hoja(libro[nombre_hoja], columnas)
+            while True:
+                bloque = list(islice(filas, tamano_bloque))
+                if not bloque:
+                    break
+                yield nombre_hoja, pd.DataFrame(bloque, columns=nombres)
+    finally:
+        libro.close()
+
+
 class AnalizadorVentas:
-    def __init__(self, archivo_excel):
+    def __init__(self, archivo_excel, usar_cache=True, carpeta_cache='.cache_ventas', perfilador=None):
         self.archivo_excel = archivo_excel
+        # Métricas bajo demanda y memorizadas sobre self.df (ver grafo_metricas.py)
+        self._resultados = ResultadosPerezosos(lambda: self.df)
         self.df = None
-        self.resultados = {}
+        self.agregados = None
+        self.errores_graficos = {}
+        self.reporte_memoria = None
+        self.cache = CacheColumnar(carpeta_cache) if usar_cache else None
+        # Mide cada etapa si se pasa un Perfilador activo (ver perfilado.py)
+        self.perfilador = perfilador or Perfilador(activo=False)
+        # Reglas de calidad por fila y CSV de cuarentena (ver validacion_datos.py)
+        self.validador = ValidadorVentas()
+    
+    @property
+    def df(self):
+        return self._df
+    
+    @df.setter
+    def df(self, df):
+        # Un DataFrame nuevo invalida todas las métricas calculadas
+        self._df = df
+        self._resultados.invalidar()
+    
+    @property
+    def resultados(self):
+        return self._resultados
+    
+    @resultados.setter
+    def resultados(self, valores):
+        self._resultados.reemplazar(valores)
     
     def cargar_datos_multiple_hojas(self):
         """
@@ -23,27 +146,38 @@ class AnalizadorVentas:
         try:
             logger.info(f"Cargando datos desde {self.archivo_excel}")
             
-            # Leer las 3 hojas
-            df_ventas = pd.read_excel(self.archivo_excel, sheet_name='VENTAS')
-            df_vehiculos = pd.read_excel(self.archivo_excel, sheet_name='VEHICULOS')
-            df_nuevos = pd.read_excel(self.archivo_excel, sheet_name='NUEVOS REGISTROS')
+            # Si el libro no cambió desde la última ejecución, usar la caché columnar
+            if self.cache:
+                with self.perfilador.etapa('cache_columnar') as etapa:
+                    df_cache = self.cache.cargar(self.archivo_excel)
+                    etapa['filas'] = len(df_cache) if df_cache is not None else None
+                if df_cache is not None:
+                    self.df = df_cache
+                    logger.info(f"✅ Datos cargados exitosamente. Total: {len(self.df)} registros")
+                    return True
+            
+            # Leer las 3 hojas en una sola pasada sobre el libro
+            with self.perfilador.etapa('lectura_hojas') as etapa:
+                hojas = leer_hojas_excel(self.archivo_excel)
+                etapa['filas'] = sum(len(df) for df in hojas.values())
+            df_ventas = hojas['VENTAS']
+            df_vehiculos = hojas['VEHICULOS']
+            df_nuevos = hojas['NUEVOS REGISTROS']
             
             logger.info(f"VENTAS: {len(df_ventas)} registros")
             logger.info(f"VEHICULOS: {len(df_vehiculos)} registros") 
             logger.info(f"NUEVOS REGISTROS: {len(df_nuevos)} registros")
             
-            # Limpiar columnas vacías en VENTAS
-            df_ventas = df_ventas.drop(columns=['Unnamed: 13', 'Unnamed: 14'], errors='ignore')
-            
             # Combinar VENTAS y NUEVOS REGISTROS (misma estructura)
-            df_todas_ventas = pd.concat([df_ventas, df_nuevos], ignore_index=True)
+            with self.perfilador.etapa('concat', len(df_ventas) + len(df_nuevos)):
+                df_todas_ventas = pd.concat([df_ventas, df_nuevos], ignore_index=True)
             logger.info(f"Total ventas combinadas: {len(df_todas_ventas)} registros")
             
-            # Combinar con información de VEHICULOS
-            self.df = self._combinar_con_vehiculos(df_todas_ventas, df_vehiculos)
+            self._preparar_ventas(df_todas_ventas, df_vehiculos)
             
-            # Estandarizar nombres de columnas
-            self._estandarizar_columnas()
+            if self.cache:
+                with self.perfilador.etapa('guardar_cache', len(self.df)):
+                    self.cache.guardar(self.archivo_excel, self.df)
             
             logger.info(f"✅ Datos cargados exitosamente. Total: {len(self.df)} registros")
             logger.info(f"Columnas finales: {list(self.df.columns)}")
@@ -54,20 +188,33 @@ class AnalizadorVentas:
             logger.error(f"Error al cargar datos múltiples: {str(e)}")
             return False
     
-    def _combinar_con_vehiculos(self, df_ventas, df_vehiculos):
+    def _preparar_ventas(self, df_ventas, df_vehiculos):
         """
-        Combina datos de ventas con información de vehículos
+        Combina las ventas con VEHICULOS, estandariza y tipa el resultado en self.df
         """
-        # Renombrar columna para el merge
-        df_vehiculos_renamed = df_vehiculos.rename(columns={'ID_Vehiculo': 'ID_Vehículo'})
+        filas = len(df_ventas)
+        
+        # Combinar con información de VEHICULOS
+        with self.perfilador.etapa('merge_vehiculos', filas):
+            self.df = self._combinar_con_vehiculos(df_ventas, df_vehiculos)
         
-        # Hacer merge para obtener modelo y marca del vehículo
-        df_combinado = pd.merge(
-            df_ventas, 
-            df_vehiculos_renamed[['ID_Vehículo', 'MARCA', 'MODELO', 'TIPO VEHÍCULO', 'AÑO']],
-            on='ID_Vehículo', 
-            how='left'
-        )
+        # Estandarizar nombres de columnas
+        with self.perfilador.etapa('estandarizacion', filas):
+            self._estandarizar_columnas()
+        
+        # Tipos compactos: categóricas para claves y céntimos para montos
+        with self.perfilador.etapa('tipado', filas):
+            self._tipar_columnas()
+    
+    def _combinar_con_vehiculos(self, df_ventas, df_vehiculos):
+        """
+        Combina datos de ventas con información de vehículos.
+        Usa un índice denso ID -> posición del catálogo (reutilizable entre
+        ejecuciones y bloques) y añade las columnas sobre df_ventas sin copiarlo.
+        """
+        columna_id = 'ID_Vehiculo' if 'ID_Vehiculo' in df_vehiculos.columns else 'ID_Vehículo'
+        indice = obtener_indice(df_vehiculos, columna_id)
+        df_combinado = indice.enriquecer(df_ventas)
         
         logger.info(f"Después de combinar con vehículos: {len(df_combinado)} registros")
         return df_combinado
@@ -85,6 +232,7 @@ class AnalizadorVentas:
             'Precio Venta Real': 'PRECIO_VENTA',
             'IGV': 'IGV',
             'Cliente': 'CLIENTE',
+            'Fecha': 'FECHA',
             'Precio Venta sin IGV': 'PRECIO_SIN_IGV_ORIGINAL'
         }
         
@@ -94,9 +242,18 @@ class AnalizadorVentas:
         # Crear MODELO_VEHICULO combinado si no existe
         if 'MODELO_VEHICULO' not in self.df.columns:
             if 'MARCA' in self.df.columns and 'MODELO' in self.df.columns:
-                self.df['MODELO_VEHICULO'] = self.df['MARCA'] + ' ' + self.df['MODELO']
+                self.df['MODELO_VEHICULO'] = concatenar_categorias(self.df['MARCA'], self.df['MODELO'])
             else:
                 self.df['MODELO_VEHICULO'] = 'Modelo No Especificado'
+            self.resultados.invalidar('MODELO_VEHICULO')
+    
+    def _tipar_columnas(self):
+        """
+        Convierte claves de agrupación a categóricas y montos a céntimos enteros,
+        registrando la memoria por columna antes y después
+        """
+        self.df, self.reporte_memoria = tipar_dataframe(self.df)
+        registrar_reporte_memoria(self.reporte_memoria)
     
     def validar_datos(self):
         """
@@ -127,6 +284,20 @@ class AnalizadorVentas:
         
         return True
 
+    def validar_filas(self):
+        """
+        Aplica las reglas de calidad por fila y deja en self.df solo las filas
+        válidas; las rechazadas van al CSV de cuarentena del validador.
+        Se puede llamar por bloque: los conteos por regla se acumulan.
+
+        Returns:
+            bool: True si queda al menos una fila válida
+        """
+        validos = self.validador.validar(self.df)
+        if validos is not self.df:
+            self.df = validos
+        return len(self.df) > 0
+
     def calcular_precio_sin_igv(self):
         """
         Calcula el precio de venta sin IGV
@@ -137,234 +308,228 @@ class AnalizadorVentas:
             self.df['PRECIO_SIN_IGV'] = self.df['PRECIO_SIN_IGV_ORIGINAL']
         else:
             # Calcular restando IGV del precio total
-            self.df['PRECIO_SIN_IGV'] = self.df['PRECIO_VENTA'] - self.df['IGV']
+            self.df['PRECIO_SIN_IGV'] = restar_montos(self.df['PRECIO_VENTA'], self.df['IGV'])
+        self.resultados.invalidar('PRECIO_SIN_IGV')
         
         logger.info("✅ Precio sin IGV calculado/obtenido")
 
     # LOS MÉTODOS DE ANÁLISIS SE MANTIENEN IGUAL (pero actualizados para los nuevos datos)
     def analizar_ventas_por_sede(self):
         """Calcula ventas sin IGV por sede"""
-        ventas_sede = self.df.groupby('SEDE')['PRECIO_SIN_IGV'].sum().sort_values(ascending=False)
-        self.resultados['ventas_por_sede'] = ventas_sede
+        ventas_sede = self.resultados['ventas_por_sede']
         logger.info(f"✅ Ventas por sede calculadas: {len(ventas_sede)} sedes")
         return ventas_sede
     
     def top_modelos_vendidos(self, top_n=5):
         """Identifica los modelos más vendidos"""
-        top_modelos = self.df['MODELO_VEHICULO'].value_counts().head(top_n)
-        self.resultados['top_modelos'] = top_modelos
+        if top_n == TOP_MODELOS:
+            top_modelos = self.resultados['top_modelos']
+        else:
+            top_modelos = self.df['MODELO_VEHICULO'].value_counts().head(top_n)
+            self.resultados['top_modelos'] = top_modelos
         logger.info(f"✅ Top {top_n} modelos identificados")
         return top_modelos
     
     def canales_mas_ventas(self):
         """Analiza canales con más ventas"""
-        canales_ventas = self.df.groupby('CANAL_VENTA')['PRECIO_SIN_IGV'].sum().sort_values(ascending=False)
-        self.resultados['canales_ventas'] = canales_ventas
+        canales_ventas = self.resultados['canales_ventas']
         logger.info("✅ Canales de ventas analizados")
         return canales_ventas
     
     def segmento_clientes_ventas(self):
         """Analiza segmento de clientes por ventas sin IGV"""
-        segmento_ventas = self.df.groupby('SEGMENTO_CLIENTE')['PRECIO_SIN_IGV'].sum()
-        self.resultados['segmento_ventas'] = segmento_ventas
+        segmento_ventas = self.resultados['segmento_ventas']
         logger.info("✅ Segmento de clientes analizado")
         return segmento_ventas
     
     def metricas_generales(self):
         """Calcula métricas generales del dataset"""
-        metricas = {
-            'clientes_unicos': self.df['CLIENTE'].nunique(),
-            'total_ventas': len(self.df),
-            'venta_total_con_igv': self.df['PRECIO_VENTA'].sum(),
-            'venta_total_sin_igv': self.df['PRECIO_SIN_IGV'].sum(),
-            'igv_total': self.df['IGV'].sum(),
-            'sedes_unicas': self.df['SEDE'].nunique(),
-            'modelos_unicos': self.df['MODELO_VEHICULO'].nunique()
-        }
-        self.resultados['metricas'] = metricas
+        metricas = self.resultados['metricas']
         logger.info("✅ Métricas generales calculadas")
         return metricas
 
+    def calcular_agregados(self, top_n=5):
+        """
+        Calcula todas las métricas de resultados en una sola pasada con el motor
+        de agregación (equivale a los cinco métodos de análisis anteriores)
+        """
+        self.agregados = agregar_dataframe(self.df)
+        self.resultados.update(self.agregados.a_resultados(top_n))
+        logger.info(f"✅ Agregados calculados en una pasada: {len(self.df):,} registros")
+        return self.resultados
+
     # MANTENER TODOS LOS MÉTODOS DE GRÁFICOS Y REPORTES (se mantienen igual)
-    def generar_graficos(self, carpeta_salida='graficos'):
-        """Genera todos los gráficos requeridos"""
+    def generar_graficos(self, carpeta_salida='graficos', paralelo=False, max_procesos=None,
+                         usar_cache=True, formato='png'):
+        """
+        Genera todos los gráficos requeridos.
+        Con paralelo=True cada gráfico se renderiza en un proceso aparte y con
+        usar_cache=True se omiten los gráficos cuyos datos no cambiaron.
+        formato: 'png' (300 dpi), 'movil' (PNG liviano) o 'svg' (sin matplotlib).
+        Los errores se registran por gráfico en self.errores_graficos.
+        """
         try:
-            os.makedirs(carpeta_salida, exist_ok=True)
-            
-            # Configuración de estilo
-            plt.style.use('seaborn-v0_8')
-            sns.set_palette("husl")
-            
-            # 1. Gráfico de barras: Ventas sin IGV por sede
-            plt.figure(figsize=(12, 6))
-            ventas_sede = self.resultados['ventas_por_sede']
-            bars = plt.bar(ventas_sede.index, ventas_sede.values)
-            plt.title('Ventas sin IGV por Sede', fontsize=14, fontweight='bold')
-            plt.xlabel('Sede', fontweight='bold')
-            plt.ylabel('Ventas sin IGV (S/)', fontweight='bold')
-            plt.xticks(rotation=45)
-            
-            # Añadir valores en las barras
-            for bar in bars:
-                height = bar.get_height()
-                plt.text(bar.get_x() + bar.get_width()/2., height,
-                        f'S/ {height:,.0f}',
-                        ha='center', va='bottom', fontweight='bold')
-            
-            plt.tight_layout()
-            plt.savefig(f'{carpeta_salida}/ventas_por_sede.png', dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            # 2. Gráfico de barras horizontales: Top 5 modelos
-            plt.figure(figsize=(10, 6))
-            top_modelos = self.resultados['top_modelos']
-            bars = plt.barh(range(len(top_modelos)), top_modelos.values)
-            plt.yticks(range(len(top_modelos)), [str(x)[:30] + '...' if len(str(x)) > 30 else x for x in top_modelos.index])
-            plt.title('Top 5 Modelos Más Vendidos', fontsize=14, fontweight='bold')
-            plt.xlabel('Cantidad Vendida', fontweight='bold')
-            
-            # Añadir valores en las barras
-            for i, bar in enumerate(bars):
-                width = bar.get_width()
-                plt.text(width + 0.1, bar.get_y() + bar.get_height()/2.,
-                        f'{int(width)}',
-                        ha='left', va='center', fontweight='bold')
-            
-            plt.tight_layout()
-            plt.savefig(f'{carpeta_salida}/top_modelos.png', dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            # 3. Gráfico de barras: Canales con más ventas
-            plt.figure(figsize=(10, 6))
-            canales_ventas = self.resultados['canales_ventas']
-            bars = plt.bar(canales_ventas.index, canales_ventas.values)
-            plt.title('Ventas por Canal', fontsize=14, fontweight='bold')
-            plt.xlabel('Canal de Venta', fontweight='bold')
-            plt.ylabel('Ventas sin IGV (S/)', fontweight='bold')
-            plt.xticks(rotation=45)
-            
-            for bar in bars:
-                height = bar.get_height()
-                plt.text(bar.get_x() + bar.get_width()/2., height,
-                        f'S/ {height:,.0f}',
-                        ha='center', va='bottom', fontweight='bold')
-            
-            plt.tight_layout()
-            plt.savefig(f'{carpeta_salida}/canales_ventas.png', dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            # 4. Gráfico circular: Segmento de clientes
-            plt.figure(figsize=(8, 8))
-            segmento_ventas = self.resultados['segmento_ventas']
-            colors = plt.cm.Set3(np.linspace(0, 1, len(segmento_ventas)))
-            wedges, texts, autotexts = plt.pie(segmento_ventas.values, 
-                                             labels=segmento_ventas.index,
-                                             autopct='%1.1f%%',
-                                             colors=colors,
-                                             startangle=90)
-            
-            plt.title('Distribución de Ventas por Segmento de Cliente', 
-                     fontsize=14, fontweight='bold')
-            
-            # Mejorar la legibilidad
-            for autotext in autotexts:
-                autotext.set_color('white')
-                autotext.set_fontweight('bold')
-            
-            plt.tight_layout()
-            plt.savefig(f'{carpeta_salida}/segmento_clientes.png', dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            # 5. Dashboard resumen
-            self._generar_dashboard(carpeta_salida)
-            
-            logger.info("✅ Todos los gráficos generados exitosamente")
-            return True
-            
+            with self.perfilador.etapa('graficos'):
+                if formato == 'svg':
+                    from graficos_svg import generar_graficos
+                    estado = generar_graficos(self.resultados, carpeta_salida, self.perfilador)
+                else:
+                    # matplotlib y seaborn solo se importan si de verdad se dibuja
+                    from graficos_ventas import generar_graficos
+                    estado = generar_graficos(self.resultados, carpeta_salida, paralelo, max_procesos,
+                                              usar_cache, perfilador=self.perfilador, formato=formato)
         except Exception as e:
             logger.error(f"Error al generar gráficos: {str(e)}")
             return False
+        
+        self.errores_graficos = {nombre: error for nombre, error in estado.items() if error}
+        if self.errores_graficos:
+            logger.error(f"Gráficos con error: {list(self.errores_graficos)}")
+            return False
+        
+        logger.info("✅ Todos los gráficos generados exitosamente")
+        return True
 
     def _generar_dashboard(self, carpeta_salida):
         """Genera un dashboard con las métricas clave"""
-        fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-        fig.suptitle('DASHBOARD RESUMEN - ANÁLISIS DE VENTAS', 
-                    fontsize=16, fontweight='bold', y=0.95)
-        
-        metricas = self.resultados['metricas']
-        
-        # Métricas clave
-        ax1 = axes[0, 0]
-        ax1.axis('off')
-        texto_metricas = f"""
-        MÉTRICAS CLAVE
-        
-        • Total Ventas: {metricas['total_ventas']:,}
-        • Clientes Únicos: {metricas['clientes_unicos']:,}
-        • Sedes Únicas: {metricas['sedes_unicas']:,}
-        • Modelos Únicos: {metricas['modelos_unicos']:,}
-        • Venta Total (sin IGV): S/ {metricas['venta_total_sin_igv']:,.2f}
-        • Venta Total (con IGV): S/ {metricas['venta_total_con_igv']:,.2f}
-        • IGV Total: S/ {metricas['igv_total']:,.2f}
+        from graficos_ventas import grafico_dashboard
+        grafico_dashboard(self.resultados['metricas'], self.resultados['top_modelos'],
+                          self.resultados['ventas_por_sede'], self.resultados['segmento_ventas'],
+                          os.path.join(carpeta_salida, 'dashboard_resumen.png'))
+
+    def preparar_datos(self):
         """
-        ax1.text(0.1, 0.9, texto_metricas, transform=ax1.transAxes, fontsize=12,
-                verticalalignment='top', fontfamily='monospace', fontweight='bold')
-        
-        # Top modelos
-        ax2 = axes[0, 1]
-        top_modelos = self.resultados['top_modelos']
-        ax2.barh(range(len(top_modelos)), top_modelos.values)
-        ax2.set_yticks(range(len(top_modelos)))
-        ax2.set_yticklabels([str(x)[:20] + '...' if len(str(x)) > 20 else x for x in top_modelos.index])
-        ax2.set_title('Top 5 Modelos Más Vendidos', fontweight='bold')
-        ax2.set_xlabel('Cantidad Vendida')
-        
-        # Ventas por sede
-        ax3 = axes[1, 0]
-        ventas_sede = self.resultados['ventas_por_sede']
-        bars = ax3.bar(ventas_sede.index, ventas_sede.values)
-        ax3.set_title('Ventas sin IGV por Sede', fontweight='bold')
-        ax3.set_ylabel('Ventas sin IGV (S/)')
-        ax3.tick_params(axis='x', rotation=45)
+        Carga, valida y calcula el precio sin IGV, sin calcular ninguna métrica.
+        Después, self.resultados calcula solo las métricas que se consulten
+        (por ejemplo, las que usa generar_reporte_texto).
+        """
+        with self.perfilador.etapa('carga') as etapa:
+            if not self.cargar_datos_multiple_hojas():
+                return False
+            etapa['filas'] = len(self.df)
         
-        # Segmento clientes
-        ax4 = axes[1, 1]
-        segmento_ventas = self.resultados['segmento_ventas']
-        ax4.pie(segmento_ventas.values, labels=segmento_ventas.index, autopct='%1.1f%%')
-        ax4.set_title('Ventas por Segmento de Cliente', fontweight='bold')
+        with self.perfilador.etapa('validacion', len(self.df)):
+            if not self.validar_datos():
+                return False
         
-        plt.tight_layout()
-        plt.savefig(f'{carpeta_salida}/dashboard_resumen.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        self.validador.reiniciar()
+        with self.perfilador.etapa('validacion_filas', len(self.df)):
+            validas = self.validar_filas()
+        self.validador.registrar_resumen()
+        if not validas:
+            logger.error("Ninguna fila pasó la validación")
+            return False
+        
+        with self.perfilador.etapa('precio_sin_igv', len(self.df)):
+            self.calcular_precio_sin_igv()
+        return True
 
-    def ejecutar_analisis_completo(self):
+    def ejecutar_analisis_completo(self, paralelo=False, carpeta_salida='graficos',
+                                   generar_graficos=True):
         """Ejecuta el análisis completo de los datos"""
         logger.info("🚀 Iniciando análisis completo...")
         
-        if not self.cargar_datos_multiple_hojas():
-            return False
-        
-        if not self.validar_datos():
+        if not self.preparar_datos():
             return False
         
-        # Realizar cálculos
-        self.calcular_precio_sin_igv()
-        self.analizar_ventas_por_sede()
-        self.top_modelos_vendidos()
-        self.canales_mas_ventas()
-        self.segmento_clientes_ventas()
-        self.metricas_generales()
+        # Realizar cálculos: todas las métricas en una sola pasada
+        with self.perfilador.etapa('agregados', len(self.df)):
+            self.calcular_agregados()
         
         # Generar gráficos
-        if not self.generar_graficos():
+        if generar_graficos and not self.generar_graficos(carpeta_salida, paralelo=paralelo):
             return False
         
         logger.info("✅ Análisis completado exitosamente")
         return True
 
+    def ejecutar_analisis_incremental(self, ruta_estado='estado_incremental.json', generar_graficos=True):
+        """
+        Ejecuta el análisis procesando solo las filas de NUEVOS REGISTROS que no
+        se vieron en ejecuciones anteriores. Los agregados acumulados se guardan
+        en ruta_estado; si VENTAS o VEHICULOS cambian, se reconstruyen desde cero.
+        Al terminar, self.df contiene solo el delta procesado.
+        """
+        logger.info("🚀 Iniciando análisis incremental...")
+        
+        try:
+            huella = huella_hojas(self.archivo_excel, ['VENTAS', 'VEHICULOS'])
+            estado = EstadoIncremental.cargar(ruta_estado)
+            
+            if estado is None or estado.huella_base != huella:
+                logger.info("🔄 Sin estado válido o hojas base modificadas: reconstrucción completa")
+                estado = EstadoIncremental(huella_base=huella)
+                hojas = leer_hojas_excel(self.archivo_excel)
+                df_base = hojas['VENTAS']
+            else:
+                hojas = leer_hojas_excel(self.archivo_excel, {
+                    'VEHICULOS': HOJAS_EXCEL['VEHICULOS'],
+                    'NUEVOS REGISTROS': HOJAS_EXCEL['NUEVOS REGISTROS'],
+                })
+                df_base = None
+            
+            df_nuevos = hojas['NUEVOS REGISTROS']
+            df_delta = estado.filtrar_no_vistos(df_nuevos)
+            logger.info(f"NUEVOS REGISTROS sin procesar: {len(df_delta)} de {len(df_nuevos)}")
+            
+            if df_base is not None:
+                df_delta_ventas = pd.concat([df_base, df_delta], ignore_index=True)
+            else:
+                df_delta_ventas = df_delta.reset_index(drop=True)
+            
+            if len(df_delta_ventas):
+                self._preparar_ventas(df_delta_ventas, hojas['VEHICULOS'])
+                if not self.validar_datos():
+                    return False
+                self.validador.reiniciar()
+                self.validar_filas()
+                self.validador.registrar_resumen()
+                self.calcular_precio_sin_igv()
+                estado.agregados.combinar(agregar_dataframe(self.df))
+            else:
+                self.df = df_delta_ventas
+            
+            estado.avanzar(df_nuevos, df_delta)
+            estado.guardar(ruta_estado)
+            
+            self.agregados = estado.agregados
+            # self.df es solo el delta: los resultados salen enteros del estado acumulado
+            self.resultados = self.agregados.a_resultados()
+            logger.info(f"✅ Estado incremental actualizado: {self.agregados.total_ventas:,} ventas acumuladas")
+            
+        except Exception as e:
+            logger.error(f"Error en el análisis incremental: {str(e)}")
+            return False
+        
+        if generar_graficos and not self.generar_graficos():
+            return False
+        
+        logger.info("✅ Análisis incremental completado exitosamente")
+        return True
+
+    def exportar_resultados(self, carpeta='exportacion', formatos=('csv',), incluir_filas=False):
+        """
+        Exporta los resultados (y con incluir_filas, también self.df) a CSV,
+        JSON Lines, Parquet o SQLite (ver exportacion.py)
+        """
+        from exportacion import ExportadorResultados
+        try:
+            with self.perfilador.etapa('exportacion'):
+                with ExportadorResultados(carpeta, formatos) as exportador:
+                    exportador.escribir_resultados(self.resultados)
+                    if incluir_filas and self.df is not None:
+                        exportador.agregar_filas(self.df)
+        except Exception as e:
+            logger.error(f"Error al exportar resultados: {str(e)}")
+            return False
+        
+        logger.info(f"✅ Resultados exportados en {carpeta}/")
+        return True
+
     def generar_reporte_texto(self):
         """Genera un reporte en texto con los resultados"""
-        if not self.resultados:
+        if not all(clave in self.resultados for clave in
+                   ('metricas', 'ventas_por_sede', 'top_modelos', 'canales_ventas')):
             return "No hay resultados disponibles"
         
         metricas = self.resultados['metricas']
@@ -1,15 +1,52 @@
 import os
-from twilio.rest import Client
+import hashlib
+import json
 import logging
-from dotenv import load_dotenv
 
-# Cargar variables de entorno
-load_dotenv()
+from envio_masivo import MotorEnvio, URL_BASE_TWILIO, con_prefijo_whatsapp
+from cola_envios import DespachadorCola, clave_idempotencia, lote_del_dia
 
 logger = logging.getLogger(__name__)
 
+# Gráficos que acompañan al reporte: (archivo, descripción)
+IMAGENES_REPORTE = [
+    ('graficos/ventas_por_sede.png', "📊 Ventas por Sede"),
+    ('graficos/top_modelos.png', "🚗 Top 5 Modelos Más Vendidos"),
+    ('graficos/canales_ventas.png', "📞 Canales de Venta"),
+    ('graficos/segmento_clientes.png', "👥 Segmento de Clientes"),
+    ('graficos/dashboard_resumen.png', "📈 Dashboard Resumen"),
+]
+
+# Resultados que identifican un reporte para la deduplicación de la cola
+RESULTADOS_LOTE = ['metricas', 'ventas_por_sede', 'top_modelos', 'canales_ventas', 'segmento_ventas']
+
+
+def lote_reporte(resultados):
+    """
+    Lote de un reporte: el día y un hash de sus resultados. No se usa el texto
+    del reporte porque lleva la hora de generación: tras una caída, el mismo
+    análisis daría otras claves y se volvería a enviar.
+    """
+    contenido = {}
+    for nombre in RESULTADOS_LOTE:
+        if nombre in resultados:
+            valor = resultados[nombre]
+            if hasattr(valor, 'items'):
+                valor = {str(clave): dato for clave, dato in valor.items()}
+            contenido[nombre] = valor
+    texto = json.dumps(contenido, sort_keys=True, default=str)
+    return f"{lote_del_dia()}:{hashlib.sha256(texto.encode('utf-8')).hexdigest()[:16]}"
+
+
 class WhatsAppSender:
-    def __init__(self):
+    def __init__(self, cola=None):
+        """
+        Args:
+            cola (ColaEnvios): Si se indica, los mensajes se escriben en esta cola
+                persistente y los envía un DespachadorCola (ver despachador())
+        """
+        self.cola = cola
+        
         # Cargar .env explícitamente
         from dotenv import load_dotenv
         load_dotenv()
@@ -23,40 +60,74 @@ class WhatsAppSender:
             self.client = None
         else:
             try:
+                from twilio.rest import Client
                 self.client = Client(self.account_sid, self.auth_token)
                 logger.info("Cliente de Twilio inicializado correctamente")
             except Exception as e:
                 logger.error(f"Error al inicializar Twilio: {str(e)}")
                 self.client = None
     
-    def enviar_mensaje(self, destino, mensaje):
+    def _crear_mensaje(self, destino, cuerpo, media_url=None):
+        """
+        Crea el mensaje en Twilio y devuelve su SID. Lanza la excepción si falla
+        (lo usa el despachador de la cola para decidir los reintentos).
+        """
+        if not self.client:
+            raise RuntimeError("Cliente de Twilio no disponible")
+        
+        parametros = {
+            'body': cuerpo,
+            'from_': con_prefijo_whatsapp(self.twilio_whatsapp_number),
+            'to': con_prefijo_whatsapp(destino),
+        }
+        if media_url:
+            parametros['media_url'] = [media_url]
+        return self.client.messages.create(**parametros).sid
+    
+    def despachador(self, **opciones):
+        """
+        Crea el despachador que vacía la cola de este emisor.
+        Las opciones se pasan a DespachadorCola (max_intentos, espera_base, ...).
+        """
+        if not self.cola:
+            raise ValueError("WhatsAppSender se creó sin cola de envíos")
+        return DespachadorCola(self.cola, self._crear_mensaje, **opciones)
+    
+    def enviar_mensaje(self, destino, mensaje, lote=None):
         """
         Envía un mensaje de texto por WhatsApp
         
         Args:
             destino (str): Número de destino en formato WhatsApp (ej: whatsapp:+1234567890)
             mensaje (str): Mensaje a enviar
+            lote (str): Identificador del envío para la clave de idempotencia
+                (solo con cola; por defecto, el día actual)
             
         Returns:
-            bool: True si se envió correctamente, False en caso contrario
+            bool: True si se envió (o encoló) correctamente, False si falló o si
+                el mismo mensaje ya estaba en la cola para ese lote
         """
+        if self.cola:
+            _, encolado = self.cola.encolar(destino, mensaje, lote=lote)
+            if not encolado:
+                logger.warning(f"⚠️ Mensaje duplicado para {destino}: ya estaba en la cola, no se reenvía")
+                return False
+            logger.info(f"Mensaje encolado para {destino}")
+            return True
+        
         if not self.client:
             logger.error("Cliente de Twilio no disponible")
             return False
         
         try:
-            message = self.client.messages.create(
-                body=mensaje,
-                from_=self.twilio_whatsapp_number,
-                to=f'whatsapp:{destino}'
-            )
-            logger.info(f"Mensaje enviado exitosamente. SID: {message.sid}")
+            sid = self._crear_mensaje(destino, mensaje)
+            logger.info(f"Mensaje enviado exitosamente. SID: {sid}")
             return True
         except Exception as e:
             logger.error(f"Error al enviar mensaje: {str(e)}")
             return False
     
-    def enviar_imagen(self, destino, url_imagen, mensaje=""):
+    def enviar_imagen(self, destino, url_imagen, mensaje="", lote=None):
         """
         Envía una imagen por WhatsApp
         
@@ -64,28 +135,34 @@ class WhatsAppSender:
             destino (str): Número de destino
             url_imagen (str): URL de la imagen a enviar
             mensaje (str): Mensaje acompañante
+            lote (str): Identificador del envío para la clave de idempotencia
+                (solo con cola; por defecto, el día actual)
             
         Returns:
-            bool: True si se envió correctamente, False en caso contrario
+            bool: True si se envió (o encoló) correctamente, False si falló o si
+                la misma imagen ya estaba en la cola para ese lote
         """
+        if self.cola:
+            _, encolado = self.cola.encolar(destino, mensaje, media_url=url_imagen, lote=lote)
+            if not encolado:
+                logger.warning(f"⚠️ Imagen duplicada para {destino}: ya estaba en la cola, no se reenvía")
+                return False
+            logger.info(f"Imagen encolada para {destino}")
+            return True
+        
         if not self.client:
             logger.error("Cliente de Twilio no disponible")
             return False
         
         try:
-            message = self.client.messages.create(
-                body=mensaje,
-                from_=self.twilio_whatsapp_number,
-                media_url=[url_imagen],
-                to=f'whatsapp:{destino}'
-            )
-            logger.info(f"Imagen enviada exitosamente. SID: {message.sid}")
+            sid = self._crear_mensaje(destino, mensaje, url_imagen)
+            logger.info(f"Imagen enviada exitosamente. SID: {sid}")
             return True
         except Exception as e:
             logger.error(f"Error al enviar imagen: {str(e)}")
             return False
     
-    def enviar_reporte_completo(self, destino, analizador, servidor_web=None):
+    def enviar_reporte_completo(self, destino, analizador, servidor_web=None, enlaces=None, lote=None):
         """
         Envía un reporte completo por WhatsApp
         
@@ -93,42 +170,38 @@ class WhatsAppSender:
             destino (str): Número de destino
             analizador (AnalizadorVentas): Instancia del analizador con resultados
             servidor_web (str): URL base para acceder a las imágenes (opcional)
+            enlaces (dict): Nombre del gráfico -> URL ya publicada (ver
+                publicacion_graficos); tiene prioridad sobre servidor_web
+            lote (str): Identificador de la ejecución para la deduplicación de la
+                cola; por defecto, lote_reporte(analizador.resultados)
             
         Returns:
-            bool: True si se envió correctamente, False en caso contrario
+            bool: True si se envió (o encoló) correctamente, False en caso contrario
         """
-        if not self.client:
+        if not self.client and not self.cola:
             logger.error("Cliente de Twilio no disponible")
             return False
         
         try:
             # Enviar reporte de texto
             reporte_texto = analizador.generar_reporte_texto()
-            if not self.enviar_mensaje(destino, reporte_texto):
+            # El texto y las imágenes de un mismo reporte comparten lote; volver a
+            # ejecutar con los mismos resultados (por ejemplo, tras una caída) no
+            # duplica nada, y un reporte nuevo o el del día siguiente sí se envía
+            lote = lote or lote_reporte(analizador.resultados)
+            if self.cola:
+                # La clave del texto no depende del cuerpo, que lleva la hora de generación
+                _, encolado = self.cola.encolar(destino, reporte_texto,
+                                                clave=clave_idempotencia(destino, 'reporte', lote=lote))
+                if not encolado:
+                    logger.warning(f"⚠️ El reporte del lote {lote} ya estaba en la cola para "
+                                   f"{destino}, no se reenvía")
+            elif not self.enviar_mensaje(destino, reporte_texto):
                 return False
             
-            # Si hay servidor web configurado, enviar imágenes
-            if servidor_web:
-                imagenes = [
-                    'graficos/ventas_por_sede.png',
-                    'graficos/top_modelos.png',
-                    'graficos/canales_ventas.png',
-                    'graficos/segmento_clientes.png',
-                    'graficos/dashboard_resumen.png'
-                ]
-                
-                mensajes_imagenes = [
-                    "📊 Ventas por Sede",
-                    "🚗 Top 5 Modelos Más Vendidos",
-                    "📞 Canales de Venta",
-                    "👥 Segmento de Clientes",
-                    "📈 Dashboard Resumen"
-                ]
-                
-                for i, imagen in enumerate(imagenes):
-                    if os.path.exists(imagen):
-                        url_imagen = f"{servidor_web}/{imagen}"
-                        self.enviar_imagen(destino, url_imagen, mensajes_imagenes[i])
+            # Enviar imágenes publicadas o servidas desde servidor_web
+            for url_imagen, descripcion in self._urls_imagenes(servidor_web, enlaces):
+                self.enviar_imagen(destino, url_imagen, descripcion, lote=lote)
             
             logger.info("Reporte completo enviado exitosamente")
             return True
@@ -137,6 +210,48 @@ class WhatsAppSender:
             logger.error(f"Error al enviar reporte completo: {str(e)}")
             return False
 
+    def _urls_imagenes(self, servidor_web=None, enlaces=None):
+        """Lista de (URL, descripción) de los gráficos a enviar"""
+        urls = []
+        for imagen, descripcion in IMAGENES_REPORTE:
+            nombre = os.path.splitext(os.path.basename(imagen))[0]
+            if enlaces:
+                if nombre in enlaces:
+                    urls.append((enlaces[nombre], descripcion))
+            elif servidor_web and os.path.exists(imagen):
+                urls.append((f"{servidor_web}/{imagen}", descripcion))
+        return urls
+
+    def enviar_reporte_masivo(self, destinos, analizador, servidor_web=None, max_hilos=8,
+                              mensajes_por_segundo=10, url_base=URL_BASE_TWILIO, enlaces=None):
+        """
+        Envía el reporte completo a varios destinatarios en paralelo
+        
+        Args:
+            destinos (list): Números de destino
+            analizador (AnalizadorVentas): Instancia del analizador con resultados
+            servidor_web (str): URL base para acceder a las imágenes (opcional)
+            enlaces (dict): Nombre del gráfico -> URL ya publicada (opcional)
+            max_hilos (int): Envíos simultáneos como máximo
+            mensajes_por_segundo (float): Límite global de tasa
+            url_base (str): URL de la API (permite usar un servidor de prueba)
+            
+        Returns:
+            dict: Resumen del lote (ver MotorEnvio.enviar_lote) o None si no hay credenciales
+        """
+        if not all([self.account_sid, self.auth_token, self.twilio_whatsapp_number]):
+            logger.error("Credenciales de Twilio no disponibles")
+            return None
+        
+        mensajes = [(analizador.generar_reporte_texto(), None)]
+        mensajes += [(descripcion, url_imagen)
+                     for url_imagen, descripcion in self._urls_imagenes(servidor_web, enlaces)]
+        
+        with MotorEnvio(self.account_sid, self.auth_token, self.twilio_whatsapp_number,
+                        url_base=url_base, max_hilos=max_hilos,
+                        mensajes_por_segundo=mensajes_por_segundo) as motor:
+            return motor.enviar_lote(destinos, mensajes)
+
 # Función de utilidad para configurar Twilio
 def configurar_twilio():
     """